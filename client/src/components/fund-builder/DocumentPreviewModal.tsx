@@ -38,7 +38,19 @@ export function DocumentPreviewModal({
         setTimeout(() => setCopied(false), 2000);
     };
 
+    // PDFs arrive as artifact URLs; older drafts still hold base64
+    const isPdfUrl = type === "pdf" && /^https?:\/\//.test(content);
+
     const handleDownload = () => {
+        if (isPdfUrl) {
+            const a = document.createElement("a");
+            a.href = content;
+            a.download = filename;
+            document.body.appendChild(a);
+            a.click();
+            document.body.removeChild(a);
+            return;
+        }
         let blob;
         if (type === "pdf") {
             const byteCharacters = atob(content);
@@ -103,7 +115,7 @@ export function DocumentPreviewModal({
                 <div className="flex-grow overflow-hidden p-0 scrollbar-thin scrollbar-thumb-gray-800 scrollbar-track-transparent">
                     {type === "pdf" ? (
                         <iframe
-                            src={`data:application/pdf;base64,${content}`}
+                            src={isPdfUrl ? content : `data:application/pdf;base64,${content}`}
                             className="w-full h-full border-0"
                             title="PDF Preview"
                         />
@@ -23,6 +23,10 @@ export interface RebalanceResponse {
     summary_markdown?: string;
     proposal_json?: string;
     report_pdf?: string;
+    report_id?: string;
+    // pending until the `report` event: ready | failed, or shed when the server's render queue was full
+    report_status?: 'pending' | 'ready' | 'failed' | 'shed';
+    report_ref?: { digest: string; size: number; content_type: string; url: string };
     agent_logs?: Array<{
         node: string;
         type: string;
@@ -32,10 +36,16 @@ export interface RebalanceResponse {
     }>;
 }
 
+// Absolute URL of a server artifact (e.g. the PDF report)
+export function artifactUrl(ref?: { url: string } | null): string | undefined {
+    return ref ? `${process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000'}${ref.url}` : undefined;
+}
+
 export async function fetchRebalanceStream(
     topic: string,
     description: string,
-    onLog: (log: any) => void
+    onLog: (log: any) => void,
+    onPartial?: (field: string, delta: string) => void
 ): Promise<RebalanceResponse | null> {
     try {
         const response = await fetch(`${process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000'}/rebalance/`, {
@@ -79,8 +89,17 @@ export async function fetchRebalanceStream(
 
                         if (event.type === 'log') {
                             onLog(event.content);
+                        } else if (event.type === 'partial') {
+                            // Research summary/thesis text as the LLM writes it
+                            onPartial?.(event.field, event.delta);
                         } else if (event.type === 'result') {
                             finalResult = event.payload;
+                        } else if (event.type === 'report') {
+                            // The PDF renders in the background and follows the result as an artifact reference
+                            if (finalResult && (finalResult.report_id ?? null) === (event.report_id ?? null)) {
+                                finalResult.report_ref = event.report_ref;
+                                finalResult.report_status = event.status;
+                            }
                         } else if (event.type === 'error') {
                             console.error("Stream Error:", event.message);
                         }
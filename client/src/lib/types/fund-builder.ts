@@ -39,7 +39,7 @@ export interface FundDraft {
   status: 'DRAFT' | 'PUBLISHED';
   reportMarkdown?: string;
   proposalJson?: any;
-  reportPdf?: string;
+  reportPdf?: string; // Artifact URL (or legacy base64 PDF)
 }
 
 export interface AgentEvent {
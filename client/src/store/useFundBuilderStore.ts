@@ -10,6 +10,8 @@ interface FundBuilderState {
   createdDocs: CreatedDoc[]
   resourceLinks: { title: string, url: string }[]
   isAnalyzing: boolean
+  // Research text streamed while the analysis is still running (field -> text so far)
+  partialResearch: Record<string, string>
 
   // Actions
   setStage: (stage: FundBuilderStage) => void
@@ -53,6 +55,7 @@ export const useFundBuilderStore = create<FundBuilderState>()(
     createdDocs: [],
     resourceLinks: [],
     isAnalyzing: false,
+    partialResearch: {},
 
     setStage: (stage) => set({ currentStage: stage }),
 
@@ -77,12 +80,12 @@ export const useFundBuilderStore = create<FundBuilderState>()(
 
     runAnalysis: async (topic: string) => {
       const { addAgentEvent, updateDraft } = get()
-      set({ isAnalyzing: true })
+      set({ isAnalyzing: true, partialResearch: {} })
 
       addAgentEvent({ title: 'Topic Defined', message: topic, status: 'running', type: 'thinking' })
 
       try {
-        const { fetchRebalanceStream } = await import("@/lib/api");
+        const { fetchRebalanceStream, artifactUrl } = await import("@/lib/api");
 
         // Callback for real-time logs
         const onLog = (log: any) => {
@@ -110,7 +113,11 @@ export const useFundBuilderStore = create<FundBuilderState>()(
           });
         };
 
-        const data = await fetchRebalanceStream(topic, topic, onLog);
+        const onPartial = (field: string, delta: string) => set((state) => ({
+          partialResearch: { ...state.partialResearch, [field]: (state.partialResearch[field] || '') + delta }
+        }));
+
+        const data = await fetchRebalanceStream(topic, topic, onLog, onPartial);
 
         if (data) {
           const holdings = data.plan.targets.map(t => ({
@@ -145,7 +152,7 @@ export const useFundBuilderStore = create<FundBuilderState>()(
             name: topic,
             reportMarkdown: data.summary_markdown,
             proposalJson: data.proposal_json,
-            reportPdf: data.report_pdf
+            reportPdf: artifactUrl(data.report_ref) || data.report_pdf
           });
 
           addAgentEvent({
@@ -155,6 +162,17 @@ export const useFundBuilderStore = create<FundBuilderState>()(
             type: 'resource'
           })
 
+          if (data.report_status === 'shed' || data.report_status === 'failed') {
+            addAgentEvent({
+              title: 'Report Unavailable',
+              message: data.report_status === 'shed'
+                ? 'The server was busy rendering other reports; this run has no PDF.'
+                : 'The PDF report failed to render.',
+              status: 'failed',
+              type: 'resource'
+            })
+          }
+
           set({
             resourceLinks: data.research.evidence_items.map((item, i) => ({
               title: item.title || `Source ${i + 1}`,
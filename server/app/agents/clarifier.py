@@ -1,4 +1,4 @@
-from langchain_openai import ChatOpenAI
+from app.services import llm_gateway
 from langchain_core.messages import SystemMessage, HumanMessage
 import os
 
@@ -10,8 +10,6 @@ async def extract_search_keywords(topic: str, description: str) -> list[str]:
     if "placeholder" in os.getenv("OPENAI_API_KEY", "placeholder"):
         return [topic]
 
-    llm = ChatOpenAI(model="gpt-4o", temperature=0)
-
     prompt = (
         f"Topic: '{topic}'\n"
         f"Context/Thesis: '{description}'\n\n"
@@ -32,8 +30,13 @@ async def extract_search_keywords(topic: str, description: str) -> list[str]:
         "Output ONLY a comma-separated list of keywords. Do not number them."
     )
 
-    msg = await llm.ainvoke([SystemMessage(content="You are a search optimizer."), HumanMessage(content=prompt)])
-    content = msg.content.strip()
+    content = await llm_gateway.complete(
+        "clarifier.keywords",
+        [SystemMessage(content="You are a search optimizer."), HumanMessage(content=prompt)],
+        model="gpt-4o",
+        cache_if=lambda c: bool(c.strip()),
+    )
+    content = content.strip()
     
     # Cleaning
     keywords = [k.strip().replace('"', '') for k in content.split(',')]
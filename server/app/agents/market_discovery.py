@@ -0,0 +1,80 @@
+from app.graphs.state import AgentState
+from app.tools.polymarket.gamma_client import fetch_market_table
+from app.tools.polymarket.clob_client import attach_book_metrics
+from app.tools.risk.constraints import filter_markets
+from app.tools.risk.market_table import MarketTable
+
+async def market_discovery_node(state: AgentState) -> AgentState:
+    """
+    Runs alongside research (it only needs the portfolio, not the articles):
+    1. Fetch markets from Polymarket based on the portfolio keywords
+    2. Attach live order books
+    3. Filter markets (Liquidity, Spread, Depth - constraints.py)
+    """
+    from app.utils.logger import AgentLogger
+
+    # Branch-local log list; the graph merges it into the state with the research logs
+    logs = []
+    logger = AgentLogger("Market Discovery", logs)
+    logger.start("Scanning Polymarket...")
+
+    pf = state["portfolio"]
+    risk = pf.default_risk
+
+    # 1. Fetch
+    keywords = pf.keywords
+    primary_query = keywords[0] if keywords else ""
+    logger.think(f"I need to find liquid markets for '{primary_query}'. I will query the Gamma API with this broad term.")
+
+    logger.tool_call("Polymarket Gamma API", f"q='{primary_query}', tags={pf.universe_filters.get('tag')}")
+    # Rows come pre-decoded from the indexed universe, ready for the vectorized filter
+    table = await fetch_market_table(keywords=keywords, tags=pf.universe_filters.get("tag"))
+    logger.tool_result("Polymarket Gamma API", f"Found {len(table)} raw markets")
+
+    # Fallback: Agentic Search if API fails
+    if not len(table) and keywords:
+        logger.info("API returned 0 results. Attempting Agentic Search via Tavily...")
+        from app.tools.news.search import search_news
+        from app.tools.polymarket.gamma_client import fetch_event_by_slug
+
+        query = f"polymarket event {keywords[0]}"
+        logger.tool_call("Tavily Search", query)
+        results = await search_news(query, max_results=5)
+
+        slugs = set()
+        for r in results:
+            url = r.get("url", "")
+            if "polymarket.com/event/" in url:
+                parts = url.split("polymarket.com/event/")
+                if len(parts) > 1:
+                    slug = parts[1].split("?")[0].split("/")[0]
+                    slugs.add(slug)
+
+        logger.tool_result("Tavily Search", f"Found slugs: {list(slugs)}")
+
+        slug_markets = []
+        for slug in slugs:
+            logger.info(f"Fetching markets for slug: {slug}")
+            slug_markets.extend(await fetch_event_by_slug(slug))
+        table = MarketTable(slug_markets)
+
+    # 2. Live order books (one batched pass) so the filter sees real spreads and depth
+    if len(table):
+        position_size = state["bankroll"] * risk.max_position_pct
+        logger.tool_call("Polymarket CLOB", f"books for {len(table)} markets, slippage at ${position_size:.0f}")
+        try:
+            await attach_book_metrics(table, size_usd=position_size)
+        except Exception as e:
+            logger.error(f"Order book fetch failed, using default spreads: {e}")
+
+    # 3. Filter
+    logger.think("Filtering for quality...")
+    risk_markets = filter_markets(table, risk)
+    logger.info(f"{len(risk_markets)} markets passed risk filter (out of {len(table)})")
+    logger.end(f"{len(risk_markets)} candidate markets ready.")
+
+    return {
+        "candidate_markets": risk_markets,
+        "messages": [f"Market discovery finished. {len(risk_markets)} candidate markets."],
+        "structured_logs": logs
+    }
@@ -1,6 +1,7 @@
 from app.graphs.state import AgentState
 from app.tools.output.formatter import format_recommendation
-from app.tools.output.generator import generate_scientific_report, generate_allocation_proposal, generate_scientific_pdf
+from app.tools.output.generator import generate_scientific_report, generate_allocation_proposal
+from app.tools.output.render_pool import PENDING, SHED, render_pool
 
 async def orchestrator_node(state: AgentState) -> AgentState:
     """
@@ -19,13 +20,17 @@ async def orchestrator_node(state: AgentState) -> AgentState:
         portfolio_name=pf.name
     )
     
-    # Professional Research Report
-    report_pdf_b64 = generate_scientific_pdf(research, pf)
+    # Professional Research Report: rendered in the background so the result can
+    # stream out first; the PDF follows as a `report` event / GET /reports/{id}.
+    # None when the render queue is full: the run goes out without a PDF and says so.
+    report_id = await render_pool.submit(research, pf)
     
     return {
         "recommendation_text": text,
         "summary_markdown": None,
         "proposal_json": None,
-        "report_pdf": report_pdf_b64,
+        "report_pdf": None,
+        "report_id": report_id,
+        "report_status": PENDING if report_id else SHED,
         "messages": ["Prismlines research unit completed behavioral mapping and generated PDF report."]
     }
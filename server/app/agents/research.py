@@ -1,8 +1,11 @@
 from app.graphs.state import AgentState
-from app.tools.news.search import search_news
-from app.tools.news.extract import extract_article_content
+from app.tools.news.search import search_news_many
+from app.tools.news.pipeline import extract_round_robin
+from app.tools.news.context import build_context, RESEARCH_CONTEXT_TOKENS
+from app.utils.json_stream import JsonFieldStream
+from app.utils.stream import emit_event
 from app.schemas.portfolio import ResearchResult
-from langchain_openai import ChatOpenAI
+from app.services import llm_gateway
 from langchain_core.messages import SystemMessage, HumanMessage
 import os
 from dotenv import load_dotenv
@@ -18,10 +21,9 @@ async def research_node(state: AgentState) -> AgentState:
     """
     from app.utils.logger import AgentLogger
 
-    # Initialize Logger
-    if "structured_logs" not in state:
-        state["structured_logs"] = []
-    logger = AgentLogger("Research Agent", state["structured_logs"])
+    # Initialize Logger (branch-local; the graph merges it into the state)
+    logs = []
+    logger = AgentLogger("Research Agent", logs)
     
     pf = state["portfolio"]
     logger.start(f"Analyzing '{pf.name}'")
@@ -36,59 +38,22 @@ async def research_node(state: AgentState) -> AgentState:
     for kw in target_keywords:
         logger.think(f"Searching: '{kw}'")
         logger.tool_call("Tavily Search", kw)
-        
-        results = await search_news(kw)
+
+    # All keyword searches run concurrently; the phase takes as long as the slowest one
+    search_results = await search_news_many(target_keywords)
+
+    for kw in target_keywords:
+        results = search_results.get(kw, [])
         candidate_pools[kw] = results
         total_candidates += len(results)
         
         logger.tool_result("Tavily Search", f"Returned {len(results)} links for '{kw}'.")
-        
-        # logger.tool_result(...)
 
     logger.think(f"Gathered {total_candidates} results. Extracting top 10...")
 
-    # 2. Round-Robin Extraction Loop
-    evidence_items = []
+    # 2. Round-Robin Extraction (concurrent, stops once enough articles arrive)
     MAX_ITEMS = 10
-    
-    # We cycle through keywords until we hit MAX_ITEMS or run out of candidates
-    while len(evidence_items) < MAX_ITEMS and any(candidate_pools.values()):
-        for kw in target_keywords:
-            if len(evidence_items) >= MAX_ITEMS:
-                break
-                
-            pool = candidate_pools.get(kw, [])
-            if not pool:
-                continue
-                
-            # Try getting ONE working article for this keyword in this round
-            found_for_keyword = False
-            
-            while pool and not found_for_keyword:
-                item = pool.pop(0) # Take next candidate
-                url = item.get("url")
-                title = item.get("title", "Unknown Title")
-                
-                # Deduplicate by URL
-                if any(x.get("url") == url for x in evidence_items):
-                    continue
-
-                if url:
-                     logger.think(f"Reading: '{title}'")
-                     try:
-                        content = await extract_article_content(url)
-                        if content:
-                            item["content"] = content
-                            evidence_items.append(item)
-                            found_for_keyword = True
-                            logger.think(f"Added: '{title}'")
-                        else:
-                            pass
-                     except Exception as e:
-                        logger.error(f"Failed to extract {url}: {e}")
-            
-            if not found_for_keyword:
-                logger.think(f"Warning: Exhausted candidates for keyword '{kw}' without success in this round.")
+    evidence_items = await extract_round_robin(candidate_pools, target_keywords, MAX_ITEMS, logger=logger)
                 
     logger.think(f"Dataset complete ({len(evidence_items)} articles).")
     
@@ -97,14 +62,10 @@ async def research_node(state: AgentState) -> AgentState:
     thesis_discourse = "Deep analysis pending..."
     risk_flags = ["Analysis Incomplete"]
     
-    llm = ChatOpenAI(model="gpt-4o", temperature=0)
-    
-    # Prepare context
-    context = ""
-    for item in evidence_items: # Feed all gathered items to LLM
-        context += f"Source: {item.get('title', 'Unknown')}\n"
-        context += f"URL: {item.get('url')}\n"
-        context += f"Content: {item.get('content', item.get('content', 'No content'))[:500]}...\n\n"
+    # Prepare context: the most relevant, de-duplicated passages within a token budget
+    pack = build_context(evidence_items, [pf.name, *pf.keywords], RESEARCH_CONTEXT_TOKENS)
+    context = pack.text
+    logger.info(f"Packed {pack.chunks_used}/{pack.chunks_total} passages from {pack.sources} sources into {pack.tokens} tokens ({pack.duplicates} near-duplicates dropped).")
 
     system_prompt = (
         "You are a senior financial analyst for a hedge fund. "
@@ -127,19 +88,27 @@ async def research_node(state: AgentState) -> AgentState:
            from langchain_core.output_parsers import JsonOutputParser
            parser = JsonOutputParser()
            
-           msg = await llm.ainvoke([
+           # Stream the completion: summary/thesis text goes out as `partial` events
+           # while the rest of the JSON is still being generated
+           fields = JsonFieldStream(["summary", "thesis_discourse"])
+
+           def forward(delta: str):
+               for field, text in fields.feed(delta):
+                   emit_event({"type": "partial", "node": "Research Agent", "field": field, "delta": text})
+
+           content = await llm_gateway.complete("research.synthesis", [
                SystemMessage(content=system_prompt), 
                HumanMessage(content=f"Portfolio: {pf.name}\nDescription/Context: {pf.description}\nContext:\n{context}")
-           ])
+           ], model="gpt-4o", cache_if=llm_gateway.is_json_object, on_token=forward)
            
            try:
-               parsed = parser.parse(msg.content)
+               parsed = parser.parse(content)
                summary_text = parsed.get("summary", "Summary generation failed.")
                thesis_discourse = parsed.get("thesis_discourse", "Detailed analysis generation failed.")
                risk_flags = parsed.get("risk_flags", ["High Volatility"])
            except:
-               summary_text = msg.content
-               thesis_discourse = msg.content
+               summary_text = content
+               thesis_discourse = content
                risk_flags = ["Analysis Complete"]
 
         else:
@@ -167,6 +136,6 @@ async def research_node(state: AgentState) -> AgentState:
         "research_output": result, 
         "research_completed": True,
         "messages": ["Research completed."],
-        "structured_logs": state["structured_logs"]
+        "structured_logs": logs
     }
 
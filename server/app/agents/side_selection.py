@@ -0,0 +1,130 @@
+import asyncio
+import json
+import os
+import re
+from typing import Callable, Dict, List, Optional, Tuple
+from langchain_core.messages import SystemMessage, HumanMessage
+from app.services import llm_gateway
+from app.utils.limits import ConcurrencyLimit, RateLimit
+
+# The allocator scores markets in fixed-size batches, concurrently, each batch in
+# JSON mode. Markets a batch failed to score (bad JSON, missing or invalid entries)
+# are re-batched and retried; successful results are kept.
+SIDE_BATCH_SIZE = int(os.getenv("SIDE_BATCH_SIZE", "15"))
+SIDE_MAX_CONCURRENCY = int(os.getenv("SIDE_MAX_CONCURRENCY", "6"))
+SIDE_MAX_ATTEMPTS = int(os.getenv("SIDE_MAX_ATTEMPTS", "3"))
+# Upper bound on markets sent to the LLM per run (most relevant first)
+SIDE_MAX_MARKETS = int(os.getenv("SIDE_MAX_MARKETS", "150"))
+# The model's account limits (0 = unlimited). Batches wait for budget here instead
+# of running into 429s; concurrency alone does not bound requests or tokens per minute.
+SIDE_RPM = float(os.getenv("SIDE_RPM", "500"))
+SIDE_TPM = float(os.getenv("SIDE_TPM", "30000"))
+_side_limit = ConcurrencyLimit(SIDE_MAX_CONCURRENCY)
+_side_rate = RateLimit(SIDE_RPM, SIDE_TPM)
+
+def _prompt(topic: str, description: str, summary: str, items: List[Tuple[str, str]]) -> str:
+    listing = "\n".join(f"[{item_id}] {label}" for item_id, label in items)
+    return (
+        f"Topic: {topic}\n"
+        f"Fund Description: {description}\n"
+        f"Research Summary:\n{summary[:2000]}\n\n"
+        f"Market Questions to Evaluate (id in brackets):\n{listing}\n\n"
+        "Task: For EACH question, determine your conviction based on research.\n"
+        "1. **Side**: 'YES' if likely to happen, 'NO' if unlikely.\n"
+        "2. **Reasoning**: A 1-sentence analysis specific to THAT question.\n"
+        "3. **Confidence**: A score from 0-100 (int). \n"
+        "   - **CRITICAL**: This score determines the WEIGHT of the position. Be granular (e.g. 68, 85, 92).\n"
+        "   - Higher scores = larger position size. \n"
+        "Format: JSON Object keyed by the question id: { \"<id>\": { \"side\": \"YES\" or \"NO\", \"reasoning\": \"...\", \"confidence\": 85 } }\n"
+        "IMPORTANT: Answer every id exactly once."
+    )
+
+def _valid_entry(entry) -> Optional[Dict]:
+    if not isinstance(entry, dict):
+        return None
+    side = str(entry.get("side", "")).strip().upper()
+    try:
+        confidence = int(round(float(entry.get("confidence"))))
+    except (TypeError, ValueError):
+        return None
+    if side not in ("YES", "NO") or not 0 <= confidence <= 100:
+        return None
+    return {"side": side, "reasoning": str(entry.get("reasoning") or ""), "confidence": confidence}
+
+def parse_batch(content: str, ids: List[str]) -> Dict[str, Dict]:
+    """Valid {id: {side, reasoning, confidence}} entries for `ids` in a batch answer."""
+    try:
+        data = json.loads(re.sub(r"```(?:json)?", "", content).strip())
+    except ValueError:
+        return {}
+    if not isinstance(data, dict):
+        return {}
+    parsed = {}
+    for item_id in ids:
+        entry = _valid_entry(data.get(item_id, data.get(f"[{item_id}]")))
+        if entry:
+            parsed[item_id] = entry
+    return parsed
+
+async def _score_batch(topic: str, description: str, summary: str, items: List[Tuple[str, str]]) -> Dict[str, Dict]:
+    ids = [item_id for item_id, _ in items]
+    # Only complete answers are cached, so a retry of the same batch asks the LLM again
+    complete_answer: Callable[[str], bool] = lambda content: len(parse_batch(content, ids)) == len(ids)
+    async with _side_limit:
+        try:
+            content = await llm_gateway.complete(
+                "allocator.sides",
+                [SystemMessage(content="You are a Portfolio Manager."), HumanMessage(content=_prompt(topic, description, summary, items))],
+                model="gpt-4o",
+                cache_if=complete_answer,
+                rate_limit=_side_rate,
+                model_kwargs={"response_format": {"type": "json_object"}},
+            )
+        except Exception as e:
+            print(f"--- [Allocator] ⚠️ Side-selection batch failed: {e}")
+            return {}
+    return parse_batch(content, ids)
+
+def _question_labels(markets: List[Dict]) -> Dict[str, str]:
+    """Prompt label per distinct question, first SIDE_MAX_MARKETS in order (markets may share a question)."""
+    labels = {}
+    for m in markets:
+        question = m.get("question")
+        if question and question not in labels:
+            labels[question] = f"Event: {m.get('event_title', 'Unknown')} | Question: {question}"
+            if len(labels) >= SIDE_MAX_MARKETS:
+                break
+    return labels
+
+def questions_to_score(markets: List[Dict]) -> List[str]:
+    """The distinct questions `select_sides` sends to the LLM for `markets`."""
+    return list(_question_labels(markets))
+
+async def select_sides(topic: str, description: str, summary: str, markets: List[Dict], logger=None) -> Dict[str, Dict]:
+    """
+    Side, reasoning and confidence per market question (the `event_rationales` that
+    sizing expects), scored in concurrent JSON-mode batches of SIDE_BATCH_SIZE.
+    Keyed by question, so compare the result with `questions_to_score`, not the market count.
+    """
+    labels = _question_labels(markets)
+    questions = list(labels)
+    pending = [str(i) for i in range(len(questions))]
+
+    scored: Dict[str, Dict] = {}
+    for attempt in range(1, SIDE_MAX_ATTEMPTS + 1):
+        batches = [pending[i:i + SIDE_BATCH_SIZE] for i in range(0, len(pending), SIDE_BATCH_SIZE)]
+        if logger:
+            logger.tool_call("LLM side selection", f"{len(pending)} markets in {len(batches)} batches (attempt {attempt})")
+        results = await asyncio.gather(*(
+            _score_batch(topic, description, summary, [(item_id, labels[questions[int(item_id)]]) for item_id in batch])
+            for batch in batches
+        ))
+        for parsed in results:
+            for item_id, entry in parsed.items():
+                scored[questions[int(item_id)]] = entry
+        pending = [item_id for item_id in pending if questions[int(item_id)] not in scored]
+        if not pending:
+            break
+        if logger:
+            logger.info(f"{len(pending)} markets unscored after attempt {attempt}.")
+    return scored
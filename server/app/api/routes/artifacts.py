@@ -0,0 +1,64 @@
+from typing import Optional, Tuple
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+from app.services.artifact_store import artifact_store
+
+router = APIRouter()
+
+def _byte_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parses a single-range `Range: bytes=...` header into [start, end).
+    None means serve the whole body (no header, or multiple/unknown ranges);
+    ValueError means the range is unsatisfiable.
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    first, _, last = header[len("bytes="):].strip().partition("-")
+    try:
+        if first == "":  # Suffix: the last N bytes
+            length = int(last)
+            if length <= 0:
+                raise ValueError(header)
+            return max(0, size - length), size
+        start = int(first)
+        end = min(int(last) + 1, size) if last else size
+    except ValueError:
+        raise ValueError(header)
+    if start >= size or end <= start:
+        raise ValueError(header)
+    return start, end
+
+@router.api_route("/{digest}", methods=["GET", "HEAD"])
+def get_artifact(digest: str, request: Request):
+    """
+    Content-addressed artifacts: the digest is a strong ETag and the body never
+    changes, so clients may cache forever. Supports single byte ranges.
+    """
+    ref = artifact_store.stat(digest)
+    if ref is None:
+        raise HTTPException(status_code=404, detail="Artifact not found")
+
+    etag = f'"{ref.digest}"'
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=31536000, immutable", "Accept-Ranges": "bytes"}
+    if_none_match = request.headers.get("if-none-match", "")
+    if if_none_match.strip() == "*" or etag in [t.strip().removeprefix("W/") for t in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+
+    # If-Range with another validator: the client's partial copy is stale, send it all
+    range_header = request.headers.get("range")
+    if request.headers.get("if-range", etag) != etag:
+        range_header = None
+    try:
+        byte_range = _byte_range(range_header, ref.size)
+    except ValueError:
+        return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{ref.size}"})
+
+    start, end = byte_range or (0, ref.size)
+    status_code = 206 if byte_range else 200
+    headers["Content-Length"] = str(end - start)
+    if byte_range:
+        headers["Content-Range"] = f"bytes {start}-{end - 1}/{ref.size}"
+    if request.method == "HEAD":
+        return Response(status_code=status_code, headers=headers, media_type=ref.content_type)
+    return StreamingResponse(artifact_store.iter_range(digest, start, end), status_code=status_code,
+                             headers=headers, media_type=ref.content_type)
@@ -1,9 +1,10 @@
 from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel
 from typing import List, Optional, Any, Dict
+import asyncio
 import os
 from supabase import create_client, Client
-from app.services.funds_svc import normalize_holdings, generate_unique_fund_id, create_fund_draft, patch_fund_metadata
+from app.services.funds_svc import normalize_holdings, holdings_risk_metrics, store_report_artifact, generate_unique_fund_id, create_fund_draft, patch_fund_metadata
 from app.services.ai_enrichment import enrich_fund_metadata
 
 router = APIRouter()
@@ -111,7 +112,7 @@ async def publish_fund(fund: FundPublishRequest):
             
             # Persist generated artifacts if present
             "report_markdown": fund.report_markdown,
-            "report_pdf": fund.report_pdf,
+            "report_pdf": await asyncio.to_thread(store_report_artifact, fund.report_pdf),  # Artifact URL, not the PDF
             "proposal_json": fund.proposal_json or {},
             
             # Initial Metrics
@@ -129,6 +130,13 @@ async def publish_fund(fund: FundPublishRequest):
         if normalized_holdings:
             fund_data["top_concentration"] = max(h["weightPct"] for h in normalized_holdings)
 
+        # Simulated risk (market-implied odds): drawdown is reported as a negative percent
+        risk_metrics = await asyncio.to_thread(holdings_risk_metrics, normalized_holdings)
+        if risk_metrics:
+            fund_data["max_drawdown"] = -risk_metrics.max_drawdown_pct
+            fund_data["sharpe"] = risk_metrics.sharpe
+            fund_data["proposal_json"] = {**fund_data["proposal_json"], "risk_metrics": risk_metrics.model_dump()}
+
         print(f"Creating Fund Draft: {fund.name} (ID: {new_fund_id})")
 
         # 3. Insert Initial Row (Safety persist)
@@ -145,7 +153,7 @@ async def publish_fund(fund: FundPublishRequest):
         
         # We run enrichment in foreground for simplicity as requested "finalize fund logic"
         # In prod, this could be background task.
-        enriched_metadata = enrich_fund_metadata(fund.name, normalized_holdings, existing_data)
+        enriched_metadata = await enrich_fund_metadata(fund.name, normalized_holdings, existing_data)
         
         if enriched_metadata:
              print(f"Enriching Fund {new_fund_id} with AI metadata...")
@@ -1,7 +1,27 @@
 from fastapi import APIRouter
+from app.services import llm_gateway
+from app.services.job_queue import job_queue
+from app.services.rebalance_runs import rebalance_runs
+from app.tools.news.extract import article_cache_stats
+from app.tools.output.render_pool import render_pool
+from app.tools.polymarket.embedding_index import embedding_cache_stats
+from app.tools.polymarket.gamma_client import semantic_tag_cache_stats
 
 router = APIRouter()
 
 @router.get("/")
 def get_health():
     return {"status": "ok", "version": "0.1.0"}
+
+@router.get("/caches")
+def get_cache_health():
+    """Hit rates of the persistent caches, per-call-site LLM cache metrics, shared rebalance runs, the job queue and report renders."""
+    return {
+        "llm": llm_gateway.metrics(),
+        "articles": article_cache_stats(),
+        "embeddings": embedding_cache_stats(),
+        "semantic_tags": semantic_tag_cache_stats(),
+        "rebalance_runs": rebalance_runs.summary(),
+        "jobs": job_queue.summary(),
+        "reports": render_pool.summary(),
+    }
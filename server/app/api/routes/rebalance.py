@@ -1,106 +1,89 @@
-from fastapi import APIRouter, HTTPException
-from app.schemas.portfolio import RebalanceRequest, RebalanceResponse, PortfolioDefinition, RiskLimits
+from fastapi import APIRouter, Header, HTTPException
+from app.schemas.portfolio import RebalanceRequest
+from app.services.job_queue import FINISHED, job_queue
 from app.services.portfolio_registry import registry
-from app.graphs.supervisor_graph import supervisor_graph
+from app.services import rebalance_runs as runs_svc
+from app.services.rebalance_runs import rebalance_runs, request_key
 
 router = APIRouter()
 
 from fastapi.responses import StreamingResponse
 import asyncio
 import json
-from app.utils.stream import log_queue_var
+import os
+import time
+from typing import Optional
+
+# How often a job's event stream checks the queue for new events, and sends a keep-alive comment
+JOB_EVENT_POLL_S = float(os.getenv("JOB_EVENT_POLL_S", "0.25"))
+SSE_KEEPALIVE_S = 15.0
+
+def _require_portfolio(req: RebalanceRequest) -> None:
+    if not req.topic and not (req.portfolio_id and registry.get(req.portfolio_id)):
+        raise HTTPException(status_code=404, detail="Portfolio not found or topic missing")
 
 @router.post("/")
 async def run_rebalance(req: RebalanceRequest):
-    # 1. Get Portfolio
-    pf = None
-    if req.topic:
-        # Extract better keywords
-        from app.agents.clarifier import extract_search_keywords
-        keywords = await extract_search_keywords(req.topic, req.description or "")
-        print(f"--- [Planner] 🎯 Extracted keywords: {keywords}")
+    _require_portfolio(req)
+
+    # Identical concurrent requests share one run (and its keyword extraction, searches and LLM calls)
+    key = request_key(req.portfolio_id, req.topic, req.description)
+    run = rebalance_runs.attach(key, lambda publish: runs_svc.run_rebalance_graph(req, publish))
 
-        pf = PortfolioDefinition(
-            id="dynamic",
-            name=f"Dynamic Fund: {req.topic}",
-            description=req.description or f"Auto-generated fund for {req.topic}",
-            keywords=keywords,
-            universe_filters={"closed": False},
-            default_risk=RiskLimits(
-                max_position_pct=0.20,
-                min_liquidity_usd=100, 
-                min_volume_usd=0, 
-                max_spread_pct=0.15
-            )
-        )
-    elif req.portfolio_id:
-        pf = registry.get(req.portfolio_id)
-        if pf and req.description:
-            pf.description = req.description
-    
-    if not pf:
-        raise HTTPException(status_code=404, detail="Portfolio not found or topic missing")
-        
-    # 2. Init State
-    initial_state = {
-        "portfolio": pf,
-        "bankroll": 100.0,
-        "user_id": req.user_id,
-        "research_completed": False,
-        "research_output": None,
-        "allocation_plan": None,
-        "recommendation_text": None,
-        "summary_markdown": None,
-        "proposal_json": None,
-        "messages": []
-    }
-    
-    # 3. Stream Generator
     async def event_generator():
-        queue = asyncio.Queue()
-        token = log_queue_var.set(queue)
-        
-        # Run graph in background task
-        async def run_graph():
-            try:
-                final_state = await supervisor_graph.ainvoke(initial_state)
-                # Prepare final result
-                result = RebalanceResponse(
-                    recommendation=final_state["recommendation_text"],
-                    plan=final_state["allocation_plan"],
-                    research=final_state["research_output"],
-                    summary_markdown=final_state.get("summary_markdown"),
-                    proposal_json=final_state.get("proposal_json"),
-                    report_pdf=final_state.get("report_pdf"),
-                    agent_logs=final_state.get("structured_logs", [])
-                )
-                await queue.put({"type": "result", "payload": result.model_dump()})
-            except Exception as e:
-                print(f"Graph Error: {e}")
-                await queue.put({"type": "error", "message": str(e)})
-            finally:
-                await queue.put(None) # Sentinel
+        async for event in run.subscribe():
+            yield f"data: {json.dumps(event)}\n\n"
 
-        task = asyncio.create_task(run_graph())
-        
-        try:
-            while True:
-                # Wait for next event
-                item = await queue.get()
-                if item is None:
-                    break
-                
-                # Check if it's a log or result
-                if "payload" in item and item.get("type") == "result":
-                    # Final result
-                    yield f"data: {json.dumps(item)}\n\n"
-                elif "type" in item and item["type"] == "error":
-                    yield f"data: {json.dumps(item)}\n\n"
-                else:
-                    # It's a log entry
-                    yield f"data: {json.dumps({'type': 'log', 'content': item})}\n\n"
-                    
-        finally:
-            log_queue_var.reset(token)
+    return StreamingResponse(event_generator(), media_type="text/event-stream")
+
+@router.post("/jobs", status_code=202)
+async def enqueue_rebalance(req: RebalanceRequest):
+    """
+    Queues a rebalance for the worker pool (python -m app.cli.worker) and returns its
+    job id. An identical request that is still queued or running is joined instead.
+    """
+    _require_portfolio(req)
+    key = json.dumps(request_key(req.portfolio_id, req.topic, req.description))
+    job, created = await asyncio.to_thread(job_queue.enqueue, "rebalance", req.model_dump(), key)
+    return {**job.public(), "coalesced": not created, "events_url": f"/rebalance/jobs/{job.id}/events"}
+
+@router.get("/jobs/{job_id}")
+async def get_rebalance_job(job_id: str):
+    job = await asyncio.to_thread(job_queue.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.public()
+
+@router.get("/jobs/{job_id}/events")
+async def stream_rebalance_job(job_id: str, after: int = 0, last_event_id: Optional[str] = Header(None)):
+    """
+    The job's events as SSE, each with its sequence number as the event id. A client
+    resumes with the Last-Event-ID header (or ?after=) and only gets newer events.
+    Ends with {"type": "done", "status": ...} once the job has finished.
+    """
+    if await asyncio.to_thread(job_queue.get, job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    cursor = int(last_event_id) if last_event_id and last_event_id.isdigit() else max(after, 0)
+
+    async def event_generator():
+        nonlocal cursor
+        last_sent = time.monotonic()
+        while True:
+            # Status first: a finished job has already written all of its events
+            job = await asyncio.to_thread(job_queue.get, job_id)
+            events = await asyncio.to_thread(job_queue.events, job_id, cursor)
+            for seq, event in events:
+                yield f"id: {seq}\ndata: {json.dumps(event)}\n\n"
+                cursor = seq
+            if events:
+                last_sent = time.monotonic()
+                continue
+            if job is None or job.status in FINISHED:
+                yield f"data: {json.dumps({'type': 'done', 'status': job.status if job else 'expired'})}\n\n"
+                return
+            if time.monotonic() - last_sent > SSE_KEEPALIVE_S:
+                yield ": keep-alive\n\n"
+                last_sent = time.monotonic()
+            await asyncio.sleep(JOB_EVENT_POLL_S)
 
     return StreamingResponse(event_generator(), media_type="text/event-stream")
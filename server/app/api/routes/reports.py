@@ -0,0 +1,22 @@
+import asyncio
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import JSONResponse
+from app.tools.output.render_pool import render_pool
+
+router = APIRouter()
+
+@router.get("/{report_id}")
+async def get_report(report_id: str, wait: float = 0):
+    """
+    The artifact reference of a rebalance's rendered PDF (fetch it from report_ref.url).
+    Waits up to `wait` seconds; still rendering -> 202 {"status": "pending"}.
+    """
+    try:
+        report_ref = await render_pool.result(report_id, timeout=min(max(wait, 0), 60))
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Report not found")
+    except asyncio.TimeoutError:
+        return JSONResponse(status_code=202, content={"report_id": report_id, "status": "pending"})
+    if not report_ref:
+        raise HTTPException(status_code=500, detail="Report rendering failed")
+    return {"report_id": report_id, "status": "ready", "report_ref": report_ref}
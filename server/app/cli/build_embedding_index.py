@@ -0,0 +1,51 @@
+import asyncio
+import argparse
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from app.tools.polymarket import embedding_index
+from app.tools.polymarket.embedding_index import VectorIndex, embed_texts, market_text
+from app.tools.polymarket.gamma_client import KNOWN_TAGS, get_market_index, tags_fingerprint
+from app.utils.http import close_http_clients
+
+async def build_tag_index() -> VectorIndex:
+    labels = list(KNOWN_TAGS.keys())
+    index = VectorIndex.build(labels, await embed_texts(labels), meta={
+        "model": embedding_index.EMBEDDING_MODEL,
+        "fingerprint": tags_fingerprint(labels),
+    })
+    index.save(embedding_index.TAG_INDEX)
+    return index
+
+async def build_market_index() -> VectorIndex:
+    universe = await get_market_index()
+    markets = [m for m in universe.markets if m.get("id") is not None and m.get("question")]
+    ids = [str(m["id"]) for m in markets]
+    index = VectorIndex.build(ids, await embed_texts([market_text(m) for m in markets]), meta={
+        "model": embedding_index.EMBEDDING_MODEL,
+    })
+    index.save(embedding_index.MARKET_INDEX)
+    return index
+
+async def main():
+    parser = argparse.ArgumentParser(description="Build the tag/market embedding indexes used for semantic matching")
+    parser.add_argument("--only", choices=["tags", "markets"], help="Build a single index")
+    args = parser.parse_args()
+
+    if not embedding_index.embeddings_available():
+        print("❌ OPENAI_API_KEY is not set; cannot embed.")
+        return
+
+    try:
+        if args.only in (None, "tags"):
+            index = await build_tag_index()
+            print(f"✅ Tag index: {len(index)} tags -> {embedding_index.EMBEDDING_INDEX_DIR}")
+        if args.only in (None, "markets"):
+            index = await build_market_index()
+            print(f"✅ Market index: {len(index)} open markets -> {embedding_index.EMBEDDING_INDEX_DIR}")
+    finally:
+        await close_http_clients()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -56,6 +56,7 @@ async def main():
         "user_id": "cli_user",
         "research_completed": False,
         "research_output": None,
+        "candidate_markets": None,
         "allocation_plan": None,
         "recommendation_text": None,
         "messages": []
@@ -0,0 +1,41 @@
+import asyncio
+import argparse
+import signal
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from app.services import job_queue as queue_svc
+from app.services.job_worker import JOB_WORKER_CONCURRENCY, JobWorker
+# Registers the "rebalance" job handler
+import app.services.rebalance_runs  # noqa: F401
+from app.tools.output.render_pool import render_pool
+from app.tools.polymarket.clob_client import CLOB_URL
+from app.tools.polymarket.gamma_client import BASE_URL as GAMMA_URL
+from app.utils.http import close_http_clients, init_http_clients
+
+async def main():
+    parser = argparse.ArgumentParser(description="Run queued rebalance jobs (POST /rebalance/jobs)")
+    parser.add_argument("--concurrency", type=int, default=JOB_WORKER_CONCURRENCY, help="Jobs run at once by this process")
+    args = parser.parse_args()
+
+    if queue_svc.JOB_QUEUE_BACKEND == "memory":
+        print("❌ JOB_QUEUE_BACKEND=memory is private to one process; use sqlite (or JOB_INLINE_WORKERS in the API).")
+        return
+
+    init_http_clients([GAMMA_URL, CLOB_URL])
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        # First signal: finish the jobs in progress, then exit
+        loop.add_signal_handler(sig, stop.set)
+
+    print(f"🧵 Job queue: {queue_svc.job_queue.summary()}")
+    try:
+        await JobWorker(concurrency=args.concurrency).run(stop)
+    finally:
+        render_pool.shutdown()
+        await close_http_clients()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,4 +1,5 @@
-from typing import TypedDict, Optional, List
+import operator
+from typing import Annotated, TypedDict, Optional, List
 from app.schemas.portfolio import PortfolioDefinition, RiskLimits, ResearchResult, AllocationPlan
 
 class AgentState(TypedDict):
@@ -12,10 +13,14 @@ class AgentState(TypedDict):
     
     # Outputs
     research_output: Optional[ResearchResult]
+    candidate_markets: Optional[List[dict]]  # Risk-filtered markets from the discovery branch
     allocation_plan: Optional[AllocationPlan]
     recommendation_text: Optional[str]
     summary_markdown: Optional[str]
     proposal_json: Optional[str]
     report_pdf: Optional[str]
-    messages: List[str]  # Simple legacy log
-    structured_logs: List[dict] # [{ "node": str, "type": "thinking"|"info"|"error", "message": str, "timestamp": str }]
+    report_id: Optional[str]  # Background PDF render (render_pool)
+    report_status: Optional[str]  # "pending", or "shed" when the render queue was full
+    # Appended to by parallel branches, so these merge through reducers
+    messages: Annotated[List[str], operator.add]  # Simple legacy log
+    structured_logs: Annotated[List[dict], operator.add] # [{ "node": str, "type": "thinking"|"info"|"error", "message": str, "timestamp": str }]
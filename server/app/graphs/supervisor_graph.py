@@ -1,6 +1,7 @@
 from langgraph.graph import StateGraph, START, END
 from app.graphs.state import AgentState
 from app.agents.research import research_node
+from app.agents.market_discovery import market_discovery_node
 from app.agents.allocator import allocator_node
 from app.agents.orchestrator import orchestrator_node
 
@@ -9,15 +10,17 @@ def build_graph():
     
     # Add Nodes
     graph.add_node("research", research_node)
+    graph.add_node("market_discovery", market_discovery_node)
     graph.add_node("allocator", allocator_node)
     graph.add_node("orchestrator", orchestrator_node)
     
     # Edges
-    # START -> Research -> Allocator -> Orchestrator -> END
-    # In a complex app, Orchestrator would be a conditional node deciding where to go.
-    # For this linear flow:
+    # START -> [Research || Market Discovery] -> Allocator -> Orchestrator -> END
+    # Market discovery (Gamma fetch, CLOB books, risk filter) doesn't need the articles,
+    # so it runs in parallel with research; the allocator waits for both branches.
     graph.add_edge(START, "research")
-    graph.add_edge("research", "allocator")
+    graph.add_edge(START, "market_discovery")
+    graph.add_edge(["research", "market_discovery"], "allocator")
     graph.add_edge("allocator", "orchestrator")
     graph.add_edge("orchestrator", END)
     
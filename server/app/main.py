@@ -16,14 +16,45 @@ app.add_middleware(
 app.include_router(health.router, prefix="/health", tags=["system"])
 app.include_router(portfolios.router, prefix="/portfolios", tags=["portfolios"])
 app.include_router(rebalance.router, prefix="/rebalance", tags=["rebalance"])
-from app.api.routes import funds, users
+from app.api.routes import funds, users, reports, artifacts
 app.include_router(funds.router, prefix="/funds", tags=["funds"])
 app.include_router(users.router, prefix="/users", tags=["users"])
+app.include_router(reports.router, prefix="/reports", tags=["reports"])
+app.include_router(artifacts.router, prefix="/artifacts", tags=["artifacts"])
 
 @app.on_event("startup")
 async def startup_event():
     print("Starting up Portfolio Autopilot...")
+    from app.utils.http import init_http_clients
+    from app.tools.polymarket.gamma_client import BASE_URL as GAMMA_URL
+    from app.tools.polymarket.clob_client import CLOB_URL
+    init_http_clients([GAMMA_URL, CLOB_URL])
+
+    import asyncio
+    from app.tools.polymarket.gamma_client import run_market_universe_refresher
+    app.state.universe_refresher = asyncio.create_task(run_market_universe_refresher())
+
+    from app.tools.polymarket.book_mirror import book_mirror, BOOK_MIRROR_ENABLED
+    if BOOK_MIRROR_ENABLED:
+        book_mirror.start()
+
+    from app.services.job_worker import JobWorker, JOB_INLINE_WORKERS
+    app.state.job_worker_stop = asyncio.Event()
+    app.state.job_worker = None
+    if JOB_INLINE_WORKERS > 0:
+        app.state.job_worker = asyncio.create_task(JobWorker(concurrency=JOB_INLINE_WORKERS).run(app.state.job_worker_stop))
 
 @app.on_event("shutdown")
 async def shutdown_event():
     print("Shutting down...")
+    app.state.universe_refresher.cancel()
+    if app.state.job_worker is not None:
+        # Stop claiming; jobs still running are reclaimed by another worker once their lease expires
+        app.state.job_worker_stop.set()
+        app.state.job_worker.cancel()
+    from app.tools.polymarket.book_mirror import book_mirror
+    await book_mirror.stop()
+    from app.tools.output.render_pool import render_pool
+    render_pool.shutdown()
+    from app.utils.http import close_http_clients
+    await close_http_clients()
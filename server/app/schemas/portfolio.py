@@ -6,6 +6,10 @@ class RiskLimits(BaseModel):
     min_liquidity_usd: float = Field(..., description="Min liquidity required to enter")
     min_volume_usd: float = Field(0.0, description="Min 24h volume required to enter")
     max_spread_pct: float = Field(..., description="Max bid-ask spread allowed")
+    min_top_depth_usd: float = Field(0.0, description="Min USD resting at the best bid/ask (thinner side)")
+    max_slippage_pct: Optional[float] = Field(None, description="Max slippage buying one max-size position")
+    max_days_to_resolution: Optional[float] = Field(None, description="Skip markets resolving further out than this")
+    max_event_pct: Optional[float] = Field(None, description="Max % of bankroll across one correlation group (events of one series)")
 
 class PortfolioDefinition(BaseModel):
     id: str
@@ -43,11 +47,26 @@ class TargetAllocation(BaseModel):
     volume_usd: Optional[float] = 0.0
     liquidity_usd: Optional[float] = 0.0
     last_price: Optional[float] = 0.0
+    correlation_group: Optional[str] = None
+    end_date: Optional[str] = None  # Market resolution date (ISO 8601), orders the risk simulation
+
+class RiskMetrics(BaseModel):
+    """Monte Carlo P&L distribution of a plan (percentages of bankroll; losses positive)."""
+    scenarios: int
+    expected_return_pct: float
+    std_pct: float
+    var_95_pct: float
+    cvar_95_pct: float
+    prob_loss: float
+    expected_max_drawdown_pct: float
+    max_drawdown_pct: float  # 95th percentile of the path max drawdown
+    sharpe: float
 
 class AllocationPlan(BaseModel):
     targets: List[TargetAllocation]
     trades: List[Trade]
     warnings: List[str]
+    risk_metrics: Optional[RiskMetrics] = None
 
 class RebalanceRequest(BaseModel):
     portfolio_id: Optional[str] = None
@@ -55,11 +74,21 @@ class RebalanceRequest(BaseModel):
     description: Optional[str] = None
     user_id: Optional[str] = "default_user"
 
+class ArtifactRef(BaseModel):
+    """A stored artifact (e.g. the PDF report), served by GET /artifacts/{digest}."""
+    digest: str  # sha256 of the content
+    size: int
+    content_type: str
+    url: str
+
 class RebalanceResponse(BaseModel):
     recommendation: str
     plan: AllocationPlan
     research: ResearchResult
     summary_markdown: Optional[str] = None
     proposal_json: Optional[str] = None
-    report_pdf: Optional[str] = None
+    report_pdf: Optional[str] = None  # Legacy inline base64; reports now come as report_ref
+    report_id: Optional[str] = None
+    report_status: Optional[str] = None  # pending | shed; the `report` event brings ready | failed
+    report_ref: Optional[ArtifactRef] = None
     agent_logs: List[dict] = []
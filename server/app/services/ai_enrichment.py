@@ -1,12 +1,8 @@
 import json
-import os
 from typing import Dict, List, Any, Optional
-from openai import OpenAI
+from app.services import llm_gateway
 
-# Initialize OpenAI client
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
-def enrich_fund_metadata(
+async def enrich_fund_metadata(
     name: str, 
     holdings: List[Dict[str, Any]], 
     existing_data: Dict[str, Any]
@@ -67,14 +63,14 @@ Output JSON with ONLY the missing keys.
 """
 
     try:
-        response = client.chat.completions.create(
+        # Sampled (temperature 0.7) for varied copy, so the gateway does not cache it
+        content = await llm_gateway.complete(
+            "enrichment.metadata",
+            [{"role": "user", "content": prompt}],
             model="gpt-4o",
-            messages=[{"role": "user", "content": prompt}],
-            response_format={"type": "json_object"},
-            temperature=0.7
+            temperature=0.7,
+            model_kwargs={"response_format": {"type": "json_object"}},
         )
-        
-        content = response.choices[0].message.content
         if not content:
             return {}
             
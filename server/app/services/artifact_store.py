@@ -0,0 +1,119 @@
+import hashlib
+import json
+import os
+import re
+from typing import Iterator, Optional
+from app.schemas.portfolio import ArtifactRef
+from app.utils.cache import CACHE_DIR
+
+# Generated artifacts (PDF reports) are stored once, keyed by the sha256 of their
+# content, and referenced by URL instead of travelling base64-encoded in JSON.
+ARTIFACT_BACKEND = os.getenv("ARTIFACT_BACKEND", "local")  # local | s3
+ARTIFACT_DIR = os.getenv("ARTIFACT_DIR", os.path.join(CACHE_DIR, "artifacts"))
+# S3-compatible backend (AWS, MinIO, R2, ...); needs boto3
+ARTIFACT_S3_BUCKET = os.getenv("ARTIFACT_S3_BUCKET", "")
+ARTIFACT_S3_PREFIX = os.getenv("ARTIFACT_S3_PREFIX", "artifacts/")
+ARTIFACT_S3_ENDPOINT = os.getenv("ARTIFACT_S3_ENDPOINT") or None
+# Route serving the artifacts (app/api/routes/artifacts.py)
+ARTIFACT_URL_PREFIX = "/artifacts"
+ARTIFACT_CHUNK_SIZE = 64 * 1024
+
+_DIGEST_RE = re.compile(r"^[0-9a-f]{64}$")
+
+def is_digest(value: str) -> bool:
+    return bool(_DIGEST_RE.match(value or ""))
+
+def digest_from_url(value: Optional[str]) -> Optional[str]:
+    """The digest in an artifact URL (absolute or relative), or None."""
+    if not value:
+        return None
+    match = re.search(rf"{ARTIFACT_URL_PREFIX}/([0-9a-f]{{64}})$", value)
+    return match.group(1) if match else None
+
+def _ref(digest: str, size: int, content_type: str) -> ArtifactRef:
+    return ArtifactRef(digest=digest, size=size, content_type=content_type, url=f"{ARTIFACT_URL_PREFIX}/{digest}")
+
+class LocalArtifactStore:
+    """Artifacts under ARTIFACT_DIR/ab/abcdef..., with a small .json sidecar for the content type."""
+    def __init__(self, directory: str = ARTIFACT_DIR):
+        self.directory = directory
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.directory, digest[:2], digest)
+
+    def put(self, data: bytes, content_type: str) -> ArtifactRef:
+        """Stores `data` unless identical content is already there; returns its reference."""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path + ".json.tmp", "w") as f:
+                json.dump({"content_type": content_type}, f)
+            os.replace(path + ".json.tmp", path + ".json")
+            with open(path + ".tmp", "wb") as f:
+                f.write(data)
+            os.replace(path + ".tmp", path)
+        return _ref(digest, len(data), content_type)
+
+    def stat(self, digest: str) -> Optional[ArtifactRef]:
+        path = self._path(digest)
+        if not is_digest(digest) or not os.path.exists(path):
+            return None
+        try:
+            with open(path + ".json") as f:
+                content_type = json.load(f).get("content_type", "application/octet-stream")
+        except (OSError, ValueError):
+            content_type = "application/octet-stream"
+        return _ref(digest, os.path.getsize(path), content_type)
+
+    def iter_range(self, digest: str, start: int, end: int) -> Iterator[bytes]:
+        """Bytes [start, end) in chunks."""
+        with open(self._path(digest), "rb") as f:
+            f.seek(start)
+            remaining = end - start
+            while remaining > 0:
+                chunk = f.read(min(ARTIFACT_CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+
+class S3ArtifactStore:
+    """Artifacts as <prefix><digest> objects in an S3-compatible bucket."""
+    def __init__(self, bucket: str = ARTIFACT_S3_BUCKET, prefix: str = ARTIFACT_S3_PREFIX, endpoint_url: Optional[str] = ARTIFACT_S3_ENDPOINT):
+        import boto3  # Optional dependency, only needed for this backend
+        self.bucket = bucket
+        self.prefix = prefix
+        self._s3 = boto3.client("s3", endpoint_url=endpoint_url)
+
+    def _key(self, digest: str) -> str:
+        return f"{self.prefix}{digest}"
+
+    def put(self, data: bytes, content_type: str) -> ArtifactRef:
+        digest = hashlib.sha256(data).hexdigest()
+        if self.stat(digest) is None:
+            self._s3.put_object(Bucket=self.bucket, Key=self._key(digest), Body=data, ContentType=content_type)
+        return _ref(digest, len(data), content_type)
+
+    def stat(self, digest: str) -> Optional[ArtifactRef]:
+        if not is_digest(digest):
+            return None
+        try:
+            head = self._s3.head_object(Bucket=self.bucket, Key=self._key(digest))
+        except self._s3.exceptions.ClientError:
+            return None
+        return _ref(digest, head["ContentLength"], head.get("ContentType", "application/octet-stream"))
+
+    def iter_range(self, digest: str, start: int, end: int) -> Iterator[bytes]:
+        if end <= start:
+            return
+        obj = self._s3.get_object(Bucket=self.bucket, Key=self._key(digest), Range=f"bytes={start}-{end - 1}")
+        yield from obj["Body"].iter_chunks(ARTIFACT_CHUNK_SIZE)
+
+def _build_store():
+    if ARTIFACT_BACKEND == "s3":
+        print(f"--- [Artifacts] 🪣 Using S3 bucket '{ARTIFACT_S3_BUCKET}'")
+        return S3ArtifactStore()
+    return LocalArtifactStore()
+
+artifact_store = _build_store()
@@ -1,7 +1,12 @@
 from typing import List, Dict, Any, Optional
 from supabase import Client
 from app.utils.ids import generate_id
+from app.schemas.portfolio import RiskMetrics
+from app.tools.risk.simulation import simulate_portfolio
+from app.services.artifact_store import artifact_store, digest_from_url
 import math
+import base64
+import binascii
 
 def normalize_holdings(holdings: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     """
@@ -105,6 +110,46 @@ def normalize_holdings(holdings: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
 
     return normalized
 
+def _holding_price(h: Dict[str, Any]) -> Optional[float]:
+    """Entry price (0-1) of a normalized holding: lastPrice, else prob (0-100)."""
+    last_price = h.get("lastPrice")
+    if isinstance(last_price, (int, float)) and 0 < last_price < 1:
+        return float(last_price)
+    prob = h.get("prob")
+    return float(prob) / 100 if isinstance(prob, (int, float)) else None
+
+def holdings_risk_metrics(holdings: List[Dict[str, Any]], **kwargs) -> Optional[RiskMetrics]:
+    """
+    Monte Carlo risk metrics of normalized holdings at market-implied odds.
+    Positions resolve in expiry order and are correlated within a market slug.
+    """
+    priced = [h for h in holdings if _holding_price(h) is not None]
+    priced.sort(key=lambda h: (h.get("expiryDate") is None, str(h.get("expiryDate") or "")))
+    return simulate_portfolio(
+        weights=[h.get("weightPct", 0) / 100 for h in priced],
+        prices=[_holding_price(h) for h in priced],
+        groups=[h.get("slug") or h.get("marketId") for h in priced],
+        **kwargs,
+    )
+
+def store_report_artifact(report_pdf: Optional[str]) -> Optional[str]:
+    """
+    The artifact URL to persist for a fund's report. Accepts an existing artifact
+    URL or a legacy base64 PDF, which is stored (deduplicated by content hash).
+    """
+    if not report_pdf:
+        return None
+    digest = digest_from_url(report_pdf)
+    if digest:
+        ref = artifact_store.stat(digest)
+        return ref.url if ref else None
+    try:
+        pdf_bytes = base64.b64decode(report_pdf, validate=True)
+    except (binascii.Error, ValueError):
+        print("--- [Funds] ⚠️ Ignoring report_pdf: neither an artifact URL nor base64")
+        return None
+    return artifact_store.put(pdf_bytes, "application/pdf").url
+
 def generate_unique_fund_id(supabase: Client) -> str:
     """Generate a unique ID checking against database collisions."""
     for _ in range(5):
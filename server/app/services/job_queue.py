@@ -0,0 +1,273 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+from app.utils.cache import cache_path
+from app.utils.ids import generate_id
+
+# Durable queue for long-running jobs (rebalance runs). The API enqueues and
+# streams a job's events; workers (python -m app.cli.worker) claim jobs under a
+# lease they keep alive with heartbeats. A job whose worker dies is reclaimed once
+# its lease expires, up to JOB_MAX_ATTEMPTS times.
+JOB_QUEUE_BACKEND = os.getenv("JOB_QUEUE_BACKEND", "sqlite")  # sqlite | memory
+JOB_QUEUE_PATH = os.getenv("JOB_QUEUE_PATH", "")  # default: <CACHE_DIR>/jobs.sqlite3
+JOB_LEASE_S = float(os.getenv("JOB_LEASE_S", "60"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+# Finished jobs (and their events) are purged after this long
+JOB_RETAIN_S = float(os.getenv("JOB_RETAIN_S", str(24 * 3600)))
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+FINISHED = (DONE, FAILED)
+
+class Job(NamedTuple):
+    id: str
+    kind: str
+    payload: Dict[str, Any]
+    status: str
+    attempts: int
+    worker: Optional[str]
+    lease_until: float
+    error: Optional[str]
+    dedupe_key: Optional[str]
+    created_at: float
+    updated_at: float
+
+    def public(self) -> Dict[str, Any]:
+        return {"job_id": self.id, "kind": self.kind, "status": self.status, "attempts": self.attempts,
+                "error": self.error, "created_at": self.created_at, "updated_at": self.updated_at}
+
+class MemoryJobQueue:
+    """
+    In-process stand-in with the same interface as SQLiteJobQueue (tests, single
+    process dev). Jobs do not survive a restart and are not visible to other processes.
+    """
+    def __init__(self, lease_s: float = JOB_LEASE_S, max_attempts: int = JOB_MAX_ATTEMPTS):
+        self.lease_s = lease_s
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, Job] = {}
+        self._events: Dict[str, List[Tuple[int, Dict]]] = {}
+
+    def enqueue(self, kind: str, payload: Dict[str, Any], dedupe_key: Optional[str] = None) -> Tuple[Job, bool]:
+        """(job, created). With a dedupe_key, an unfinished job with the same key is returned instead."""
+        with self._lock:
+            if dedupe_key is not None:
+                for job in self._jobs.values():
+                    if job.dedupe_key == dedupe_key and job.status not in FINISHED:
+                        return job, False
+            now = time.time()
+            job = Job(generate_id(16), kind, payload, QUEUED, 0, None, 0.0, None, dedupe_key, now, now)
+            self._jobs[job.id] = job
+            self._events[job.id] = []
+            return job, True
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def claim(self, worker: str, kinds: Optional[List[str]] = None) -> Optional[Job]:
+        """The oldest runnable job (queued, or running on an expired lease), now leased to `worker`."""
+        with self._lock:
+            now = time.time()
+            for job in sorted(self._jobs.values(), key=lambda j: j.created_at):
+                if kinds and job.kind not in kinds:
+                    continue
+                if job.status == QUEUED or (job.status == RUNNING and job.lease_until < now):
+                    if job.attempts >= self.max_attempts:
+                        self._jobs[job.id] = job._replace(status=FAILED, error="Lease expired too many times", updated_at=now)
+                        continue
+                    claimed = job._replace(status=RUNNING, attempts=job.attempts + 1, worker=worker,
+                                           lease_until=now + self.lease_s, updated_at=now)
+                    self._jobs[job.id] = claimed
+                    return claimed
+            return None
+
+    def heartbeat(self, job_id: str, worker: str) -> bool:
+        """Extends the lease; False if `worker` no longer holds the job."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status != RUNNING or job.worker != worker:
+                return False
+            now = time.time()
+            self._jobs[job_id] = job._replace(lease_until=now + self.lease_s, updated_at=now)
+            return True
+
+    def finish(self, job_id: str, worker: str, status: str, error: Optional[str] = None) -> bool:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status != RUNNING or job.worker != worker:
+                return False
+            self._jobs[job_id] = job._replace(status=status, error=error, lease_until=0.0, updated_at=time.time())
+            return True
+
+    def append_events(self, job_id: str, events: List[Dict]) -> int:
+        """Appends events in order; returns the last sequence number."""
+        with self._lock:
+            log = self._events.setdefault(job_id, [])
+            seq = log[-1][0] if log else 0
+            for event in events:
+                seq += 1
+                log.append((seq, event))
+            return seq
+
+    def events(self, job_id: str, after: int = 0, limit: int = 500) -> List[Tuple[int, Dict]]:
+        """(seq, event) pairs with seq > after, oldest first."""
+        with self._lock:
+            return [e for e in self._events.get(job_id, []) if e[0] > after][:limit]
+
+    def purge(self, older_than_s: float = JOB_RETAIN_S) -> int:
+        cutoff = time.time() - older_than_s
+        with self._lock:
+            stale = [j.id for j in self._jobs.values() if j.status in FINISHED and j.updated_at < cutoff]
+            for job_id in stale:
+                del self._jobs[job_id]
+                self._events.pop(job_id, None)
+            return len(stale)
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            counts: Dict[str, int] = {}
+            for job in self._jobs.values():
+                counts[job.status] = counts.get(job.status, 0) + 1
+        return {"backend": "memory", "jobs": counts}
+
+class SQLiteJobQueue:
+    """SQLite-backed queue, shared by the API and worker processes on one host/volume."""
+    _COLUMNS = "id, kind, payload, status, attempts, worker, lease_until, error, dedupe_key, created_at, updated_at"
+
+    def __init__(self, path: Optional[str] = None, lease_s: float = JOB_LEASE_S, max_attempts: int = JOB_MAX_ATTEMPTS):
+        self.lease_s = lease_s
+        self.max_attempts = max_attempts
+        self.path = path or JOB_QUEUE_PATH or cache_path("jobs.sqlite3")
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id TEXT PRIMARY KEY, kind TEXT NOT NULL, payload TEXT NOT NULL, status TEXT NOT NULL,"
+            " attempts INTEGER NOT NULL, worker TEXT, lease_until REAL NOT NULL, error TEXT,"
+            " dedupe_key TEXT, created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_dedupe ON jobs (dedupe_key, status)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS job_events ("
+            " job_id TEXT NOT NULL, seq INTEGER NOT NULL, data TEXT NOT NULL, PRIMARY KEY (job_id, seq))"
+        )
+
+    def _job(self, row) -> Optional[Job]:
+        if row is None:
+            return None
+        return Job(row[0], row[1], json.loads(row[2]), *row[3:])
+
+    def _transaction(self, fn):
+        # IMMEDIATE takes the write lock up front, so concurrent claims cannot both win
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = fn(self._conn)
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            return result
+
+    def enqueue(self, kind: str, payload: Dict[str, Any], dedupe_key: Optional[str] = None) -> Tuple[Job, bool]:
+        def run(conn):
+            if dedupe_key is not None:
+                row = conn.execute(
+                    f"SELECT {self._COLUMNS} FROM jobs WHERE dedupe_key = ? AND status IN (?, ?) ORDER BY created_at LIMIT 1",
+                    (dedupe_key, QUEUED, RUNNING),
+                ).fetchone()
+                if row is not None:
+                    return self._job(row), False
+            now = time.time()
+            job = Job(generate_id(16), kind, payload, QUEUED, 0, None, 0.0, None, dedupe_key, now, now)
+            conn.execute(f"INSERT INTO jobs ({self._COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                         (job.id, kind, json.dumps(payload), *job[3:]))
+            return job, True
+        return self._transaction(run)
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._job(self._conn.execute(f"SELECT {self._COLUMNS} FROM jobs WHERE id = ?", (job_id,)).fetchone())
+
+    def claim(self, worker: str, kinds: Optional[List[str]] = None) -> Optional[Job]:
+        def run(conn):
+            now = time.time()
+            rows = conn.execute(
+                f"SELECT {self._COLUMNS} FROM jobs WHERE status = ? OR (status = ? AND lease_until < ?) ORDER BY created_at",
+                (QUEUED, RUNNING, now),
+            )
+            for job in map(self._job, rows.fetchall()):
+                if kinds and job.kind not in kinds:
+                    continue
+                if job.attempts >= self.max_attempts:
+                    conn.execute("UPDATE jobs SET status = ?, error = ?, updated_at = ? WHERE id = ?",
+                                 (FAILED, "Lease expired too many times", now, job.id))
+                    continue
+                claimed = job._replace(status=RUNNING, attempts=job.attempts + 1, worker=worker,
+                                       lease_until=now + self.lease_s, updated_at=now)
+                conn.execute("UPDATE jobs SET status = ?, attempts = ?, worker = ?, lease_until = ?, updated_at = ? WHERE id = ?",
+                             (RUNNING, claimed.attempts, worker, claimed.lease_until, now, job.id))
+                return claimed
+            return None
+        return self._transaction(run)
+
+    def heartbeat(self, job_id: str, worker: str) -> bool:
+        now = time.time()
+        with self._lock:
+            cur = self._conn.execute(
+                "UPDATE jobs SET lease_until = ?, updated_at = ? WHERE id = ? AND status = ? AND worker = ?",
+                (now + self.lease_s, now, job_id, RUNNING, worker),
+            )
+        return cur.rowcount == 1
+
+    def finish(self, job_id: str, worker: str, status: str, error: Optional[str] = None) -> bool:
+        with self._lock:
+            cur = self._conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, lease_until = 0, updated_at = ? WHERE id = ? AND status = ? AND worker = ?",
+                (status, error, time.time(), job_id, RUNNING, worker),
+            )
+        return cur.rowcount == 1
+
+    def append_events(self, job_id: str, events: List[Dict]) -> int:
+        def run(conn):
+            seq = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM job_events WHERE job_id = ?", (job_id,)).fetchone()[0]
+            rows = [(job_id, seq + i, json.dumps(event)) for i, event in enumerate(events, 1)]
+            conn.executemany("INSERT INTO job_events (job_id, seq, data) VALUES (?, ?, ?)", rows)
+            return seq + len(rows)
+        return self._transaction(run)
+
+    def events(self, job_id: str, after: int = 0, limit: int = 500) -> List[Tuple[int, Dict]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT seq, data FROM job_events WHERE job_id = ? AND seq > ? ORDER BY seq LIMIT ?", (job_id, after, limit)
+            ).fetchall()
+        return [(seq, json.loads(data)) for seq, data in rows]
+
+    def purge(self, older_than_s: float = JOB_RETAIN_S) -> int:
+        def run(conn):
+            cutoff = time.time() - older_than_s
+            stale = [r[0] for r in conn.execute(
+                "SELECT id FROM jobs WHERE status IN (?, ?) AND updated_at < ?", (DONE, FAILED, cutoff)
+            ).fetchall()]
+            for job_id in stale:
+                conn.execute("DELETE FROM job_events WHERE job_id = ?", (job_id,))
+                conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+            return len(stale)
+        return self._transaction(run)
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {"backend": "sqlite", "path": self.path, "jobs": dict(rows)}
+
+def create_job_queue(backend: str = JOB_QUEUE_BACKEND):
+    if backend == "memory":
+        return MemoryJobQueue()
+    return SQLiteJobQueue()
+
+job_queue = create_job_queue()
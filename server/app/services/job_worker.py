@@ -0,0 +1,137 @@
+import asyncio
+import os
+import socket
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+from app.services.job_queue import DONE, FAILED, Job, job_queue
+from app.utils.ids import generate_id
+
+# Jobs running at once per worker process
+JOB_WORKER_CONCURRENCY = int(os.getenv("JOB_WORKER_CONCURRENCY", "2"))
+JOB_POLL_S = float(os.getenv("JOB_POLL_S", "0.5"))
+# Published events are buffered and written in batches (streamed LLM deltas are small and many)
+JOB_EVENT_FLUSH_S = float(os.getenv("JOB_EVENT_FLUSH_S", "0.1"))
+JOB_PURGE_EVERY_S = 600.0
+# Workers run inside the API process too (single-process deploys, the memory backend); 0 = separate workers only
+JOB_INLINE_WORKERS = int(os.getenv("JOB_INLINE_WORKERS", "0"))
+
+Publish = Callable[[Dict], None]
+JobHandler = Callable[[Dict, Publish], Awaitable[None]]
+
+# kind -> async handler(payload, publish). A handler reports failure by raising or
+# by publishing an {"type": "error"} event.
+JOB_HANDLERS: Dict[str, JobHandler] = {}
+
+def job_handler(kind: str):
+    def register(fn: JobHandler):
+        JOB_HANDLERS[kind] = fn
+        return fn
+    return register
+
+class JobWorker:
+    """Claims jobs from the queue and runs their handlers, keeping each lease alive."""
+    def __init__(self, queue=None, concurrency: int = JOB_WORKER_CONCURRENCY, poll_s: float = JOB_POLL_S,
+                 flush_s: float = JOB_EVENT_FLUSH_S, worker_id: Optional[str] = None):
+        self.queue = queue or job_queue
+        self.concurrency = concurrency
+        self.poll_s = poll_s
+        self.flush_s = flush_s
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{generate_id(6)}"
+        self._running: Set[asyncio.Task] = set()
+
+    async def run(self, stop: Optional[asyncio.Event] = None) -> None:
+        """Claims and runs jobs until `stop` is set, then waits for the jobs in progress (cancel to abandon them)."""
+        stop = stop or asyncio.Event()
+        kinds = list(JOB_HANDLERS)
+        print(f"--- [Jobs] 👷 Worker {self.worker_id} started ({self.concurrency} slots, handlers: {kinds})")
+        last_purge = 0.0
+        try:
+            while not stop.is_set():
+                if time.monotonic() - last_purge > JOB_PURGE_EVERY_S:
+                    last_purge = time.monotonic()
+                    await asyncio.to_thread(self.queue.purge)
+                job = None
+                if len(self._running) < self.concurrency:
+                    job = await asyncio.to_thread(self.queue.claim, self.worker_id, kinds)
+                if job is not None:
+                    task = asyncio.create_task(self.run_job(job))
+                    self._running.add(task)
+                    task.add_done_callback(self._running.discard)
+                    continue
+                try:
+                    await asyncio.wait_for(stop.wait(), self.poll_s)
+                except asyncio.TimeoutError:
+                    pass
+        except asyncio.CancelledError:
+            # Hard stop: abandon running jobs, their leases expire and another worker reclaims them
+            for task in self._running:
+                task.cancel()
+            raise
+        finally:
+            if self._running:
+                await asyncio.gather(*self._running, return_exceptions=True)
+            print(f"--- [Jobs] 👋 Worker {self.worker_id} stopped")
+
+    async def run_job(self, job: Job) -> str:
+        """Runs one claimed job to completion; returns its final status."""
+        print(f"--- [Jobs] ▶️ {job.kind} job {job.id} (attempt {job.attempts})")
+        buffer: List[Dict] = []
+        error: Optional[str] = None
+        failed = lease_lost = False
+
+        def publish(event: Dict) -> None:
+            nonlocal failed, error
+            if event.get("type") == "error":
+                failed, error = True, error or event.get("message")
+            buffer.append(event)
+
+        handler_done = asyncio.Event()
+
+        async def write_events() -> None:
+            # The only writer of this job's events, so batches land in publish order
+            while True:
+                try:
+                    await asyncio.wait_for(handler_done.wait(), self.flush_s)
+                except asyncio.TimeoutError:
+                    pass
+                if buffer:
+                    batch = buffer[:]
+                    del buffer[:len(batch)]
+                    await asyncio.to_thread(self.queue.append_events, job.id, batch)
+                if handler_done.is_set() and not buffer:
+                    return
+
+        handler_task = asyncio.create_task(JOB_HANDLERS[job.kind](job.payload, publish))
+
+        async def keep_lease() -> None:
+            nonlocal lease_lost
+            while True:
+                await asyncio.sleep(self.queue.lease_s / 3)
+                if not await asyncio.to_thread(self.queue.heartbeat, job.id, self.worker_id):
+                    print(f"--- [Jobs] ⚠️ Lost the lease on job {job.id}; abandoning it")
+                    lease_lost = True
+                    handler_task.cancel()
+                    return
+
+        if job.attempts > 1:
+            # Earlier attempts' events stay in the stream; clients can reset on this marker
+            publish({"type": "restart", "attempt": job.attempts})
+        writer = asyncio.create_task(write_events())
+        lease = asyncio.create_task(keep_lease())
+        try:
+            await handler_task
+        except asyncio.CancelledError:
+            if not lease_lost:
+                raise  # The worker itself is being cancelled; the lease expires and the job is reclaimed
+            return "abandoned"  # Another worker may own the job now
+        except Exception as e:
+            publish({"type": "error", "message": str(e)})
+        finally:
+            lease.cancel()
+            handler_done.set()
+            await asyncio.gather(lease, writer, return_exceptions=True)
+
+        status = FAILED if failed else DONE
+        await asyncio.to_thread(self.queue.finish, job.id, self.worker_id, status, error)
+        print(f"--- [Jobs] {'❌' if failed else '✅'} {job.kind} job {job.id} {status}")
+        return status
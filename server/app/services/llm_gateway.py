@@ -0,0 +1,138 @@
+import hashlib
+import json
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+from langchain_openai import ChatOpenAI
+from app.utils.cache import PersistentKV
+from app.utils.limits import RateLimit
+
+# Every chat completion goes through `complete`. Deterministic (temperature 0)
+# calls are cached on disk, keyed on model + temperature + params + a hash of the
+# prompt, so re-running the same topic costs no tokens. Sampled calls are never cached.
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "1") == "1"
+LLM_CACHE_TTL_S = float(os.getenv("LLM_CACHE_TTL_S", str(7 * 24 * 3600)))
+LLM_CACHE_MAX_MB = float(os.getenv("LLM_CACHE_MAX_MB", "64"))
+# Bump to invalidate every cached response (e.g. after changing output parsing)
+LLM_CACHE_VERSION = "1"
+
+_llm_store = PersistentKV("llm_responses", ttl_s=LLM_CACHE_TTL_S, max_bytes=int(LLM_CACHE_MAX_MB * 1024 * 1024))
+
+# Per call site: cache hits/misses, uncached (sampled) calls, responses vetoed by
+# cache_if, errors, tokens spent and saved
+_site_stats: Dict[str, Dict[str, Any]] = {}
+
+def _chat_model(model: str, temperature: float, **params) -> ChatOpenAI:
+    return ChatOpenAI(model=model, temperature=temperature, **params)
+
+_ROLES = {"human": "user", "ai": "assistant"}
+
+def _message_dicts(messages: Sequence) -> List[Dict[str, str]]:
+    """LangChain messages or {"role", "content"} dicts -> plain dicts (stable for hashing)."""
+    out = []
+    for m in messages:
+        role, content = (m["role"], m["content"]) if isinstance(m, dict) else (m.type, m.content)
+        out.append({"role": _ROLES.get(role, role), "content": content})
+    return out
+
+def cache_key(model: str, temperature: float, messages: Sequence, **params) -> str:
+    payload = json.dumps(
+        {"v": LLM_CACHE_VERSION, "model": model, "temperature": float(temperature), "params": params, "messages": _message_dicts(messages)},
+        sort_keys=True, ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def _stats(site: str) -> Dict[str, Any]:
+    return _site_stats.setdefault(site, {"hits": 0, "misses": 0, "uncached": 0, "rejected": 0, "errors": 0,
+                                         "tokens_spent": 0, "tokens_saved": 0, "llm_seconds": 0.0})
+
+def _estimate_tokens(messages: Sequence, params: Dict[str, Any]) -> int:
+    """Rough prompt + completion size for rate limiting (~4 chars per token)."""
+    prompt = sum(len(m["content"] or "") for m in _message_dicts(messages)) // 4
+    return prompt + int(params.get("max_tokens") or 500)
+
+def _total_tokens(msg) -> int:
+    usage = getattr(msg, "usage_metadata", None) or {}
+    if usage:
+        return int(usage.get("total_tokens", 0))
+    return int((getattr(msg, "response_metadata", None) or {}).get("token_usage", {}).get("total_tokens", 0))
+
+async def complete(
+    site: str,
+    messages: Sequence,
+    model: str = "gpt-4o",
+    temperature: float = 0.0,
+    cache_if: Optional[Callable[[str], bool]] = None,
+    on_token: Optional[Callable[[str], None]] = None,
+    rate_limit: Optional[RateLimit] = None,
+    **params,
+) -> str:
+    """
+    Content of one chat completion for `messages`. `site` names the caller for the
+    metrics; `cache_if` can veto caching a response (e.g. one that failed to parse).
+    With `on_token` the completion is streamed and every content delta is passed to
+    it as it arrives (a cache hit is delivered as one delta). `rate_limit` is only
+    charged for calls that reach the model, never for cache hits.
+    Extra `params` (max_tokens, model_kwargs=...) are passed to ChatOpenAI and keyed.
+    """
+    stats = _stats(site)
+    cacheable = LLM_CACHE_ENABLED and temperature == 0
+    key = cache_key(model, temperature, messages, **params) if cacheable else None
+    if cacheable:
+        entry = await _llm_store.aget(key)
+        if entry is not None:
+            stats["hits"] += 1
+            stats["tokens_saved"] += entry.value.get("tokens", 0)
+            if on_token:
+                on_token(entry.value["content"])
+            return entry.value["content"]
+        stats["misses"] += 1
+    else:
+        stats["uncached"] += 1
+
+    estimated = 0
+    if rate_limit is not None:
+        estimated = _estimate_tokens(messages, params)
+        await rate_limit.acquire(estimated)
+    start = time.perf_counter()
+    try:
+        llm = _chat_model(model, temperature, **params)
+        if on_token:
+            msg = None
+            async for chunk in llm.astream(messages, stream_usage=True):
+                if chunk.content:
+                    on_token(chunk.content)
+                msg = chunk if msg is None else msg + chunk
+        else:
+            msg = await llm.ainvoke(messages)
+    except Exception:
+        stats["errors"] += 1
+        raise
+    stats["llm_seconds"] += time.perf_counter() - start
+    content = msg.content if msg is not None else ""
+    tokens = _total_tokens(msg)
+    stats["tokens_spent"] += tokens
+    if rate_limit is not None:
+        rate_limit.settle(estimated, tokens)
+
+    if cacheable:
+        if cache_if is None or cache_if(content):
+            await _llm_store.aset(key, {"site": site, "model": model, "content": content, "tokens": tokens})
+        else:
+            stats["rejected"] += 1
+    return content
+
+def is_json_object(content: str) -> bool:
+    """cache_if for prompts that must answer with a JSON object (tolerates ``` fences)."""
+    try:
+        return isinstance(json.loads(content.replace("```json", "").replace("```", "").strip()), dict)
+    except ValueError:
+        return False
+
+def metrics() -> Dict[str, Any]:
+    sites = {}
+    for site, stats in _site_stats.items():
+        lookups = stats["hits"] + stats["misses"]
+        sites[site] = {**stats, "llm_seconds": round(stats["llm_seconds"], 3),
+                       "hit_rate": round(stats["hits"] / lookups, 3) if lookups else 0.0}
+    return {"sites": sites, "store": _llm_store.summary()}
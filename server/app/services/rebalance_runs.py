@@ -0,0 +1,240 @@
+import asyncio
+import os
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+from app.graphs.supervisor_graph import supervisor_graph
+from app.schemas.portfolio import PortfolioDefinition, RebalanceRequest, RebalanceResponse, RiskLimits
+from app.services.job_worker import Publish, job_handler
+from app.services.portfolio_registry import registry
+from app.tools.output.render_pool import FAILED, READY, SHED, render_pool
+from app.utils.stream import log_queue_var
+
+# Identical concurrent /rebalance requests share one graph run: later callers
+# attach to the in-flight run, get its events so far replayed, then follow it live.
+# A finished run is kept for REBALANCE_RESULT_TTL_S so near-simultaneous repeats
+# replay it instead of starting over. Failed runs are never reused.
+REBALANCE_RESULT_TTL_S = float(os.getenv("REBALANCE_RESULT_TTL_S", "60"))
+REBALANCE_COALESCE = os.getenv("REBALANCE_COALESCE", "1") == "1"
+
+def _normalize(text: Optional[str]) -> str:
+    return " ".join((text or "").lower().split())
+
+def request_key(portfolio_id: Optional[str], topic: Optional[str], description: Optional[str]) -> Tuple[str, str, str]:
+    """
+    Coalescing key of a rebalance request: case- and whitespace-insensitive topic and
+    description. user_id is left out on purpose; it does not change the graph's output.
+    """
+    if topic:
+        return ("topic", _normalize(topic), _normalize(description))
+    return ("portfolio", portfolio_id or "", _normalize(description))
+
+async def build_portfolio(req: RebalanceRequest) -> Optional[PortfolioDefinition]:
+    if req.topic:
+        # Extract better keywords
+        from app.agents.clarifier import extract_search_keywords
+        keywords = await extract_search_keywords(req.topic, req.description or "")
+        print(f"--- [Planner] 🎯 Extracted keywords: {keywords}")
+
+        return PortfolioDefinition(
+            id="dynamic",
+            name=f"Dynamic Fund: {req.topic}",
+            description=req.description or f"Auto-generated fund for {req.topic}",
+            keywords=keywords,
+            universe_filters={"closed": False},
+            default_risk=RiskLimits(
+                max_position_pct=0.20,
+                min_liquidity_usd=100, 
+                min_volume_usd=0, 
+                max_spread_pct=0.15
+            )
+        )
+    pf = registry.get(req.portfolio_id)
+    if pf and req.description:
+        pf = pf.model_copy(update={"description": req.description})
+    return pf
+
+async def run_rebalance_graph(req: RebalanceRequest, publish: Publish) -> None:
+    """One full rebalance, publishing log/partial/result/report/error events."""
+    queue = asyncio.Queue()
+    log_queue_var.set(queue)  # Scoped to this run's task
+
+    async def run():
+        try:
+            # 1. Get Portfolio
+            pf = await build_portfolio(req)
+            # 2. Init State
+            initial_state = {
+                "portfolio": pf,
+                "bankroll": 100.0,
+                "user_id": req.user_id,
+                "research_completed": False,
+                "research_output": None,
+                "candidate_markets": None,
+                "allocation_plan": None,
+                "recommendation_text": None,
+                "summary_markdown": None,
+                "proposal_json": None,
+                "messages": []
+            }
+            final_state = await supervisor_graph.ainvoke(initial_state)
+            # Prepare final result
+            result = RebalanceResponse(
+                recommendation=final_state["recommendation_text"],
+                plan=final_state["allocation_plan"],
+                research=final_state["research_output"],
+                summary_markdown=final_state.get("summary_markdown"),
+                proposal_json=final_state.get("proposal_json"),
+                report_pdf=final_state.get("report_pdf"),
+                report_id=final_state.get("report_id"),
+                report_status=final_state.get("report_status"),
+                agent_logs=final_state.get("structured_logs", [])
+            )
+            await queue.put({"type": "result", "payload": result.model_dump()})
+
+            # The PDF renders off-loop; deliver its artifact reference as a follow-up event.
+            # The result is already out, so a failed render must not turn the run into an error.
+            if result.report_id:
+                try:
+                    report_ref = await render_pool.result(result.report_id)
+                except Exception as e:
+                    print(f"--- [Rebalance] ⚠️ Report {result.report_id} unavailable: {e!r}")
+                    report_ref = None
+                await queue.put({"type": "report", "report_id": result.report_id, "status": READY if report_ref else FAILED,
+                                 "report_ref": report_ref.model_dump() if report_ref else None})
+            elif result.report_status == SHED:
+                # The render queue was full: tell the client rather than leave it waiting for a PDF
+                await queue.put({"type": "report", "report_id": None, "status": SHED, "report_ref": None})
+        except Exception as e:
+            print(f"Graph Error: {e}")
+            await queue.put({"type": "error", "message": str(e)})
+        finally:
+            await queue.put(None) # Sentinel
+
+    task = asyncio.create_task(run())
+    try:
+        while True:
+            item = await queue.get()
+            if item is None:
+                break
+            if item.get("type") in ("result", "report", "partial", "error"):
+                # partial = streamed LLM text: {"type": "partial", "node", "field", "delta"}
+                publish(item)
+            else:
+                # It's a log entry
+                publish({"type": "log", "content": item})
+        await task
+    finally:
+        # Cancelled consumer (e.g. a worker that lost its job's lease): stop the graph too
+        if not task.done():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+@job_handler("rebalance")
+async def rebalance_job(payload: Dict, publish: Publish) -> None:
+    """Queued rebalance (POST /rebalance/jobs), run by a worker process."""
+    await run_rebalance_graph(RebalanceRequest(**payload), publish)
+
+class RebalanceRun:
+    """One graph execution and the SSE events (plain dicts) it has published so far."""
+    def __init__(self, key: Tuple[str, str, str]):
+        self.key = key
+        self.events: List[Dict] = []
+        self.subscribers: Set[asyncio.Queue] = set()
+        self.failed = False
+        self.finished_at: Optional[float] = None
+        self.task: Optional[asyncio.Task] = None
+
+    @property
+    def done(self) -> bool:
+        return self.finished_at is not None
+
+    def publish(self, event: Dict) -> None:
+        if event.get("type") == "error":
+            self.failed = True
+        self.events.append(event)
+        for queue in self.subscribers:
+            queue.put_nowait(event)
+
+    def _finish(self) -> None:
+        self.finished_at = time.monotonic()
+        for queue in self.subscribers:
+            queue.put_nowait(None)  # Sentinel
+        self.subscribers.clear()
+
+    async def subscribe(self) -> AsyncIterator[Dict]:
+        """Every event of the run from the first one, live until it finishes."""
+        # Snapshot and registration happen without an await in between, so nothing is missed or repeated
+        backlog = list(self.events)
+        if self.done:
+            for event in backlog:
+                yield event
+            return
+        queue: asyncio.Queue = asyncio.Queue()
+        self.subscribers.add(queue)
+        try:
+            for event in backlog:
+                yield event
+            while True:
+                event = await queue.get()
+                if event is None:
+                    break
+                yield event
+        finally:
+            # A disconnecting client only stops following; the run continues for the others
+            self.subscribers.discard(queue)
+
+class RebalanceRuns:
+    """Registry of in-flight and recently finished runs, keyed by `request_key`."""
+    def __init__(self, result_ttl_s: float = REBALANCE_RESULT_TTL_S, enabled: bool = REBALANCE_COALESCE):
+        self.result_ttl_s = result_ttl_s
+        self.enabled = enabled
+        self._runs: Dict[Tuple[str, str, str], RebalanceRun] = {}
+        self.stats = {"started": 0, "joined": 0, "replayed": 0, "failed": 0}
+
+    def _evict_expired(self) -> None:
+        now = time.monotonic()
+        for key, run in list(self._runs.items()):
+            if run.done and (run.failed or now - run.finished_at >= self.result_ttl_s):
+                del self._runs[key]
+
+    def attach(self, key: Tuple[str, str, str], runner: Callable[[Publish], Awaitable[Any]]) -> RebalanceRun:
+        """
+        The run for `key`: an in-flight or recently finished one if there is one,
+        otherwise a new run of `runner(publish)` on the current loop.
+        """
+        self._evict_expired()
+        run = self._runs.get(key) if self.enabled else None
+        if run is not None:
+            self.stats["replayed" if run.done else "joined"] += 1
+            print(f"--- [Rebalance] 🔗 {'Replaying' if run.done else 'Joining'} run for {key[1]!r} ({len(run.subscribers)} following)")
+            return run
+
+        run = RebalanceRun(key)
+        self.stats["started"] += 1
+
+        async def execute():
+            try:
+                await runner(run.publish)
+            except Exception as e:
+                print(f"--- [Rebalance] ❌ Run for {key[1]!r} failed: {e}")
+                run.publish({"type": "error", "message": str(e)})
+            finally:
+                if run.failed:
+                    self.stats["failed"] += 1
+                    if self._runs.get(key) is run:
+                        del self._runs[key]
+                run._finish()
+
+        # Not tied to any one request: clients come and go, the run completes
+        run.task = asyncio.create_task(execute())
+        if self.enabled:
+            self._runs[key] = run
+        return run
+
+    def summary(self) -> Dict[str, Any]:
+        self._evict_expired()
+        active = [run for run in self._runs.values() if not run.done]
+        return {**self.stats, "active": len(active), "cached": len(self._runs) - len(active),
+                "subscribers": sum(len(run.subscribers) for run in active)}
+
+rebalance_runs = RebalanceRuns()
@@ -0,0 +1,162 @@
+import hashlib
+import math
+import os
+import re
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Sequence
+import numpy as np
+
+try:
+    import tiktoken
+except ImportError: # No local tokenizer: estimate ~4 characters per token
+    tiktoken = None
+
+# The research prompt is packed from article passages, best first, until
+# RESEARCH_CONTEXT_TOKENS is reached. Near-duplicate passages (syndicated copies,
+# boilerplate) are dropped by SimHash distance before they can take budget.
+RESEARCH_CONTEXT_TOKENS = int(os.getenv("RESEARCH_CONTEXT_TOKENS", "6000"))
+CONTEXT_CHUNK_TOKENS = int(os.getenv("CONTEXT_CHUNK_TOKENS", "180"))
+CONTEXT_MAX_CHUNKS_PER_SOURCE = int(os.getenv("CONTEXT_MAX_CHUNKS_PER_SOURCE", "6"))
+# Passages whose 64-bit SimHashes differ in at most this many bits count as duplicates
+SIMHASH_MAX_DISTANCE = int(os.getenv("SIMHASH_MAX_DISTANCE", "3"))
+TOKENIZER_ENCODING = os.getenv("TOKENIZER_ENCODING", "o200k_base")  # gpt-4o
+
+_WORD_RE = re.compile(r"\w+")
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+_BIT_SHIFTS = np.arange(64, dtype=np.uint64)
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the this to was were will with".split()
+)
+
+class Chunk(NamedTuple):
+    source: int  # index into the evidence items
+    position: int  # order within the source
+    text: str
+    tokens: int
+
+class ContextPack(NamedTuple):
+    text: str
+    tokens: int
+    chunks_used: int
+    chunks_total: int
+    duplicates: int
+    sources: int
+
+@lru_cache(maxsize=1)
+def _encoding():
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.get_encoding(TOKENIZER_ENCODING)
+    except Exception as e:  # Unknown encoding / files not downloadable offline
+        print(f"--- [Context] ⚠️ Tokenizer unavailable ({e}); estimating tokens from length")
+        return None
+
+def count_tokens(text: str) -> int:
+    encoding = _encoding()
+    if encoding is None:
+        return math.ceil(len(text) / 4)
+    return len(encoding.encode(text, disallowed_special=()))
+
+def _terms(text: str) -> List[str]:
+    return [w for w in _WORD_RE.findall(text.lower()) if w not in _STOPWORDS]
+
+def chunk_text(text: str, max_tokens: int = CONTEXT_CHUNK_TOKENS) -> List[str]:
+    """Splits on paragraphs, then sentences, greedily packing pieces up to max_tokens."""
+    pieces = []
+    for paragraph in re.split(r"\n\s*\n", text or ""):
+        paragraph = " ".join(paragraph.split())
+        if paragraph:
+            pieces.extend(s for s in _SENTENCE_RE.split(paragraph) if s)
+    chunks, current, current_tokens = [], [], 0
+    for piece in pieces:
+        n = count_tokens(piece)
+        if current and current_tokens + n > max_tokens:
+            chunks.append(" ".join(current))
+            current, current_tokens = [], 0
+        current.append(piece)
+        current_tokens += n
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+def simhash(text: str, shingle: int = 3) -> int:
+    """64-bit SimHash over word shingles."""
+    words = _WORD_RE.findall(text.lower())
+    grams = [" ".join(words[i:i + shingle]) for i in range(max(1, len(words) - shingle + 1))]
+    hashes = np.array([int.from_bytes(hashlib.blake2b(g.encode("utf-8"), digest_size=8).digest(), "big") for g in grams], dtype=np.uint64)
+    bits = (hashes[:, None] >> _BIT_SHIFTS) & np.uint64(1)
+    majority = 2 * bits.sum(axis=0, dtype=np.int64) > len(grams)
+    return int(sum(1 << int(bit) for bit in np.flatnonzero(majority)))
+
+def _bm25_scores(chunks: Sequence[List[str]], query: Sequence[str], k1: float = 1.2, b: float = 0.75) -> List[float]:
+    n = len(chunks)
+    avg_len = sum(len(c) for c in chunks) / n if n else 0.0
+    df = Counter(term for c in chunks for term in set(c))
+    query_terms = set(query)
+    scores = []
+    for c in chunks:
+        tf = Counter(c)
+        score = 0.0
+        for term in query_terms:
+            if tf[term]:
+                idf = math.log(1 + (n - df[term] + 0.5) / (df[term] + 0.5))
+                score += idf * tf[term] * (k1 + 1) / (tf[term] + k1 * (1 - b + b * len(c) / (avg_len or 1)))
+        scores.append(score)
+    return scores
+
+def _header(item: Dict) -> str:
+    return f"Source: {item.get('title', 'Unknown')}\nURL: {item.get('url')}\n"
+
+def build_context(
+    evidence_items: List[Dict],
+    keywords: Sequence[str],
+    budget_tokens: int = RESEARCH_CONTEXT_TOKENS,
+    chunk_tokens: int = CONTEXT_CHUNK_TOKENS,
+) -> ContextPack:
+    """
+    Packs the most keyword-relevant, non-duplicate passages of `evidence_items`
+    into `budget_tokens` (source headers included). Passages are emitted grouped by
+    source, in article order, so the prompt reads like the old per-article context.
+    """
+    chunks: List[Chunk] = []
+    for source, item in enumerate(evidence_items):
+        for position, text in enumerate(chunk_text(item.get("content") or "", chunk_tokens)):
+            chunks.append(Chunk(source, position, text, count_tokens(text)))
+    if not chunks:
+        return ContextPack("", 0, 0, 0, 0, 0)
+
+    query = [t for kw in keywords for t in _terms(kw)]
+    terms = [_terms(f"{evidence_items[c.source].get('title', '')} {c.text}") for c in chunks]
+    scores = _bm25_scores(terms, query)
+    # Ties (e.g. no keyword hits at all) fall back to article order, leads first
+    ranked = sorted(range(len(chunks)), key=lambda i: (-scores[i], chunks[i].position, chunks[i].source))
+
+    per_source: Counter = Counter()  # Passages taken per source (its header is paid once)
+    kept_hashes: List[int] = []
+    selected: List[Chunk] = []
+    used, duplicates = 0, 0
+    for i in ranked:
+        chunk = chunks[i]
+        if per_source[chunk.source] >= CONTEXT_MAX_CHUNKS_PER_SOURCE:
+            continue
+        fingerprint = simhash(chunk.text)
+        if any((fingerprint ^ h).bit_count() <= SIMHASH_MAX_DISTANCE for h in kept_hashes):
+            duplicates += 1
+            continue
+        cost = chunk.tokens + 1
+        if not per_source[chunk.source]:
+            cost += count_tokens(_header(evidence_items[chunk.source])) + 1
+        if used + cost > budget_tokens:
+            continue  # A smaller passage may still fit
+        used += cost
+        per_source[chunk.source] += 1
+        kept_hashes.append(fingerprint)
+        selected.append(chunk)
+
+    sections = []
+    for source in sorted(per_source):
+        passages = sorted((c for c in selected if c.source == source), key=lambda c: c.position)
+        sections.append(_header(evidence_items[source]) + "\n".join(c.text for c in passages) + "\n")
+    return ContextPack("\n".join(sections), used, len(selected), len(chunks), duplicates, len(per_source))
@@ -1,41 +1,115 @@
-import httpx
-from bs4 import BeautifulSoup
+import codecs
+import os
 from typing import Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+from app.utils.cache import PersistentKV
+from app.utils.http import get_web_client
+from app.tools.news.html_text import FallbackExtractor, feed_async, close_async
+
+# Extracted article text is cached on disk by normalized URL. Entries are served
+# without a request for ARTICLE_CACHE_TTL_S; after that they are revalidated with
+# ETag/Last-Modified so unchanged pages skip the download and parse.
+ARTICLE_CACHE_TTL_S = float(os.getenv("ARTICLE_CACHE_TTL_S", str(6 * 3600)))
+ARTICLE_CACHE_MAX_MB = float(os.getenv("ARTICLE_CACHE_MAX_MB", "256"))
+_article_cache = PersistentKV("articles", ttl_s=ARTICLE_CACHE_TTL_S, max_bytes=int(ARTICLE_CACHE_MAX_MB * 1024 * 1024))
+
+# Bodies are streamed and parsed as they arrive; at most ARTICLE_MAX_BYTES are read
+# per page, and anything that is not HTML is rejected from its headers alone.
+ARTICLE_MAX_BYTES = int(os.getenv("ARTICLE_MAX_BYTES", str(2 * 1024 * 1024)))
+_HTML_CONTENT_TYPES = ("text/html", "application/xhtml+xml")
+
+# Query parameters that never change the page content
+_TRACKING_PARAMS = {"fbclid", "gclid", "mc_cid", "mc_eid", "ref", "ref_src", "cmpid", "smid"}
+
+def normalize_url(url: str) -> str:
+    """Canonical cache key: lowercase scheme/host, no default port, fragment or tracking params, sorted query."""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and not ((scheme == "http" and parts.port == 80) or (scheme == "https" and parts.port == 443)):
+        host = f"{host}:{parts.port}"
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith("utm_") and k.lower() not in _TRACKING_PARAMS
+    )
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit((scheme, host, path, urlencode(query), ""))
+
+def _codec_for(charset: Optional[str]) -> str:
+    if charset:
+        try:
+            return codecs.lookup(charset).name
+        except LookupError:
+            pass
+    return "utf-8"
+
+def article_cache_stats() -> dict:
+    return _article_cache.summary()
 
 async def extract_article_content(url: str) -> Optional[str]:
     """
-    Fetch URL and extract main body text using BeautifulSoup.
+    Fetch URL and extract main body text (see html_text.py for the parser backends).
     """
     if not url:
         return None
         
-    async with httpx.AsyncClient(follow_redirects=True, timeout=10.0) as client:
-        try:
-            # Skip known non-parseable domains
-            if "youtube.com" in url or "youtu.be" in url:
-                print(f"Skipping video content: {url}")
-                return None
+    client = get_web_client()
+    try:
+        # Skip known non-parseable domains
+        if "youtube.com" in url or "youtu.be" in url:
+            print(f"Skipping video content: {url}")
+            return None
 
-            # Stronger User-Agent to pass Wikipedia/News sites
-            headers = {
-                "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-            }
-            resp = await client.get(url, headers=headers)
+        key = normalize_url(url)
+        cached = await _article_cache.aget(key, allow_stale=True)
+        if cached and cached.fresh:
+            return cached.value["content"]
+
+        # Stronger User-Agent to pass Wikipedia/News sites
+        headers = {
+            "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+        }
+        if cached:
+            if cached.value.get("etag"):
+                headers["If-None-Match"] = cached.value["etag"]
+            if cached.value.get("last_modified"):
+                headers["If-Modified-Since"] = cached.value["last_modified"]
+
+        async with client.stream("GET", url, headers=headers, follow_redirects=True, timeout=10.0) as resp:
+            if resp.status_code == 304 and cached:
+                await _article_cache.atouch(key)
+                _article_cache.count("revalidated")
+                return cached.value["content"]
             resp.raise_for_status()
-            
-            soup = BeautifulSoup(resp.text, "html.parser")
-            
-            # Remove scripts and styles
-            for script in soup(["script", "style", "nav", "footer", "header"]):
-                script.decompose()
-            
-            # Simple heuristic: get all paragraph text
-            # In a real prod app, use trafilatura or similar
-            paragraphs = soup.find_all("p")
-            text = "\n\n".join([p.get_text().strip() for p in paragraphs if len(p.get_text()) > 40])
-            
-            return text[:5000] # truncate to avoid huge context
-            
-        except Exception as e:
-            print(f"Error extracting content from {url}: {e}")
-            return None
+
+            content_type = resp.headers.get("content-type", "").lower()
+            if content_type and not any(t in content_type for t in _HTML_CONTENT_TYPES):
+                print(f"Skipping non-HTML content ({content_type.split(';')[0]}): {url}")
+                return None
+
+            # Decode incrementally (multi-byte chars may straddle chunks) and feed the
+            # parser chunk by chunk; stop at the byte cap or once it has enough text
+            decoder = codecs.getincrementaldecoder(_codec_for(resp.charset_encoding))(errors="replace")
+            extractor = FallbackExtractor()
+            bytes_read = 0
+            async for chunk in resp.aiter_bytes():
+                chunk = chunk[:ARTICLE_MAX_BYTES - bytes_read]
+                bytes_read += len(chunk)
+                await feed_async(extractor, decoder.decode(chunk))
+                if extractor.done or bytes_read >= ARTICLE_MAX_BYTES:
+                    break
+            if not extractor.done:
+                await feed_async(extractor, decoder.decode(b"", final=True))
+            text = await close_async(extractor)
+
+        if text:
+            await _article_cache.aset(key, {
+                "content": text,
+                "etag": resp.headers.get("etag"),
+                "last_modified": resp.headers.get("last-modified"),
+            })
+        return text
+        
+    except Exception as e:
+        print(f"Error extracting content from {url}: {e}")
+        return None
@@ -0,0 +1,186 @@
+import asyncio
+import itertools
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Type
+from bs4 import BeautifulSoup
+
+try:
+    from lxml import etree
+except ImportError: # bs4 fallback only
+    etree = None
+
+# Same heuristic for every backend: text of <p> elements outside boilerplate
+# containers, paragraphs of more than 40 chars, truncated to MAX_CHARS.
+MAX_CHARS = 5000
+MIN_PARAGRAPH_CHARS = 40
+SKIP_TAGS = {"script", "style", "nav", "footer", "header"}
+
+HTML_PARSE_WORKERS = int(os.getenv("HTML_PARSE_WORKERS", "4"))
+# lxml parsers must stay on one thread, so each extractor is pinned to a single-thread lane
+_parse_lanes = [ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"html-parse-{i}") for i in range(HTML_PARSE_WORKERS)]
+_next_lane = itertools.count()
+
+class LxmlExtractor:
+    """
+    Streaming extractor on lxml's pull parser. Feed HTML in chunks; once MAX_CHARS
+    of paragraph text are collected it stops parsing and ignores further input.
+    """
+    name = "lxml"
+
+    def __init__(self, max_chars: int = MAX_CHARS):
+        self.max_chars = max_chars
+        self.done = False
+        self._parser = None  # Created by the first feed, on the thread that parses
+        self._paragraphs: List[str] = []
+        self._length = 0
+        self._skip_depth = 0
+        self._p_depth = 0
+
+    def _text(self, el) -> str:
+        parts = [el.text or ""]
+        for child in el:
+            if isinstance(child.tag, str) and child.tag.lower() not in SKIP_TAGS:
+                parts.append(self._text(child))
+            parts.append(child.tail or "")
+        return "".join(parts)
+
+    def _drain(self) -> None:
+        for event, el in self._parser.read_events():
+            tag = el.tag.lower() if isinstance(el.tag, str) else ""
+            if event == "start":
+                if tag in SKIP_TAGS:
+                    self._skip_depth += 1
+                elif tag == "p":
+                    self._p_depth += 1
+                continue
+
+            if tag in SKIP_TAGS:
+                self._skip_depth -= 1
+            elif tag == "p":
+                self._p_depth -= 1
+                if self._skip_depth == 0:
+                    raw = self._text(el)
+                    if len(raw) > MIN_PARAGRAPH_CHARS:
+                        text = raw.strip()
+                        self._paragraphs.append(text)
+                        self._length += len(text) + (2 if len(self._paragraphs) > 1 else 0)
+                        if self._length >= self.max_chars:
+                            self.done = True
+                            return
+            # Processed subtrees are no longer needed; keeps memory flat on huge pages
+            if self._p_depth == 0:
+                el.clear(keep_tail=True)
+
+    def feed(self, chunk: str) -> None:
+        if self.done or not chunk:
+            return
+        if self._parser is None:
+            self._parser = etree.HTMLPullParser(events=("start", "end"))
+        self._parser.feed(chunk)
+        self._drain()
+
+    def close(self) -> str:
+        if not self.done and self._parser is not None:
+            try:
+                self._parser.close()
+            except etree.LxmlError:
+                pass
+            self._drain()
+        return "\n\n".join(self._paragraphs)[:self.max_chars]
+
+class SoupExtractor:
+    """Original BeautifulSoup(html.parser) implementation; buffers input and parses on close."""
+    name = "bs4"
+
+    def __init__(self, max_chars: int = MAX_CHARS):
+        self.max_chars = max_chars
+        self.done = False
+        self._chunks: List[str] = []
+
+    def feed(self, chunk: str) -> None:
+        if chunk:
+            self._chunks.append(chunk)
+
+    def close(self) -> str:
+        soup = BeautifulSoup("".join(self._chunks), "html.parser")
+        for el in soup(list(SKIP_TAGS)):
+            el.decompose()
+        paragraphs = soup.find_all("p")
+        text = "\n\n".join([p.get_text().strip() for p in paragraphs if len(p.get_text()) > MIN_PARAGRAPH_CHARS])
+        return text[:self.max_chars]
+
+BACKENDS: Dict[str, Type] = {"bs4": SoupExtractor}
+if etree is not None:
+    BACKENDS["lxml"] = LxmlExtractor
+
+HTML_EXTRACTOR_BACKEND = os.getenv("HTML_EXTRACTOR_BACKEND", "lxml" if "lxml" in BACKENDS else "bs4")
+
+def new_extractor(backend: Optional[str] = None, max_chars: int = MAX_CHARS):
+    cls = BACKENDS.get(backend or HTML_EXTRACTOR_BACKEND, SoupExtractor)
+    return cls(max_chars=max_chars)
+
+class FallbackExtractor:
+    """
+    Streams into the configured backend and keeps the decoded input. If that backend
+    raises while feeding or closing, the page is re-parsed with SoupExtractor.
+    """
+    def __init__(self, backend: Optional[str] = None, max_chars: int = MAX_CHARS):
+        self.max_chars = max_chars
+        self._primary = new_extractor(backend, max_chars)
+        self.name = self._primary.name
+        self._chunks: List[str] = []
+        self._error: Optional[Exception] = None
+        # Parse lane for feed_async/close_async, dealt round-robin
+        self.lane = next(_next_lane) % len(_parse_lanes)
+
+    @property
+    def done(self) -> bool:
+        return self._error is None and self._primary.done
+
+    def feed(self, chunk: str) -> None:
+        if not chunk or self.done:
+            return
+        self._chunks.append(chunk)
+        if self._error is None:
+            try:
+                self._primary.feed(chunk)
+            except Exception as e:
+                self._error = e
+
+    def close(self) -> str:
+        if self._error is None:
+            try:
+                return self._primary.close()
+            except Exception as e:
+                self._error = e
+        if isinstance(self._primary, SoupExtractor):
+            raise self._error
+        print(f"--- [HTML] ⚠️ {self.name} extraction failed ({self._error}); falling back to bs4")
+        soup = SoupExtractor(self.max_chars)
+        soup.feed("".join(self._chunks))
+        return soup.close()
+
+def extract_text(html: str, backend: Optional[str] = None, max_chars: int = MAX_CHARS) -> str:
+    """
+    Paragraph text of `html` using the configured backend, falling back to
+    BeautifulSoup if the fast path fails.
+    """
+    extractor = FallbackExtractor(backend, max_chars)
+    extractor.feed(html)
+    return extractor.close()
+
+def _lane(extractor) -> ThreadPoolExecutor:
+    lane = getattr(extractor, "lane", None)
+    if lane is None:  # Bare backend extractors: pinned once, on first use
+        lane = extractor.lane = next(_next_lane) % len(_parse_lanes)
+    return _parse_lanes[lane]
+
+async def feed_async(extractor, chunk: str) -> None:
+    """Feeds one decoded chunk to a streaming extractor on its parse lane."""
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(_lane(extractor), extractor.feed, chunk)
+
+async def close_async(extractor) -> str:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_lane(extractor), extractor.close)
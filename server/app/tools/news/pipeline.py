@@ -0,0 +1,127 @@
+import asyncio
+import os
+from typing import Dict, List, Optional, Tuple
+from app.tools.news.extract import extract_article_content
+from app.utils.limits import ConcurrencyLimit
+
+# Articles are fetched ARTICLE_FETCH_CONCURRENCY at a time (process-wide);
+# a single page never holds the pipeline longer than ARTICLE_TIMEOUT_S.
+ARTICLE_FETCH_CONCURRENCY = int(os.getenv("ARTICLE_FETCH_CONCURRENCY", "8"))
+ARTICLE_TIMEOUT_S = float(os.getenv("ARTICLE_TIMEOUT_S", "10"))
+_article_limit = ConcurrencyLimit(ARTICLE_FETCH_CONCURRENCY)
+
+def _interleave(candidate_pools: Dict[str, List[Dict]], keywords: List[str]) -> List[Tuple[str, Dict]]:
+    """Orders candidates round-robin across keywords (kw1[0], kw2[0], ..., kw1[1], ...), dropping duplicate URLs."""
+    pools = {kw: list(candidate_pools.get(kw, [])) for kw in keywords}
+    seen = set()
+    ordered = []
+    while any(pools.values()):
+        for kw in keywords:
+            pool = pools[kw]
+            while pool:
+                item = pool.pop(0)
+                url = item.get("url")
+                if url and url not in seen:
+                    seen.add(url)
+                    ordered.append((kw, item))
+                    break
+    return ordered
+
+def _fair_shares(keywords: List[str], successes: Dict[str, list], pending: Dict[str, int], max_items: int) -> Dict[str, int]:
+    """
+    How many articles each keyword gets, dealt out one per round like the old
+    sequential loop. A keyword can only claim rounds it can still fill
+    (articles already extracted + candidates still in flight).
+    """
+    capacity = {kw: len(successes[kw]) + pending[kw] for kw in keywords}
+    shares = {kw: 0 for kw in keywords}
+    total = 0
+    while total < max_items:
+        progressed = False
+        for kw in keywords:
+            if total >= max_items:
+                break
+            if shares[kw] < capacity[kw]:
+                shares[kw] += 1
+                total += 1
+                progressed = True
+        if not progressed:
+            break
+    return shares
+
+async def extract_round_robin(
+    candidate_pools: Dict[str, List[Dict]],
+    keywords: List[str],
+    max_items: int,
+    logger=None
+) -> List[Dict]:
+    """
+    Extracts articles for `keywords` concurrently, keeping per-keyword round-robin fairness.
+    Fetches start in round-robin order under a bounded semaphore; as soon as every
+    keyword's fair share is filled the outstanding fetches are cancelled.
+    Returns evidence items (search result + "content") interleaved by keyword.
+    """
+    keywords = list(dict.fromkeys(keywords))
+    ordered = _interleave(candidate_pools, keywords)
+    if not ordered:
+        return []
+
+    pending = {kw: 0 for kw in keywords}
+    for kw, _ in ordered:
+        pending[kw] += 1
+    successes: Dict[str, List[Tuple[int, Dict]]] = {kw: [] for kw in keywords}
+
+    async def fetch(item: Dict) -> Optional[str]:
+        async with _article_limit:
+            if logger:
+                logger.think(f"Reading: '{item.get('title', 'Unknown Title')}'")
+            return await asyncio.wait_for(extract_article_content(item.get("url")), ARTICLE_TIMEOUT_S)
+
+    tasks = {asyncio.create_task(fetch(item)): (rank, kw, item) for rank, (kw, item) in enumerate(ordered)}
+    try:
+        waiting = set(tasks)
+        while waiting:
+            done, waiting = await asyncio.wait(waiting, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                rank, kw, item = tasks[task]
+                pending[kw] -= 1
+                try:
+                    content = task.result()
+                except asyncio.TimeoutError:
+                    if logger:
+                        logger.error(f"Timed out extracting {item.get('url')} after {ARTICLE_TIMEOUT_S}s")
+                    continue
+                except Exception as e:
+                    if logger:
+                        logger.error(f"Failed to extract {item.get('url')}: {e}")
+                    continue
+                if content:
+                    successes[kw].append((rank, {**item, "content": content}))
+                    if logger:
+                        logger.think(f"Added: '{item.get('title', 'Unknown Title')}'")
+
+            shares = _fair_shares(keywords, successes, pending, max_items)
+            if sum(min(len(successes[kw]), shares[kw]) for kw in keywords) >= max_items:
+                break
+    finally:
+        outstanding = [t for t in tasks if not t.done()]
+        for task in outstanding:
+            task.cancel()
+        if outstanding:
+            await asyncio.gather(*outstanding, return_exceptions=True)
+
+    # Keep each keyword's earliest-ranked successes, then deal them out round-robin
+    shares = _fair_shares(keywords, successes, {kw: 0 for kw in keywords}, max_items)
+    selected = {kw: [item for _, item in sorted(successes[kw], key=lambda x: x[0])[:shares[kw]]] for kw in keywords}
+
+    evidence_items = []
+    for round_idx in range(max(shares.values(), default=0)):
+        for kw in keywords:
+            if round_idx < len(selected[kw]):
+                evidence_items.append(selected[kw][round_idx])
+
+    if logger:
+        for kw in keywords:
+            if not selected[kw]:
+                logger.think(f"Warning: Exhausted candidates for keyword '{kw}' without success.")
+    return evidence_items
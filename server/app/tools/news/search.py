@@ -1,12 +1,46 @@
+import asyncio
 import os
 from typing import List, Dict
 from tavily import TavilyClient
 from dotenv import load_dotenv
+from app.utils.http import get_http_client
+from app.utils.limits import ConcurrencyLimit
+
+try:
+    from tavily import AsyncTavilyClient
+except ImportError: # Older tavily-python: fall back to the sync client on worker threads
+    AsyncTavilyClient = None
 
 load_dotenv()
 
 # If no key is present, it will eventually error or we handle gracefully
 TAVILY_API_KEY = os.getenv("TAVILY_API_KEY")
+TAVILY_API_URL = os.getenv("TAVILY_API_URL", "https://api.tavily.com")
+
+# At most TAVILY_MAX_CONCURRENCY searches hit Tavily at once (process-wide);
+# each one is abandoned after TAVILY_TIMEOUT_S.
+TAVILY_MAX_CONCURRENCY = int(os.getenv("TAVILY_MAX_CONCURRENCY", "5"))
+TAVILY_TIMEOUT_S = float(os.getenv("TAVILY_TIMEOUT_S", "10"))
+_tavily_limit = ConcurrencyLimit(TAVILY_MAX_CONCURRENCY)
+
+def _async_client():
+    """AsyncTavilyClient on the shared HTTP pool, or None if this tavily-python can't take one."""
+    global AsyncTavilyClient
+    if AsyncTavilyClient is None:
+        return None
+    try:
+        return AsyncTavilyClient(api_key=TAVILY_API_KEY, client=get_http_client(TAVILY_API_URL))
+    except TypeError as e: # Async client without the `client=` kwarg: use the sync one from now on
+        print(f"--- [Search] ⚠️ AsyncTavilyClient unusable ({e}); searching on worker threads")
+        AsyncTavilyClient = None
+        return None
+
+async def _tavily_search(query: str, max_results: int) -> Dict:
+    client = _async_client()
+    if client is not None:
+        return await client.search(query=query, search_depth="basic", max_results=max_results)
+    client = TavilyClient(api_key=TAVILY_API_KEY)
+    return await asyncio.to_thread(client.search, query=query, search_depth="basic", max_results=max_results)
 
 async def search_news(query: str, max_results: int = 5) -> List[Dict]:
     """
@@ -18,12 +52,20 @@ async def search_news(query: str, max_results: int = 5) -> List[Dict]:
         return []
 
     try:
-        # Tavily python client is synchronous by default, or we can use the async one if available.
-        # For simplicity in this scaffold we'll use the sync client but wrap it or just call it.
-        # In a high-concurrency app, run this in a threadpool.
-        client = TavilyClient(api_key=TAVILY_API_KEY)
-        response = client.search(query=query, search_depth="basic", max_results=max_results)
+        async with _tavily_limit:
+            response = await asyncio.wait_for(_tavily_search(query, max_results), timeout=TAVILY_TIMEOUT_S)
         return response.get("results", [])
+    except asyncio.TimeoutError:
+        print(f"Error searching news: Tavily timed out after {TAVILY_TIMEOUT_S}s for '{query}'")
+        return []
     except Exception as e:
         print(f"Error searching news: {e}")
         return []
+
+async def search_news_many(queries: List[str], max_results: int = 5) -> Dict[str, List[Dict]]:
+    """
+    Runs `search_news` for every query concurrently (bounded by TAVILY_MAX_CONCURRENCY).
+    Returns {query: results}; failed or timed-out queries map to [].
+    """
+    results = await asyncio.gather(*[search_news(q, max_results=max_results) for q in queries])
+    return dict(zip(queries, results))
@@ -104,11 +104,16 @@ def generate_allocation_proposal(plan: AllocationPlan, portfolio_name: str) -> s
                 "rationale_snippet": t.rationale[:100] + "..." if t.rationale else "N/A"
             } for t in plan.targets
         ],
-        "risk_overrides": plan.warnings
+        "risk_overrides": plan.warnings,
+        "risk_metrics": plan.risk_metrics.model_dump() if plan.risk_metrics else None
     }
     return json.dumps(proposal, indent=2)
 
 def generate_scientific_pdf(research: ResearchResult, portfolio: PortfolioDefinition) -> str:
+    """The scientific PDF report, base64-encoded ("" on failure)."""
+    return base64.b64encode(render_scientific_pdf(research, portfolio)).decode("utf-8")
+
+def render_scientific_pdf(research: ResearchResult, portfolio: PortfolioDefinition) -> bytes:
     """
     Generates a professional, scientific-style PDF report using fpdf2.
     Featured branding: Prismlines.
@@ -208,7 +213,7 @@ def generate_scientific_pdf(research: ResearchResult, portfolio: PortfolioDefini
         pdf.set_x(20)
         pdf.multi_cell(170, 4, sanitize_for_pdf(f"[{i}] {title}. Retrieval Link: {url}"))
 
-    # Output to base64
+    # Output raw bytes
     try:
         # dest='S' returns as string in FPDF 1.7.2
         pdf_content = pdf.output(dest='S')
@@ -218,6 +223,6 @@ def generate_scientific_pdf(research: ResearchResult, portfolio: PortfolioDefini
             pdf_bytes = bytes(pdf_content)
     except Exception as e:
         print(f"Prismlines PDF Generation Error: {e}")
-        return ""
+        return b""
 
-    return base64.b64encode(pdf_bytes).decode("utf-8")
+    return pdf_bytes
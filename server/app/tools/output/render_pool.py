@@ -0,0 +1,153 @@
+import asyncio
+import multiprocessing
+import os
+import socket
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional
+from app.schemas.portfolio import ArtifactRef, PortfolioDefinition, ResearchResult
+from app.services.artifact_store import artifact_store
+from app.tools.output.generator import render_scientific_pdf
+from app.utils.cache import LRUCache, PersistentKV
+from app.utils.ids import generate_id
+
+# PDF layout is CPU-bound, so reports render in worker processes instead
+# of on the event loop. 0 workers renders in a thread (no extra processes).
+REPORT_RENDER_WORKERS = int(os.getenv("REPORT_RENDER_WORKERS", "2"))
+# Renders accepted at once (queued + rendering); past that, submissions are shed
+# and the run goes without a PDF instead of waiting behind the backlog
+REPORT_QUEUE_SIZE = int(os.getenv("REPORT_QUEUE_SIZE", "8"))
+# Render tasks this process keeps to await locally
+REPORT_RETAIN = int(os.getenv("REPORT_RETAIN", "64"))
+# Report status records (shared by every process) are kept this long for /reports/{id}
+REPORT_RECORD_TTL_S = float(os.getenv("REPORT_RECORD_TTL_S", str(24 * 3600)))
+# A render (queue wait included) not finished by then counts as failed, also for
+# records whose owning process died before it could mark them
+REPORT_RENDER_TIMEOUT_S = float(os.getenv("REPORT_RENDER_TIMEOUT_S", "300"))
+REPORT_POLL_S = 0.5
+
+PENDING, READY, FAILED, SHED = "pending", "ready", "failed", "shed"
+
+# report_id -> {"status", "report_ref", "owner", "deadline"}. Written by the process
+# that renders, so the API answers /reports/{id} for reports rendered in a worker
+# process too. `deadline` is wall-clock (time.time()), comparable across processes.
+report_records = PersistentKV("reports", ttl_s=REPORT_RECORD_TTL_S, max_bytes=8 * 1024 * 1024)
+
+class RenderPool:
+    """
+    Renders scientific PDF reports in the background into the artifact store.
+    `submit` returns a report id immediately (None when the queue is full); `result`
+    awaits the stored PDF's reference (None if rendering failed). Status lives in
+    `records`, so any process can answer for a report rendered by another.
+    """
+    def __init__(self, workers: int = REPORT_RENDER_WORKERS, queue_size: int = REPORT_QUEUE_SIZE, retain: int = REPORT_RETAIN,
+                 records: Optional[PersistentKV] = None):
+        self.workers = workers
+        self.queue_size = max(1, queue_size)
+        self.records = records or report_records
+        self.render_timeout_s = REPORT_RENDER_TIMEOUT_S
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self.stats = {"submitted": 0, "shed": 0, "failed": 0}
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._in_flight = 0
+        self._reports = LRUCache(retain)  # report_id -> asyncio.Task[Optional[ArtifactRef]]
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn: forking a process that runs an event loop and HTTP clients is unsafe
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+            print(f"--- [Reports] 🖨️ Started {self.workers} PDF render workers")
+        return self._executor
+
+    async def _render(self, research: ResearchResult, portfolio: PortfolioDefinition) -> Optional[ArtifactRef]:
+        if self.workers <= 0:
+            pdf = await asyncio.to_thread(render_scientific_pdf, research, portfolio)
+        else:
+            loop = asyncio.get_running_loop()
+            pdf = await loop.run_in_executor(self._pool(), render_scientific_pdf, research, portfolio)
+        if not pdf:
+            return None
+        return await asyncio.to_thread(artifact_store.put, pdf, "application/pdf")
+
+    async def _run(self, report_id: str, research: ResearchResult, portfolio: PortfolioDefinition) -> Optional[ArtifactRef]:
+        ref = None
+        try:
+            ref = await asyncio.wait_for(self._render(research, portfolio), self.render_timeout_s)
+        except asyncio.TimeoutError:
+            print(f"--- [Reports] ❌ Report {report_id} not rendered within {self.render_timeout_s:.0f}s")
+        except Exception as e:
+            print(f"--- [Reports] ❌ Report {report_id} failed to render: {e}")
+        finally:
+            self._in_flight -= 1
+            if not ref:
+                self.stats["failed"] += 1
+            record = {"status": READY, "report_ref": ref.model_dump()} if ref else {"status": FAILED, "report_ref": None}
+            await self.records.aset(report_id, {**record, "owner": self.owner, "deadline": None})
+        return ref
+
+    async def submit(self, research: ResearchResult, portfolio: PortfolioDefinition) -> Optional[str]:
+        """
+        Queues a render on the running loop and returns its report id, or None if the
+        queue is full (the render is shed; callers report status SHED to the client).
+        """
+        if self._in_flight >= self.queue_size:
+            self.stats["shed"] += 1
+            print(f"--- [Reports] ⚠️ Render queue full ({self._in_flight} in flight); skipping this report")
+            return None
+        report_id = generate_id(16)
+        self._in_flight += 1
+        self.stats["submitted"] += 1
+        try:
+            await self.records.aset(report_id, {"status": PENDING, "report_ref": None, "owner": self.owner,
+                                                "deadline": time.time() + self.render_timeout_s})
+        except BaseException:
+            self._in_flight -= 1
+            raise
+        self._reports.set(report_id, asyncio.create_task(self._run(report_id, research, portfolio)))
+        return report_id
+
+    async def _record(self, report_id: str) -> Optional[Dict]:
+        entry = await self.records.aget(report_id)
+        if entry is None:
+            return None
+        record = entry.value
+        if record["status"] == PENDING and record.get("deadline") and time.time() > record["deadline"]:
+            # Its owner died (or hung) before finishing the render
+            return {**record, "status": FAILED}
+        return record
+
+    async def status(self, report_id: str) -> Optional[str]:
+        """'pending', 'ready', 'failed' (also: pending past its deadline), or None for unknown/expired ids."""
+        record = await self._record(report_id)
+        return record["status"] if record else None
+
+    async def result(self, report_id: str, timeout: Optional[float] = None) -> Optional[ArtifactRef]:
+        """
+        The stored PDF for `report_id`, waiting up to `timeout` seconds (None: until done).
+        Raises KeyError for unknown ids and asyncio.TimeoutError if still rendering.
+        """
+        task = self._reports.get(report_id)
+        if task is not None:
+            # shield: a caller giving up must not cancel the render for everyone else
+            return await asyncio.wait_for(asyncio.shield(task), timeout)
+        # Rendered (or rendering) in another process: follow its record
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            record = await self._record(report_id)
+            if record is None:
+                raise KeyError(report_id)
+            if record["status"] != PENDING:
+                return ArtifactRef(**record["report_ref"]) if record["report_ref"] else None
+            if deadline is not None and time.monotonic() >= deadline:
+                raise asyncio.TimeoutError()
+            await asyncio.sleep(REPORT_POLL_S if deadline is None else min(REPORT_POLL_S, max(0.0, deadline - time.monotonic())))
+
+    def summary(self) -> Dict:
+        return {**self.stats, "in_flight": self._in_flight, "queue_size": self.queue_size}
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+render_pool = RenderPool()
@@ -0,0 +1,249 @@
+import asyncio
+import json
+import os
+import time
+from array import array
+from typing import Dict, Iterable, List, Optional
+import websockets
+
+# Live L2 books from the CLOB market channel, kept for tokens the allocator asks
+# about. clob_client.attach_book_metrics reads these before falling back to REST.
+CLOB_WS_URL = os.getenv("CLOB_WS_URL", "wss://ws-subscriptions-clob.polymarket.com/ws/market")
+BOOK_MIRROR_ENABLED = os.getenv("BOOK_MIRROR_ENABLED", "true").lower() == "true"
+BOOK_MIRROR_IDLE_TTL_S = float(os.getenv("BOOK_MIRROR_IDLE_TTL_S", "900"))
+BOOK_MIRROR_PING_S = float(os.getenv("BOOK_MIRROR_PING_S", "10"))
+BOOK_MIRROR_RECONNECT_MAX_S = float(os.getenv("BOOK_MIRROR_RECONNECT_MAX_S", "30"))
+
+# Prices live on [0, 1]; 0.001 ticks cover both the 0.01 and 0.001 tick sizes
+TICKS = 1000
+
+def _tick(price) -> int:
+    return int(round(float(price) * TICKS))
+
+class L2Book:
+    """
+    Price-level book over fixed arrays indexed by tick, one per side.
+    Level updates are O(1); best bid/ask are tracked indices, so reads are O(1).
+    Only removing the best level scans (toward worse prices) for the next one.
+    """
+    __slots__ = ("bids", "asks", "best_bid_tick", "best_ask_tick", "updated_at")
+
+    def __init__(self):
+        self.bids = array("d", bytes(8 * (TICKS + 1)))
+        self.asks = array("d", bytes(8 * (TICKS + 1)))
+        self.best_bid_tick = -1
+        self.best_ask_tick = TICKS + 1
+        self.updated_at = 0.0
+
+    def clear(self) -> None:
+        for i in range(TICKS + 1):
+            self.bids[i] = 0.0
+            self.asks[i] = 0.0
+        self.best_bid_tick = -1
+        self.best_ask_tick = TICKS + 1
+
+    def apply_snapshot(self, bids: Iterable[Dict], asks: Iterable[Dict]) -> None:
+        self.clear()
+        for level in bids or []:
+            self.set_level("BUY", level["price"], level["size"])
+        for level in asks or []:
+            self.set_level("SELL", level["price"], level["size"])
+
+    def set_level(self, side: str, price, size) -> None:
+        tick, size = _tick(price), float(size)
+        if not 0 <= tick <= TICKS:
+            return
+        self.updated_at = time.time()
+        if side.upper() in ("BUY", "BID", "BIDS"):
+            self.bids[tick] = size
+            if size > 0 and tick > self.best_bid_tick:
+                self.best_bid_tick = tick
+            elif size <= 0 and tick == self.best_bid_tick:
+                t = tick - 1
+                while t >= 0 and self.bids[t] <= 0:
+                    t -= 1
+                self.best_bid_tick = t
+        else:
+            self.asks[tick] = size
+            if size > 0 and tick < self.best_ask_tick:
+                self.best_ask_tick = tick
+            elif size <= 0 and tick == self.best_ask_tick:
+                t = tick + 1
+                while t <= TICKS and self.asks[t] <= 0:
+                    t += 1
+                self.best_ask_tick = t
+
+    @property
+    def best_bid(self) -> Optional[float]:
+        return self.best_bid_tick / TICKS if self.best_bid_tick >= 0 else None
+
+    @property
+    def best_ask(self) -> Optional[float]:
+        return self.best_ask_tick / TICKS if self.best_ask_tick <= TICKS else None
+
+    @property
+    def spread(self) -> Optional[float]:
+        if self.best_bid is None or self.best_ask is None:
+            return None
+        return round(self.best_ask - self.best_bid, 6)
+
+    def to_book(self) -> Dict:
+        """Snapshot in the REST /book shape, for clob_client.book_metrics."""
+        bids = [{"price": str(t / TICKS), "size": str(self.bids[t])} for t in range(self.best_bid_tick, -1, -1) if self.bids[t] > 0]
+        asks = [{"price": str(t / TICKS), "size": str(self.asks[t])} for t in range(max(self.best_ask_tick, 0), TICKS + 1) if self.asks[t] > 0]
+        return {"bids": bids, "asks": asks}
+
+class BookMirror:
+    """
+    Background subscriber to the CLOB market channel.
+    `track()` subscribes tokens on demand; tokens nobody has read for `idle_ttl_s`
+    are unsubscribed and dropped. On disconnect all books are invalidated (readers
+    fall back to REST) and the subscriber reconnects with backoff and resubscribes.
+    """
+    def __init__(self, url: str = CLOB_WS_URL, idle_ttl_s: float = BOOK_MIRROR_IDLE_TTL_S, ping_s: float = BOOK_MIRROR_PING_S):
+        self.url = url
+        self.idle_ttl_s = idle_ttl_s
+        self.ping_s = ping_s
+        self.books: Dict[str, L2Book] = {}
+        self._last_used: Dict[str, float] = {}
+        self._ready: Dict[str, asyncio.Event] = {}
+        self._ws = None
+        self._subscribed = False  # initial "type": "market" message sent on this connection
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {"connects": 0, "messages": 0, "snapshots": 0, "updates": 0, "expired": 0}
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        if not self.running:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        self._invalidate()
+
+    def get(self, token_id: str) -> Optional[L2Book]:
+        """Live book for `token_id`, or None if not subscribed or no snapshot yet."""
+        event = self._ready.get(token_id)
+        if event is None or not event.is_set():
+            return None
+        self._last_used[token_id] = time.monotonic()
+        return self.books[token_id]
+
+    async def track(self, token_ids: List[str], wait_s: float = 0.0) -> None:
+        """Subscribes to new tokens; optionally waits up to `wait_s` for their snapshots."""
+        if not self.running:
+            return
+        now = time.monotonic()
+        new = []
+        for token_id in dict.fromkeys(token_ids):
+            self._last_used[token_id] = now
+            if token_id not in self._ready:
+                self._ready[token_id] = asyncio.Event()
+                self.books[token_id] = L2Book()
+                new.append(token_id)
+        if new and self._ws is not None:
+            await self._subscribe(new)
+        if wait_s > 0:
+            waits = [self._ready[t].wait() for t in token_ids]
+            try:
+                await asyncio.wait_for(asyncio.gather(*waits), wait_s)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _subscribe(self, token_ids: List[str]) -> None:
+        if self._subscribed:
+            await self._send({"assets_ids": token_ids, "operation": "subscribe"})
+        else:
+            self._subscribed = True
+            await self._send({"assets_ids": token_ids, "type": "market"})
+
+    async def _send(self, payload) -> None:
+        try:
+            await self._ws.send(payload if isinstance(payload, str) else json.dumps(payload))
+        except Exception as e:
+            print(f"--- [Book Mirror] ⚠️ Send failed: {e}")
+
+    def _invalidate(self) -> None:
+        for event in self._ready.values():
+            event.clear()
+
+    async def _run(self) -> None:
+        backoff = 1.0
+        while True:
+            try:
+                async with websockets.connect(self.url, ping_interval=None) as ws:
+                    self._ws = ws
+                    self._subscribed = False
+                    self.stats["connects"] += 1
+                    backoff = 1.0
+                    if self._ready:
+                        await self._subscribe(list(self._ready))
+                    print(f"--- [Book Mirror] 🔌 Connected ({len(self._ready)} tokens)")
+                    keepalive = asyncio.create_task(self._keepalive())
+                    try:
+                        async for raw in ws:
+                            self._handle(raw)
+                    finally:
+                        keepalive.cancel()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"--- [Book Mirror] ⚠️ Connection lost: {e}")
+            finally:
+                self._ws = None
+                self._invalidate()
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, BOOK_MIRROR_RECONNECT_MAX_S)
+
+    async def _keepalive(self) -> None:
+        while True:
+            await asyncio.sleep(self.ping_s)
+            await self._send("PING")
+            await self._expire_idle()
+
+    async def _expire_idle(self) -> None:
+        cutoff = time.monotonic() - self.idle_ttl_s
+        idle = [t for t, used in self._last_used.items() if used < cutoff]
+        if not idle:
+            return
+        for token_id in idle:
+            self._last_used.pop(token_id, None)
+            self._ready.pop(token_id, None)
+            self.books.pop(token_id, None)
+        self.stats["expired"] += len(idle)
+        if self._ws is not None:
+            await self._send({"assets_ids": idle, "operation": "unsubscribe"})
+
+    def _handle(self, raw) -> None:
+        if raw in ("PONG", b"PONG"):
+            return
+        try:
+            payload = json.loads(raw)
+        except ValueError:
+            return
+        self.stats["messages"] += 1
+        for msg in payload if isinstance(payload, list) else [payload]:
+            kind = msg.get("event_type")
+            if kind == "book":
+                book = self.books.get(msg.get("asset_id"))
+                if book is not None:
+                    book.apply_snapshot(msg.get("bids") or msg.get("buys"), msg.get("asks") or msg.get("sells"))
+                    self._ready[msg["asset_id"]].set()
+                    self.stats["snapshots"] += 1
+            elif kind == "price_change":
+                # Current format: price_changes[] with asset_id per change; older: asset_id + changes[]
+                changes = msg.get("price_changes") or [{**c, "asset_id": msg.get("asset_id")} for c in msg.get("changes") or []]
+                for change in changes:
+                    token_id = change.get("asset_id")
+                    book = self.books.get(token_id)
+                    if book is not None and self._ready[token_id].is_set():
+                        book.set_level(change["side"], change["price"], change["size"])
+                        self.stats["updates"] += 1
+
+book_mirror = BookMirror()
@@ -1,18 +1,142 @@
-import httpx
+import asyncio
 import os
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Union
+from app.utils.http import get_http_client
+from app.utils.limits import ConcurrencyLimit
+from app.tools.polymarket.book_mirror import book_mirror
+from app.tools.polymarket.outcomes import outcome_table
+from app.tools.risk.market_table import MarketTable
 
 CLOB_URL = os.getenv("CLOB_API_URL", "https://clob.polymarket.com")
 
+# Books are requested CLOB_BOOKS_BATCH_SIZE tokens per POST /books; if the batch
+# endpoint fails, that batch falls back to GET /book with CLOB_BOOK_CONCURRENCY in flight.
+CLOB_BOOKS_BATCH_SIZE = int(os.getenv("CLOB_BOOKS_BATCH_SIZE", "100"))
+CLOB_BOOK_CONCURRENCY = int(os.getenv("CLOB_BOOK_CONCURRENCY", "10"))
+_book_limit = ConcurrencyLimit(CLOB_BOOK_CONCURRENCY)
+
+# Order size used for slippage-at-size when the caller doesn't give one
+SLIPPAGE_REF_SIZE_USD = float(os.getenv("SLIPPAGE_REF_SIZE_USD", "100"))
+
 async def fetch_orderbook(token_id: str) -> Optional[Dict]:
     """
     Fetch top of book to calculate spread and liquidity.
     """
-    async with httpx.AsyncClient() as client:
+    client = get_http_client(CLOB_URL)
+    try:
+        async with _book_limit:
+            resp = await client.get("/book", params={"token_id": token_id})
+        resp.raise_for_status()
+        return resp.json()
+    except Exception as e:
+        print(f"Error fetching orderbook for {token_id}: {e}")
+        return None
+
+async def _fetch_books_batch(token_ids: List[str]) -> Dict[str, Dict]:
+    client = get_http_client(CLOB_URL)
+    try:
+        resp = await client.post("/books", json=[{"token_id": t} for t in token_ids])
+        resp.raise_for_status()
+        return {str(book.get("asset_id")): book for book in resp.json() if book}
+    except Exception as e:
+        print(f"--- [CLOB] ⚠️ Batch /books failed for {len(token_ids)} tokens ({e}); fetching individually")
+    books = await asyncio.gather(*(fetch_orderbook(t) for t in token_ids))
+    return {t: book for t, book in zip(token_ids, books) if book}
+
+async def fetch_orderbooks(token_ids: List[str]) -> Dict[str, Dict]:
+    """
+    Order books for many tokens in one pass: token_id -> raw book.
+    Tokens whose book could not be fetched are missing from the result.
+    """
+    token_ids = list(dict.fromkeys(str(t) for t in token_ids if t))
+    batches = [token_ids[i:i + CLOB_BOOKS_BATCH_SIZE] for i in range(0, len(token_ids), CLOB_BOOKS_BATCH_SIZE)]
+    books: Dict[str, Dict] = {}
+    for result in await asyncio.gather(*(_fetch_books_batch(b) for b in batches)):
+        books.update(result)
+    return books
+
+def _levels(raw) -> List[tuple]:
+    levels = []
+    for level in raw or []:
         try:
-            resp = await client.get(f"{CLOB_URL}/book", params={"token_id": token_id})
-            resp.raise_for_status()
-            return resp.json()
-        except Exception as e:
-            print(f"Error fetching orderbook for {token_id}: {e}")
-            return None
+            price, size = float(level["price"]), float(level["size"])
+        except (KeyError, TypeError, ValueError):
+            continue
+        if size > 0:
+            levels.append((price, size))
+    return levels
+
+def book_metrics(book: Dict, size_usd: float = SLIPPAGE_REF_SIZE_USD) -> Dict:
+    """
+    Spread, mid, top-of-book depth and slippage for buying `size_usd` from a raw CLOB book.
+    A one-sided or empty book gets spread 1.0 and zero depth, so risk filters reject it.
+    slippage_pct is None when the asks can't absorb `size_usd`.
+    """
+    bids = sorted(_levels(book.get("bids")), reverse=True)
+    asks = sorted(_levels(book.get("asks")))
+    if not bids or not asks:
+        return {"best_bid": bids[0][0] if bids else None, "best_ask": asks[0][0] if asks else None,
+                "mid": None, "spread": 1.0, "top_depth_usd": 0.0, "slippage_pct": None}
+
+    best_bid, best_ask = bids[0][0], asks[0][0]
+    # Round-trip capacity at the touch: the thinner of the two sides
+    top_depth_usd = min(best_bid * bids[0][1], best_ask * asks[0][1])
+
+    remaining, cost, shares = size_usd, 0.0, 0.0
+    for price, size in asks:
+        take = min(remaining, price * size)
+        cost += take
+        shares += take / price
+        remaining -= take
+        if remaining <= 1e-9:
+            break
+    slippage_pct = (cost / shares - best_ask) / best_ask if remaining <= 1e-9 and shares else None
+
+    return {
+        "best_bid": best_bid,
+        "best_ask": best_ask,
+        "mid": (best_bid + best_ask) / 2,
+        "spread": round(best_ask - best_bid, 6),
+        "top_depth_usd": round(top_depth_usd, 2),
+        "slippage_pct": round(slippage_pct, 6) if slippage_pct is not None else None,
+    }
+
+def yes_token_id(market: Dict) -> Optional[str]:
+    """CLOB token of the first outcome (YES on a binary market)."""
+    token_ids = outcome_table(market).token_ids
+    return token_ids[0] if token_ids else None
+
+async def attach_book_metrics(markets: Union[List[Dict], MarketTable], size_usd: float = SLIPPAGE_REF_SIZE_USD) -> List[Dict]:
+    """
+    Writes book_metrics() of every market's YES book onto the market dict in place
+    (the NO book mirrors it on a binary market); given a MarketTable, its book
+    columns are updated too, so the risk filter needs no re-decode. Books come from the live WebSocket
+    mirror when it has them; the rest are fetched in one batched REST pass and
+    subscribed to, so the next rebalance reads them from memory.
+    Markets without a token or a fetched book are left untouched.
+    """
+    table = markets if isinstance(markets, MarketTable) else None
+    if table is not None:
+        markets = table.markets
+    token_by_market = [(m, yes_token_id(m)) for m in markets]
+    token_ids = [t for _, t in token_by_market if t]
+    books: Dict[str, Dict] = {}
+    for token_id in token_ids:
+        live = book_mirror.get(token_id)
+        if live is not None:
+            books[token_id] = live.to_book()
+    missing = [t for t in token_ids if t not in books]
+    if missing:
+        books.update(await fetch_orderbooks(missing))
+    await book_mirror.track(token_ids)
+    if len(token_ids) > len(missing):
+        print(f"--- [CLOB] ⚡ {len(token_ids) - len(missing)} books served from the live mirror")
+    for row, (m, token_id) in enumerate(token_by_market):
+        book = books.get(token_id) if token_id else None
+        if book is not None:
+            if table is not None:
+                table.update_row(row, book_metrics(book, size_usd))
+            else:
+                m.update(book_metrics(book, size_usd))
+    print(f"--- [CLOB] 📖 Attached book metrics to {sum(1 for _, t in token_by_market if t in books)}/{len(markets)} markets")
+    return markets
@@ -0,0 +1,206 @@
+import asyncio
+import base64
+import hashlib
+import json
+import os
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from app.utils.cache import CACHE_DIR, PersistentKV
+
+# Vector indexes are built offline (app/cli/build_embedding_index.py) and saved as
+# <name>.npy (L2-normalised float32 rows) + <name>.json (labels + metadata).
+# Queries are embedded once (cached on disk) and scored with a single dot product.
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
+EMBEDDING_INDEX_DIR = os.getenv("EMBEDDING_INDEX_DIR", os.path.join(CACHE_DIR, "embeddings"))
+TAG_MATCH_MIN_SCORE = float(os.getenv("TAG_MATCH_MIN_SCORE", "0.40"))
+MARKET_MATCH_MIN_SCORE = float(os.getenv("MARKET_MATCH_MIN_SCORE", "0.35"))
+SEMANTIC_MARKETS_PER_KEYWORD = int(os.getenv("SEMANTIC_MARKETS_PER_KEYWORD", "10"))
+
+TAG_INDEX = "tags"
+MARKET_INDEX = "markets"
+
+# Vectors are stored as base64 float32 (~8KB each for 1536 dims) rather than JSON lists
+_embedding_store = PersistentKV("embeddings", max_bytes=256 * 1024 * 1024)
+
+def embedding_cache_stats() -> dict:
+    return _embedding_store.summary()
+
+def embeddings_available() -> bool:
+    return "placeholder" not in os.getenv("OPENAI_API_KEY", "placeholder")
+
+def _embedding_key(text: str) -> str:
+    return f"{EMBEDDING_MODEL}:{hashlib.sha1(text.encode('utf-8')).hexdigest()}"
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+async def _embed_uncached(texts: List[str]) -> List[List[float]]:
+    from langchain_openai import OpenAIEmbeddings
+    return await OpenAIEmbeddings(model=EMBEDDING_MODEL).aembed_documents(texts)
+
+async def embed_texts(texts: List[str]) -> np.ndarray:
+    """
+    Normalised embeddings for `texts`, one row each. Vectors are cached on disk per
+    (model, text); only cache misses are sent to the API, in a single batch.
+    """
+    vectors: List[Optional[np.ndarray]] = [None] * len(texts)
+    missing: Dict[str, List[int]] = {}
+    entries = await asyncio.to_thread(lambda: [_embedding_store.get(_embedding_key(t)) for t in texts])
+    for i, (text, entry) in enumerate(zip(texts, entries)):
+        if entry is not None:
+            vectors[i] = np.frombuffer(base64.b64decode(entry.value), dtype=np.float32)
+        else:
+            missing.setdefault(text, []).append(i)
+
+    if missing:
+        batch = list(missing)
+        fresh = [np.asarray(raw, dtype=np.float32) for raw in await _embed_uncached(batch)]
+        for text, vec in zip(batch, fresh):
+            for i in missing[text]:
+                vectors[i] = vec
+        await asyncio.to_thread(lambda: [
+            _embedding_store.set(_embedding_key(t), base64.b64encode(v.tobytes()).decode("ascii")) for t, v in zip(batch, fresh)
+        ])
+
+    if not vectors:
+        return np.zeros((0, 0), dtype=np.float32)
+    return _normalize_rows(np.stack(vectors))
+
+class VectorIndex:
+    """Cosine top-k over labelled, L2-normalised rows."""
+    def __init__(self, labels: List[str], matrix: np.ndarray, meta: Optional[Dict] = None):
+        if len(labels) != len(matrix):
+            raise ValueError(f"{len(labels)} labels for {len(matrix)} vectors")
+        self.labels = labels
+        self.matrix = matrix
+        self.meta = meta or {}
+        self._rows = {label: i for i, label in enumerate(labels)}
+
+    @classmethod
+    def build(cls, labels: List[str], vectors: np.ndarray, meta: Optional[Dict] = None) -> "VectorIndex":
+        return cls(list(labels), _normalize_rows(vectors), meta)
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def row(self, label: str) -> Optional[np.ndarray]:
+        i = self._rows.get(label)
+        return np.asarray(self.matrix[i]) if i is not None else None
+
+    def search(self, queries: np.ndarray, k: int = 5, min_score: float = -1.0) -> List[List[Tuple[str, float]]]:
+        """
+        Top-k (label, cosine) per query row, best first. `queries` must be normalised
+        (as returned by `embed_texts`); every query is scored in one matrix product.
+        """
+        queries = np.atleast_2d(queries)
+        if not len(self.labels) or not len(queries):
+            return [[] for _ in range(len(queries))]
+        scores = queries @ self.matrix.T
+        k = min(k, scores.shape[1])
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        results = []
+        for q, candidates in enumerate(top):
+            ordered = candidates[np.argsort(-scores[q, candidates])]
+            results.append([(self.labels[i], float(scores[q, i])) for i in ordered if scores[q, i] >= min_score])
+        return results
+
+    def save(self, name: str, directory: str = EMBEDDING_INDEX_DIR) -> None:
+        """Writes <name>.npy and <name>.json atomically, so a running server never loads half an index."""
+        os.makedirs(directory, exist_ok=True)
+        npy_path, meta_path = _index_paths(name, directory)
+        with open(npy_path + ".tmp", "wb") as f:
+            np.save(f, np.ascontiguousarray(self.matrix, dtype=np.float32))
+        with open(meta_path + ".tmp", "w") as f:
+            json.dump({"labels": self.labels, "meta": self.meta}, f)
+        os.replace(meta_path + ".tmp", meta_path)
+        os.replace(npy_path + ".tmp", npy_path)
+
+    @classmethod
+    def load(cls, name: str, directory: str = EMBEDDING_INDEX_DIR) -> Optional["VectorIndex"]:
+        """Memory-maps a saved index; returns None if it has not been built."""
+        npy_path, meta_path = _index_paths(name, directory)
+        if not (os.path.exists(npy_path) and os.path.exists(meta_path)):
+            return None
+        with open(meta_path) as f:
+            saved = json.load(f)
+        return cls(saved["labels"], np.load(npy_path, mmap_mode="r"), saved.get("meta"))
+
+def _index_paths(name: str, directory: str) -> Tuple[str, str]:
+    return os.path.join(directory, f"{name}.npy"), os.path.join(directory, f"{name}.json")
+
+# name -> (mtime, index); reloaded when the offline build replaces the file
+_loaded: Dict[str, Tuple[float, VectorIndex]] = {}
+
+def get_index(name: str) -> Optional[VectorIndex]:
+    npy_path, _ = _index_paths(name, EMBEDDING_INDEX_DIR)
+    try:
+        mtime = os.path.getmtime(npy_path)
+    except OSError:
+        _loaded.pop(name, None)
+        return None
+    cached = _loaded.get(name)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    index = VectorIndex.load(name, EMBEDDING_INDEX_DIR)
+    if index is not None and index.meta.get("model", EMBEDDING_MODEL) != EMBEDDING_MODEL:
+        print(f"--- [Embeddings] ⚠️ '{name}' index was built with {index.meta['model']}, not {EMBEDDING_MODEL}; ignoring it")
+        index = None
+    if index is not None:
+        print(f"--- [Embeddings] 📐 Loaded '{name}' index: {len(index)} vectors")
+        _loaded[name] = (mtime, index)
+    return index
+
+async def match_tag(index: VectorIndex, query: str, min_score: float = TAG_MATCH_MIN_SCORE) -> Optional[str]:
+    """Closest tag label to `query`, or None if nothing clears `min_score`."""
+    hits = index.search(await embed_texts([query]), k=1, min_score=min_score)[0]
+    return hits[0][0] if hits else None
+
+async def semantic_market_ids(
+    keywords: List[str],
+    k: int = SEMANTIC_MARKETS_PER_KEYWORD,
+    min_score: float = MARKET_MATCH_MIN_SCORE
+) -> List[str]:
+    """
+    Market ids from the offline market index closest to any keyword, interleaved
+    by keyword rank. Empty when no index is built or embeddings are unavailable.
+    """
+    index = get_index(MARKET_INDEX)
+    keywords = [kw for kw in keywords if kw]
+    if index is None or not keywords or not embeddings_available():
+        return []
+    per_keyword = index.search(await embed_texts(keywords), k=k, min_score=min_score)
+    ids = []
+    for rank in range(k):
+        for hits in per_keyword:
+            if rank < len(hits) and hits[rank][0] not in ids:
+                ids.append(hits[rank][0])
+    return ids
+
+def market_text(m: Dict) -> str:
+    """Text embedded for a market (shared by the offline build and query-time ranking)."""
+    return f"{m.get('event_title') or ''} | {m.get('question') or ''}".strip(" |")
+
+async def rank_markets(query: str, markets: List[Dict]) -> List[Tuple[float, Dict]]:
+    """
+    Markets sorted by cosine similarity to `query`, using only the vectors of the
+    offline market index; only the (cached) query is embedded at request time.
+    Markets missing from the index follow in their original order with score 0.
+    Without an index nothing is ranked or embedded and the order is kept.
+    """
+    index = get_index(MARKET_INDEX)
+    if index is None or not markets:
+        return [(0.0, m) for m in markets]
+    rows = [index.row(str(m.get("id"))) for m in markets]
+    indexed = [i for i, row in enumerate(rows) if row is not None]
+    if not indexed:
+        return [(0.0, m) for m in markets]
+
+    query_vec = (await embed_texts([query]))[0]
+    scores = np.stack([rows[i] for i in indexed]) @ query_vec
+    order = [indexed[j] for j in np.argsort(-scores, kind="stable")]
+    by_position = dict(zip(indexed, scores))
+    ranked = [(float(by_position[i]), markets[i]) for i in order]
+    return ranked + [(0.0, markets[i]) for i, row in enumerate(rows) if row is None]
@@ -1,13 +1,32 @@
-import httpx
+import asyncio
+import hashlib
 import os
 from typing import List, Dict, Optional
 from dotenv import load_dotenv
-from langchain_openai import ChatOpenAI
 from langchain_core.messages import SystemMessage, HumanMessage
+from app.utils.http import get_http_client
+from app.utils.cache import AsyncTTLCache, LRUCache, PersistentKV
+from app.tools.polymarket.market_index import MarketIndex, flatten_events
+from app.tools.polymarket import embedding_index
+from app.tools.polymarket.outcomes import attach_outcomes
+from app.tools.risk.market_table import MarketTable
+from app.services import llm_gateway
 
 load_dotenv()
 BASE_URL = os.getenv("POLYMARKET_API_URL", "https://gamma-api.polymarket.com")
 
+# /events listings are identical for every user within a few seconds, so they are
+# shared process-wide: fresh for GAMMA_EVENTS_TTL_S, then served stale for up to
+# GAMMA_EVENTS_STALE_S while a background refresh runs.
+GAMMA_EVENTS_TTL_S = float(os.getenv("GAMMA_EVENTS_TTL_S", "30"))
+GAMMA_EVENTS_STALE_S = float(os.getenv("GAMMA_EVENTS_STALE_S", "300"))
+_events_cache = AsyncTTLCache("gamma_events", ttl_s=GAMMA_EVENTS_TTL_S, stale_s=GAMMA_EVENTS_STALE_S)
+
+# The firehose universe is stored pre-indexed (see market_index.py) and rebuilt in
+# the background every MARKET_UNIVERSE_REFRESH_S.
+MARKET_UNIVERSE_REFRESH_S = float(os.getenv("MARKET_UNIVERSE_REFRESH_S", "20"))
+_universe_cache = AsyncTTLCache("market_universe", ttl_s=GAMMA_EVENTS_TTL_S, stale_s=GAMMA_EVENTS_STALE_S, max_entries=32)
+
 # Tag IDs discovered via test_tags.py (Scanning 2000+ tags)
 KNOWN_TAGS = {
     # Sports
@@ -134,45 +153,138 @@ KNOWN_TAGS = {
     "coin": "800"
 }
 
+# Semantic tag matches are memoized in-process and on disk, negative results included.
+# Keys carry a fingerprint of the tag list, so adding or removing KNOWN_TAGS entries invalidates them.
+TAG_CACHE_TTL_S = float(os.getenv("TAG_CACHE_TTL_S", str(7 * 24 * 3600)))
+_tag_memo = LRUCache(max_entries=2048)
+_tag_store = PersistentKV("semantic_tags", ttl_s=TAG_CACHE_TTL_S, max_bytes=8 * 1024 * 1024)
+_MISSING = object()
+
+def semantic_tag_cache_stats() -> dict:
+    return _tag_store.summary()
+
+def _normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+def tags_fingerprint(available_tags: List[str]) -> str:
+    return hashlib.sha1("\n".join(sorted(available_tags)).encode("utf-8")).hexdigest()[:12]
+
+def _tag_cache_key(query: str, available_tags: List[str]) -> str:
+    return f"{tags_fingerprint(available_tags)}:{_normalize_query(query)}"
+
+async def _match_tag_with_llm(query: str, available_tags: List[str]) -> Optional[str]:
+    print(f"--- [Gamma Client] 🧠 Semantic Match Check: '{query}'")
+    # Our list is small enough (<200) to pass all
+    tag_list_str = ", ".join(available_tags)
+    
+    prompt = (
+        f"You are a routing assistant. Match the User Query to ONE of the Available Tags based on semantic meaning.\n"
+        f"User Query: '{query}'\n"
+        f"Available Tags: [{tag_list_str}]\n\n"
+        f"Rules:\n"
+        f"1. Return ONLY the exact tag string from the list that best matches.\n"
+        f"2. If there is no reasonable match (e.g. 'Nutrition' vs [Sports, Tech]), return 'None'.\n"
+        f"3. Be generous with categories (e.g. 'shooter game' -> 'gaming' or 'cod').\n"
+        f"Answer:"
+    )
+    
+    content = await llm_gateway.complete("gamma.semantic_tag", [HumanMessage(content=prompt)], model="gpt-4o-mini")
+    result = content.strip().lower()
+    
+    if result and result != "none" and result in available_tags:
+        return result
+    return None
+
 async def resolve_semantic_tag(query: str, available_tags: List[str]) -> Optional[str]:
     """
     Uses LLM to find the best matching tag key for a query if exact match fails.
     E.g. "Hoops" -> "Basketball", "FPS" -> "Gaming"
+    Answers (including "no match") are cached; LLM errors are not.
     """
-    try:
-        # Quick check for very short queries
-        if not query or len(query) < 2:
-            return None
-            
-        print(f"--- [Gamma Client] 🧠 Semantic Match Check: '{query}'")
-        llm = ChatOpenAI(model="gpt-4o-mini", temperature=0)
-        
-        tag_list_str = ", ".join(available_tags[:50]) # Use subset if too large, or categorized
-        # Actually our list is small enough (<100) to pass all
-        tag_list_str = ", ".join(available_tags)
-        
-        prompt = (
-            f"You are a routing assistant. Match the User Query to ONE of the Available Tags based on semantic meaning.\n"
-            f"User Query: '{query}'\n"
-            f"Available Tags: [{tag_list_str}]\n\n"
-            f"Rules:\n"
-            f"1. Return ONLY the exact tag string from the list that best matches.\n"
-            f"2. If there is no reasonable match (e.g. 'Nutrition' vs [Sports, Tech]), return 'None'.\n"
-            f"3. Be generous with categories (e.g. 'shooter game' -> 'gaming' or 'cod').\n"
-            f"Answer:"
-        )
-        
-        msg = await llm.ainvoke([HumanMessage(content=prompt)])
-        result = msg.content.strip().lower()
-        
-        if result and result != "none" and result in available_tags:
-            return result
+    # Quick check for very short queries
+    if not query or len(query) < 2:
         return None
-        
+
+    key = _tag_cache_key(query, available_tags)
+    cached = _tag_memo.get(key, _MISSING)
+    if cached is not _MISSING:
+        return cached
+    stored = await _tag_store.aget(key)
+    if stored is not None:
+        _tag_memo.set(key, stored.value["tag"])
+        return stored.value["tag"]
+
+    try:
+        result = await _match_tag_with_llm(query, available_tags)
     except Exception as e:
         print(f"Error in semantic tag resolution: {e}")
         return None
 
+    _tag_memo.set(key, result)
+    await _tag_store.aset(key, {"query": query, "tag": result})
+    return result
+
+async def resolve_tag_key(query: str) -> Optional[str]:
+    """
+    Maps a free-text query to a KNOWN_TAGS key when there is no exact match.
+    Uses the offline tag embedding index (one cached embedding + one dot product)
+    when it was built for the current tag table; otherwise falls back to the LLM router.
+    """
+    available_tags = list(KNOWN_TAGS.keys())
+    index = embedding_index.get_index(embedding_index.TAG_INDEX) if embedding_index.embeddings_available() else None
+    if index is not None and index.meta.get("fingerprint") == tags_fingerprint(available_tags):
+        try:
+            return await embedding_index.match_tag(index, _normalize_query(query))
+        except Exception as e:
+            print(f"--- [Gamma Client] ⚠️ Embedding tag match failed ({e}); falling back to LLM routing")
+    return await resolve_semantic_tag(query, available_tags)
+
+def _params_key(params: Dict) -> tuple:
+    return tuple(sorted((k, str(v)) for k, v in params.items()))
+
+async def _get_events(params: Dict) -> List[Dict]:
+    resp = await get_http_client(BASE_URL).get("/events", params=params)
+    resp.raise_for_status()
+    return resp.json()
+
+async def fetch_events(params: Dict) -> List[Dict]:
+    """
+    GET /events through the shared TTL cache.
+    Callers must treat the returned events as read-only: they are shared across requests.
+    """
+    return await _events_cache.get_or_fetch(_params_key(params), lambda: _get_events(params))
+
+def _universe_params(tags: Optional[str] = None) -> Dict:
+    params = {"limit": 500, "closed": "false"}
+    if tags:
+        params["tag"] = tags
+    return params
+
+async def _build_market_index(params: Dict) -> MarketIndex:
+    events = await _get_events(params)
+    index = MarketIndex.from_events(events)
+    print(f"--- [Gamma Client] 📚 Indexed market universe: {len(index)} markets ({params})")
+    return index
+
+async def get_market_index(tags: Optional[str] = None) -> MarketIndex:
+    """
+    Returns the indexed "firehose" universe (top 500 open events).
+    The untagged universe is kept warm by `run_market_universe_refresher`; tagged
+    universes are built on first use and then follow the usual TTL/stale rules.
+    """
+    params = _universe_params(tags)
+    return await _universe_cache.get_or_fetch(_params_key(params), lambda: _build_market_index(params))
+
+async def run_market_universe_refresher(interval_s: float = MARKET_UNIVERSE_REFRESH_S):
+    """Background loop that rebuilds the default universe index before it goes stale."""
+    params = _universe_params()
+    while True:
+        try:
+            await _universe_cache.refresh(_params_key(params), lambda: _build_market_index(params))
+        except Exception as e:
+            print(f"--- [Gamma Client] ⚠️ Market universe refresh failed: {e}")
+        await asyncio.sleep(interval_s)
+
 async def fetch_markets(
     keywords: List[str],
     limit: int = 100,
@@ -181,168 +293,141 @@ async def fetch_markets(
     """
     Fetch markets from Polymarket Gamma API based on keywords (query).
     """
+    return (await fetch_market_table(keywords, limit, tags)).markets
+
+async def fetch_market_table(
+    keywords: List[str],
+    limit: int = 100,
+    tags: Optional[str] = None
+) -> MarketTable:
+    """
+    `fetch_markets` as a MarketTable. Rows are sliced from the tables the market
+    indexes decoded at ingestion, so the risk filter does not decode them again.
+    """
     primary_query = keywords[0] if keywords else ""
     filter_keywords = keywords[1:] if len(keywords) > 1 else []
     print(f"--- [Gamma Client] 🔍 Query: '{primary_query}' | Filter Keywords: {filter_keywords}")
-    markets = []
-    async with httpx.AsyncClient() as client:
-        # Strategy:
-        # 1. Try specific query first (cheap)
-        # 2. If 0 results, fetch "Firehose" (top 100 active events) and filter locally
-        
-        # Attempt 1: Specific Query
-        # User Strategy: "Query for one word (Fund Name)... then filter by research"
-        # We assume keywords[0] is the Fund Name (via clarifier.py prepending)
-        query = keywords[0] if keywords else ""
-        
-        # Fallback if empty (shouldn't happen)
-        if not query and keywords:
-             query = " ".join(keywords)
-
-        # 1. Direct Lookup
-        tag_id_override = KNOWN_TAGS.get(keywords[0].lower()) if keywords else None
-
-        # 2. Semantic Fallback
-        if not tag_id_override and keywords and keywords[0]:
-            print(f"--- [Gamma Client] ❓ No direct match for '{keywords[0]}'. Attempting semantic resolution...")
-            match_key = await resolve_semantic_tag(keywords[0], list(KNOWN_TAGS.keys()))
-            if match_key:
-                tag_id_override = KNOWN_TAGS.get(match_key)
-                print(f"--- [Gamma Client] 🧠 Semantic Match Found: '{keywords[0]}' -> '{match_key}' (ID: {tag_id_override})")
-            else:
-                 print(f"--- [Gamma Client] ❌ No semantic match found for '{keywords[0]}'. Using raw text search.")
-        
-        params = {"limit": limit, "closed": "false"}
-        
-        if tag_id_override:
-             print(f"--- [Gamma Client] 🏷️  Auto-mapped '{keywords[0]}' to Tag ID: {tag_id_override}")
-             params["tag_id"] = tag_id_override
+    parts: List[MarketTable] = []
+    # Strategy:
+    # 1. Try specific query first (cheap)
+    # 2. If 0 results, fetch "Firehose" (top 100 active events) and filter locally
+    
+    # Attempt 1: Specific Query
+    # User Strategy: "Query for one word (Fund Name)... then filter by research"
+    # We assume keywords[0] is the Fund Name (via clarifier.py prepending)
+    query = keywords[0] if keywords else ""
+    
+    # Fallback if empty (shouldn't happen)
+    if not query and keywords:
+         query = " ".join(keywords)
+
+    # 1. Direct Lookup
+    tag_id_override = KNOWN_TAGS.get(keywords[0].lower()) if keywords else None
+
+    # 2. Semantic Fallback
+    if not tag_id_override and keywords and keywords[0]:
+        print(f"--- [Gamma Client] ❓ No direct match for '{keywords[0]}'. Attempting semantic resolution...")
+        match_key = await resolve_tag_key(keywords[0])
+        if match_key:
+            tag_id_override = KNOWN_TAGS.get(match_key)
+            print(f"--- [Gamma Client] 🧠 Semantic Match Found: '{keywords[0]}' -> '{match_key}' (ID: {tag_id_override})")
         else:
-             params["q"] = query
-             
-        if tags and not tag_id_override:
-            params["tag_id"] = tags
+             print(f"--- [Gamma Client] ❌ No semantic match found for '{keywords[0]}'. Using raw text search.")
+    
+    params = {"limit": limit, "closed": "false"}
+    
+    if tag_id_override:
+         print(f"--- [Gamma Client] 🏷️  Auto-mapped '{keywords[0]}' to Tag ID: {tag_id_override}")
+         params["tag_id"] = tag_id_override
+    else:
+         params["q"] = query
+         
+    if tags and not tag_id_override:
+        params["tag_id"] = tags
 
+    try:
+        data = await fetch_events(params)
+        # Targeted results are small; index them on the fly with the same matcher
+        targeted = MarketIndex.from_events(data)
+        parts.append(targeted.table.take(targeted.search_indices(keywords)))
+        existing_ids = set(m.get("id") for m in parts[0].markets)
+        
+        # Attempt 2: Firehose (ALWAYS consulted to supplement specific query)
+        # The top-500 universe is kept indexed in memory by a background refresher,
+        # so this is a local lookup rather than an inline Gamma call.
         try:
-            resp = await client.get(f"{BASE_URL}/events", params=params)
-            resp.raise_for_status()
-            data = resp.json()
+            universe = await get_market_index(tags)
+            print(f"--- [Gamma Client] 🌊 Searching indexed firehose ({len(universe)} markets) to ensure coverage...")
             
-            # Helper to process events
-            def process_events(event_list):
-                found = []
-                for event in event_list:
-                    slug = event.get("slug")
-                    title = event.get("title")
-                    
-                    # Extract tag labels for the corpus
-                    tag_labels = [t.get("label", "") for t in event.get("tags", [])]
-                    tag_text = " ".join(tag_labels)
-
-                    if event.get("markets"):
-                        for m in event["markets"]:
-                            m["event_slug"] = slug
-                            m["event_title"] = title
-                            m["event_tags"] = tag_text
-                            
-                            # Strict Relevance Check (Restored & Improved)
-                            # Check against Event Title, Market Question, Outcomes, AND Tag Labels
-                            text_corpus = (m.get("question", "") + " " + (title or "") + " " + tag_text).lower()
-                            
-                            # Also check outcomes field
-                            outcomes_raw = m.get("outcomes", "")
-                            if isinstance(outcomes_raw, str):
-                                try:
-                                    import json
-                                    outcomes = json.loads(outcomes_raw)
-                                    text_corpus += " " + " ".join(outcomes).lower()
-                                except:
-                                    text_corpus += " " + outcomes_raw.lower()
-                            elif isinstance(outcomes_raw, list):
-                                text_corpus += " " + " ".join(str(o) for o in outcomes_raw).lower()
-                            
-                            # Debug: print what we're checking
-                            matched = any(k.lower() in text_corpus for k in keywords)
-                            # matched = True # Bypass removed
-                            
-                            if matched:
-                                # print(f"✅ MATCH: '{m.get('question')[:50]}' | Keywords: {keywords}")
-                                found.append(m)
-                return found
-
-            markets = process_events(data)
-            
-            
-            # Attempt 2: Firehose (ALWAYS fetch to supplement specific query)
-            # Fetch broadly without volume filter to catch ALL relevant markets
-            print(f"--- [Gamma Client] 🌊 Fetching Firehose (top 500) to ensure coverage...")
-            firehose_params = {"limit": 500, "closed": "false"}
-            if tags:
-                firehose_params["tag"] = tags
-            
-            try:
-                resp = await client.get(f"{BASE_URL}/events", params=firehose_params)
-                resp.raise_for_status()
-                firehose_data = resp.json()
-                firehose_markets = process_events(firehose_data)
-                
-                # Merge and Deduplicate
-                existing_ids = set(m.get("id") for m in markets)
-                for fm in firehose_markets:
-                    if fm.get("id") not in existing_ids:
-                        markets.append(fm)
-                        existing_ids.add(fm.get("id"))
-                        
-            except Exception as e:
-                print(f"Error fetching firehose: {e}")
-                # Don't fail completely if firehose fails, just return what we have
-                pass
+            # Merge and Deduplicate
+            rows = []
+            for i in universe.search_indices(keywords):
+                market_id = universe.markets[i].get("id")
+                if market_id not in existing_ids:
+                    rows.append(i)
+                    existing_ids.add(market_id)
 
+            # Attempt 3: Semantic neighbours from the offline market embedding index.
+            # Ids are resolved against the live universe, so closed markets drop out.
+            semantic_ids = await embedding_index.semantic_market_ids(keywords)
+            semantic_added = 0
+            for market_id in semantic_ids:
+                i = universe.row(market_id)
+                if i is not None and universe.markets[i].get("id") not in existing_ids:
+                    rows.append(i)
+                    existing_ids.add(universe.markets[i].get("id"))
+                    semantic_added += 1
+            if semantic_added:
+                print(f"--- [Gamma Client] 📐 Added {semantic_added} semantically similar markets")
+            parts.append(universe.table.take(rows))
+                    
         except Exception as e:
-            print(f"Error fetching markets: {e}")
-            return []
+            print(f"Error fetching firehose: {e}")
+            # Don't fail completely if firehose fails, just return what we have
+            pass
+
+    except Exception as e:
+        print(f"Error fetching markets: {e}")
+        return MarketTable([])
+
+    table = MarketTable.concat(parts)
 
     # Stratified sampling: ensure diversity across keywords
     # Group markets by which keyword they matched, then sample evenly
-    if len(keywords) > 1 and len(markets) > 100:
-        print(f"--- [Gamma Client] 🎯 Stratifying {len(markets)} markets across {len(keywords)} keywords...")
+    if len(keywords) > 1 and len(table) > 100:
+        print(f"--- [Gamma Client] 🎯 Stratifying {len(table)} markets across {len(keywords)} keywords...")
         keyword_buckets = {k: [] for k in keywords}
         
     # Stratified sampling REMOVED per user request for maximum volume
     # Simply cap at 100 to avoid overloading downstream agents
-    if len(markets) > 100:
-        print(f"--- [Gamma Client] ⚠️ Capping at 100 markets (found {len(markets)})")
-        markets = markets[:100]
+    if len(table) > 100:
+        print(f"--- [Gamma Client] ⚠️ Capping at 100 markets (found {len(table)})")
+        table = table.head(100)
 
-    print(f"Polymarket Gamma API returned: Found {len(markets)} markets matching keywords {keywords}")
-    return markets
+    print(f"Polymarket Gamma API returned: Found {len(table)} markets matching keywords {keywords}")
+    return table
 
 async def fetch_market_by_id(market_id: str) -> Optional[Dict]:
-    async with httpx.AsyncClient() as client:
-        try:
-            resp = await client.get(f"{BASE_URL}/markets/{market_id}")
-            resp.raise_for_status()
-            return resp.json()
-        except Exception as e:
-            print(f"Error fetching market {market_id}: {e}")
-            return None
+    client = get_http_client(BASE_URL)
+    try:
+        resp = await client.get(f"/markets/{market_id}")
+        resp.raise_for_status()
+        return attach_outcomes(resp.json())
+    except Exception as e:
+        print(f"Error fetching market {market_id}: {e}")
+        return None
 
 async def fetch_event_by_slug(slug: str) -> List[Dict]:
     """
     Fetch markets for a given event slug.
     """
     markets = []
-    async with httpx.AsyncClient() as client:
-        try:
-            resp = await client.get(f"{BASE_URL}/events", params={"slug": slug})
-            resp.raise_for_status()
-            data = resp.json()
-            for event in data:
-                slug = event.get("slug")
-                if event.get("markets"):
-                    for m in event["markets"]:
-                        m["event_slug"] = slug
-                        markets.append(m)
-        except Exception as e:
-            print(f"Error fetching event {slug}: {e}")
+    client = get_http_client(BASE_URL)
+    try:
+        resp = await client.get("/events", params={"slug": slug})
+        resp.raise_for_status()
+        # Same annotations as the indexed universe (event title, tags, series)
+        markets = flatten_events(resp.json())
+    except Exception as e:
+        print(f"Error fetching event {slug}: {e}")
     return markets
@@ -0,0 +1,151 @@
+import bisect
+import json
+import re
+from typing import Dict, List, Optional, Tuple
+from app.tools.polymarket.outcomes import attach_outcomes
+from app.tools.risk.market_table import MarketTable
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Where a token appears decides how much a hit is worth when ranking
+FIELD_WEIGHTS = {
+    "question": 3.0,
+    "outcomes": 2.0,
+    "event_title": 2.0,
+    "tags": 1.0,
+}
+# Keyword tokens this long also match longer index tokens ("election" -> "elections")
+MIN_PREFIX_LEN = 4
+PREFIX_WEIGHT = 0.5
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text.lower()) if text else []
+
+def _parse_outcomes(raw) -> List[str]:
+    if isinstance(raw, list):
+        return [str(o) for o in raw]
+    if isinstance(raw, str) and raw:
+        try:
+            return [str(o) for o in json.loads(raw)]
+        except ValueError:
+            return [raw]
+    return []
+
+def _to_float(value) -> float:
+    try:
+        return float(value) if value else 0.0
+    except (TypeError, ValueError):
+        return 0.0
+
+def flatten_events(events: List[Dict]) -> List[Dict]:
+    """
+    Turns a Gamma /events payload into market dicts annotated with their event
+    and their parsed OutcomeTable. Markets are copied, so the (cached) payload is never mutated.
+    """
+    markets = []
+    for event in events or []:
+        tag_text = " ".join(t.get("label", "") for t in event.get("tags") or [])
+        series = event.get("series") or []
+        for m in event.get("markets") or []:
+            m = dict(m)
+            m["event_slug"] = event.get("slug")
+            m["event_title"] = event.get("title")
+            m["event_tags"] = tag_text
+            m["event_series"] = series[0].get("slug") if series and isinstance(series[0], dict) else None
+            markets.append(attach_outcomes(m))
+    return markets
+
+class MarketIndex:
+    """
+    In-memory inverted index over market question, event title, tag labels and outcomes.
+    Built once per universe refresh; lookups only touch the posting lists of the query tokens.
+    `table` holds the universe's risk columns, decoded once here for the risk filter.
+    """
+    def __init__(self, markets: List[Dict]):
+        self.markets = markets
+        self.by_id: Dict[str, int] = {}
+        self._postings: Dict[str, Dict[int, float]] = {}
+        self._volumes: List[float] = []
+
+        for i, m in enumerate(markets):
+            if m.get("id") is not None:
+                self.by_id[str(m["id"])] = i
+            self._volumes.append(_to_float(m.get("volume")))
+
+            fields = {
+                "question": m.get("question") or "",
+                "event_title": m.get("event_title") or "",
+                "tags": m.get("event_tags") or "",
+                "outcomes": " ".join(_parse_outcomes(m.get("outcomes"))),
+            }
+            for field, text in fields.items():
+                weight = FIELD_WEIGHTS[field]
+                for token in set(tokenize(text)):
+                    postings = self._postings.setdefault(token, {})
+                    postings[i] = max(postings.get(i, 0.0), weight)
+
+        self._vocab = sorted(self._postings)
+        self.table = MarketTable(markets)
+
+    @classmethod
+    def from_events(cls, events: List[Dict]) -> "MarketIndex":
+        return cls(flatten_events(events))
+
+    def __len__(self) -> int:
+        return len(self.markets)
+
+    def get(self, market_id: str) -> Optional[Dict]:
+        i = self.by_id.get(str(market_id))
+        return dict(self.markets[i]) if i is not None else None
+
+    def _token_postings(self, token: str) -> Dict[int, float]:
+        hits = dict(self._postings.get(token, {}))
+        if len(token) >= MIN_PREFIX_LEN:
+            start = bisect.bisect_left(self._vocab, token)
+            for vocab_token in self._vocab[start:]:
+                if not vocab_token.startswith(token):
+                    break
+                if vocab_token == token:
+                    continue
+                for i, w in self._postings[vocab_token].items():
+                    hits[i] = max(hits.get(i, 0.0), w * PREFIX_WEIGHT)
+        return hits
+
+    def _keyword_scores(self, keyword: str) -> Dict[int, float]:
+        """A market matches a keyword when it contains every token of it."""
+        scores: Optional[Dict[int, float]] = None
+        for token in tokenize(keyword):
+            hits = self._token_postings(token)
+            if scores is None:
+                scores = hits
+            else:
+                scores = {i: s + hits[i] for i, s in scores.items() if i in hits}
+            if not scores:
+                return {}
+        return scores or {}
+
+    def _ranked(self, keywords: List[str], limit: Optional[int]) -> Tuple[List[int], Dict[int, float]]:
+        totals: Dict[int, float] = {}
+        for keyword in keywords:
+            for i, s in self._keyword_scores(keyword).items():
+                totals[i] = totals.get(i, 0.0) + s
+
+        ranked = sorted(totals, key=lambda i: (totals[i], self._volumes[i]), reverse=True)
+        if limit is not None:
+            ranked = ranked[:limit]
+        return ranked, totals
+
+    def search_indices(self, keywords: List[str], limit: Optional[int] = None) -> List[int]:
+        """Row numbers (into `markets` and `table`) of the ranked matches."""
+        return self._ranked(keywords, limit)[0]
+
+    def search_scored(self, keywords: List[str], limit: Optional[int] = None) -> List[Tuple[float, Dict]]:
+        ranked, totals = self._ranked(keywords, limit)
+        return [(totals[i], dict(self.markets[i])) for i in ranked]
+
+    def row(self, market_id: str) -> Optional[int]:
+        return self.by_id.get(str(market_id))
+
+    def search(self, keywords: List[str], limit: Optional[int] = None) -> List[Dict]:
+        """Ranked copies of the markets matching any keyword (best first)."""
+        return [m for _, m in self.search_scored(keywords, limit)]
@@ -0,0 +1,67 @@
+import json
+from typing import Dict, Optional, Tuple
+
+# Key under which the parsed table is cached on a market dict
+OUTCOMES_KEY = "_outcomes"
+
+def _json_list(raw) -> list:
+    """Gamma sends outcomes/outcomePrices/clobTokenIds as JSON-encoded lists."""
+    if isinstance(raw, str):
+        try:
+            raw = json.loads(raw)
+        except ValueError:
+            return []
+    return list(raw) if raw else []
+
+def _price(value) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+class OutcomeTable:
+    """
+    A market's outcomes decoded once: labels, prices (0-1) and CLOB token ids,
+    row-aligned, with a case-insensitive label -> row map.
+    """
+    __slots__ = ("labels", "prices", "token_ids", "_rows")
+
+    def __init__(self, labels: Tuple[str, ...], prices: Tuple[Optional[float], ...], token_ids: Tuple[str, ...]):
+        self.labels = labels
+        self.prices = prices
+        self.token_ids = token_ids
+        self._rows: Dict[str, int] = {}
+        for i, label in enumerate(labels):
+            self._rows.setdefault(label.casefold(), i)
+
+    @classmethod
+    def from_market(cls, market: Dict) -> "OutcomeTable":
+        labels = tuple(str(o) for o in _json_list(market.get("outcomes"))) or ("No", "Yes")  # Default binary
+        prices = tuple(_price(p) for p in _json_list(market.get("outcomePrices")))
+        token_ids = tuple(str(t) for t in _json_list(market.get("clobTokenIds")))
+        return cls(labels, prices, token_ids)
+
+    def row(self, label: str) -> int:
+        """Row of `label` ('YES', 'yes', 'Trump', ...), or -1."""
+        return self._rows.get(label.casefold(), -1)
+
+    def price(self, label: str) -> Optional[float]:
+        i = self.row(label)
+        return self.prices[i] if 0 <= i < len(self.prices) else None
+
+    def token_id(self, label: str) -> Optional[str]:
+        i = self.row(label)
+        return self.token_ids[i] if 0 <= i < len(self.token_ids) else None
+
+def outcome_table(market: Dict) -> OutcomeTable:
+    """The market's cached OutcomeTable, building (and caching) it if ingestion didn't."""
+    table = market.get(OUTCOMES_KEY)
+    if table is None:
+        table = OutcomeTable.from_market(market)
+        market[OUTCOMES_KEY] = table
+    return table
+
+def attach_outcomes(market: Dict) -> Dict:
+    """Parses the outcome fields at ingestion; returns the same dict."""
+    market[OUTCOMES_KEY] = OutcomeTable.from_market(market)
+    return market
@@ -1,32 +1,69 @@
-from typing import List, Dict
+import time
+from typing import Callable, Dict, List, Union
+import numpy as np
 from app.schemas.portfolio import RiskLimits
+from app.tools.risk.market_table import MarketTable
 
-def filter_markets(markets: List[Dict], limits: RiskLimits) -> List[Dict]:
+# Spread assumed for markets without a CLOB book or Gamma spread field
+DEFAULT_SPREAD = 0.01
+
+# RiskLimits field -> vectorized predicate(table, limit) returning a keep-mask.
+# Fields without a predicate (e.g. max_position_pct) are sizing limits, not filters.
+RISK_PREDICATES: Dict[str, Callable[[MarketTable, float], np.ndarray]] = {}
+
+def risk_predicate(field: str):
+    def register(fn: Callable[[MarketTable, float], np.ndarray]):
+        RISK_PREDICATES[field] = fn
+        return fn
+    return register
+
+@risk_predicate("min_liquidity_usd")
+def _min_liquidity(table: MarketTable, limit: float) -> np.ndarray:
+    return table["liquidity"] >= limit
+
+@risk_predicate("min_volume_usd")
+def _min_volume(table: MarketTable, limit: float) -> np.ndarray:
+    return table["volume"] >= limit
+
+@risk_predicate("max_spread_pct")
+def _max_spread(table: MarketTable, limit: float) -> np.ndarray:
+    # Spread/depth/slippage come from the CLOB book (clob_client.attach_book_metrics),
+    # falling back to Gamma's own spread field, else a typical 1c spread
+    spread = table["spread"]
+    return np.where(np.isnan(spread), DEFAULT_SPREAD, spread) <= limit
+
+@risk_predicate("min_top_depth_usd")
+def _min_top_depth(table: MarketTable, limit: float) -> np.ndarray:
+    # Unknown depth (no book) passes
+    return ~(table["top_depth_usd"] < limit)
+
+@risk_predicate("max_slippage_pct")
+def _max_slippage(table: MarketTable, limit: float) -> np.ndarray:
+    # A fetched book that can't absorb the order (NaN slippage) is rejected
+    slippage = table["slippage_pct"]
+    return ~table["has_slippage"] | (slippage <= limit)
+
+@risk_predicate("max_days_to_resolution")
+def _max_days_to_resolution(table: MarketTable, limit: float) -> np.ndarray:
+    days_left = (table["end_ts"] - time.time()) / 86400
+    return ~(days_left > limit)
+
+def filter_indices(table: MarketTable, limits: RiskLimits) -> np.ndarray:
+    """Row indices of `table` passing every registered predicate for the limits that are set."""
+    keep = np.ones(len(table), dtype=bool)
+    for field, value in limits.model_dump().items():
+        predicate = RISK_PREDICATES.get(field)
+        if predicate is not None and value is not None:
+            keep &= predicate(table, value)
+    return np.flatnonzero(keep)
+
+def filter_markets(markets: Union[List[Dict], MarketTable], limits: RiskLimits) -> List[Dict]:
     """
     Filter markets based on liquidity, spread, and other risk constraints.
     Expects markets to have 'liquidity', 'spread' keys (or we calculate them).
+    Book keys ('top_depth_usd', 'slippage_pct') are only checked when present.
+    Takes the MarketTable decoded at ingestion (see gamma_client.fetch_market_table);
+    a plain list of dicts is decoded here first. Returns the passing dicts.
     """
-    valid_markets = []
-    
-    for m in markets:
-        # Mocking extraction of liquidity/spread from market dict
-        # In reality, you'd merge this with CLOB data
-        liq = float(m.get("liquidity", 0)) if m.get("liquidity") else 0
-        
-        # If liquidity is too low, skip
-        if liq < limits.min_liquidity_usd:
-            continue
-            
-        # Check volume
-        vol = float(m.get("volume", 0)) if m.get("volume") else 0
-        if vol < limits.min_volume_usd:
-            continue
-
-        # Simplified: check hardcoded spread if available, else assume 0 for scaffold
-        spread = 0.01 
-        if spread > limits.max_spread_pct:
-            continue
-            
-        valid_markets.append(m)
-        
-    return valid_markets
+    table = markets if isinstance(markets, MarketTable) else MarketTable(markets)
+    return table.select(filter_indices(table, limits))
@@ -0,0 +1,112 @@
+import math
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+from app.tools.polymarket.outcomes import outcome_table
+
+# One row per market, decoded once from the Gamma/CLOB dicts. Missing numbers are NaN,
+# so predicates can tell "unknown" apart from zero.
+MARKET_DTYPE = np.dtype([
+    ("liquidity", "f8"),
+    ("volume", "f8"),
+    ("spread", "f8"),
+    ("best_bid", "f8"),
+    ("best_ask", "f8"),
+    ("top_depth_usd", "f8"),
+    ("slippage_pct", "f8"),
+    ("has_slippage", "?"),  # book was fetched; slippage may still be NaN (book too thin)
+    ("yes_price", "f8"),
+    ("end_ts", "f8"),
+])
+
+def _num(value, default: float = math.nan) -> float:
+    if value is None or value == "":
+        return default
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+def _yes_price(m: Dict) -> float:
+    prices = outcome_table(m).prices
+    return prices[0] if prices and prices[0] is not None else math.nan
+
+@lru_cache(maxsize=4096)  # many markets of an event share one end date
+def _end_ts(raw) -> float:
+    if not raw:
+        return math.nan
+    try:
+        return datetime.fromisoformat(str(raw).replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return math.nan
+
+def _decode(m: Dict) -> tuple:
+    return (
+        # Falsy liquidity/volume count as 0, as they always have in filter_markets
+        _num(m.get("liquidity"), 0.0) if m.get("liquidity") else 0.0,
+        _num(m.get("volume"), 0.0) if m.get("volume") else 0.0,
+        _num(m.get("spread")),
+        _num(m.get("best_bid")),
+        _num(m.get("best_ask")),
+        _num(m.get("top_depth_usd")),
+        _num(m.get("slippage_pct")),
+        "slippage_pct" in m,
+        _yes_price(m),
+        _end_ts(m.get("endDate")),
+    )
+
+# Market dict keys that update_row writes into their columns (order book metrics)
+BOOK_COLUMNS = ("spread", "best_bid", "best_ask", "top_depth_usd", "slippage_pct")
+
+class MarketTable:
+    """
+    Columnar view of a list of market dicts. `cols` is a NumPy structured array
+    row-aligned with `markets`; filters return row indices into it, and `select`
+    hands back the original dicts (no copies).
+
+    Tables are decoded once where markets are ingested (MarketIndex builds one per
+    universe); `take` and `concat` slice and join them without decoding again.
+    """
+    def __init__(self, markets: List[Dict], cols: Optional[np.ndarray] = None):
+        self.markets = markets
+        if cols is None:
+            cols = np.array([_decode(m) for m in markets], dtype=MARKET_DTYPE)
+        self.cols = cols
+
+    @classmethod
+    def from_markets(cls, markets: List[Dict]) -> "MarketTable":
+        return cls(markets)
+
+    @classmethod
+    def concat(cls, tables: Sequence["MarketTable"]) -> "MarketTable":
+        tables = list(tables)
+        if not tables:
+            return cls([])
+        return cls([m for t in tables for m in t.markets], np.concatenate([t.cols for t in tables]))
+
+    def __len__(self) -> int:
+        return len(self.markets)
+
+    def __getitem__(self, column: str) -> np.ndarray:
+        return self.cols[column]
+
+    def take(self, indices: Sequence[int]) -> "MarketTable":
+        """Sub-table of the given rows, with copies of their market dicts (safe to annotate)."""
+        rows = np.asarray(indices, dtype=np.intp)
+        return MarketTable([dict(self.markets[i]) for i in rows], self.cols[rows])
+
+    def head(self, n: int) -> "MarketTable":
+        return MarketTable(self.markets[:n], self.cols[:n])
+
+    def update_row(self, row: int, values: Dict) -> None:
+        """Writes `values` into the row's dict and its book columns (see BOOK_COLUMNS)."""
+        self.markets[row].update(values)
+        for key in BOOK_COLUMNS:
+            if key in values:
+                self.cols[key][row] = _num(values[key])
+        if "slippage_pct" in values:
+            self.cols["has_slippage"][row] = True
+
+    def select(self, indices: np.ndarray) -> List[Dict]:
+        return [self.markets[i] for i in indices]
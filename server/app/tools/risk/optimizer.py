@@ -0,0 +1,195 @@
+import os
+from typing import Callable, Dict, List, NamedTuple, Optional
+import numpy as np
+
+# Position sizing over the final picks (one per event). Every strategy returns
+# bankroll fractions that respect the per-position caps (max_position_pct and
+# liquidity-scaled caps) and the per-group cap (max_event_pct). Picks are grouped
+# by `correlation_key`: events of one Gamma series, otherwise each event alone.
+# The default keeps the original product behaviour: confidence-weighted and fully
+# invested. kelly / mean_variance are opt-in and can leave part of the bankroll in cash.
+SIZING_STRATEGY = os.getenv("SIZING_STRATEGY", "heuristic")
+KELLY_FRACTION = float(os.getenv("KELLY_FRACTION", "0.25"))
+# Never hold more than this fraction of a market's liquidity
+LIQUIDITY_CAP_PCT = float(os.getenv("LIQUIDITY_CAP_PCT", "0.05"))
+MV_RISK_AVERSION = float(os.getenv("MV_RISK_AVERSION", "2.0"))
+# Assumed outcome correlation between picks in the same correlation group
+EVENT_CORRELATION = float(os.getenv("EVENT_CORRELATION", "0.5"))
+
+def correlation_key(market: Dict) -> str:
+    """
+    Group of markets expected to resolve together: the event's series (e.g. every
+    monthly Fed decision), else the event itself. Tags are too generic ("Sports",
+    "Politics") to imply correlation.
+    """
+    if market.get("event_series"):
+        return f"series:{market['event_series']}"
+    return "event:" + str(market.get("event_slug") or market.get("event_title") or market.get("id"))
+
+class SizingInputs(NamedTuple):
+    confidence: np.ndarray  # 0-100 conviction that the chosen side resolves true
+    price: np.ndarray       # cost per share of the chosen side (0-1), NaN if unknown
+    caps: np.ndarray        # per-position cap as a bankroll fraction
+    groups: np.ndarray      # correlation group id per pick (0..k-1)
+    group_cap: float
+
+class SizingResult(NamedTuple):
+    weights: np.ndarray
+    strategy: str
+    notes: List[str]
+
+SIZING_STRATEGIES: Dict[str, Callable[[SizingInputs], Optional[np.ndarray]]] = {}
+
+def sizing_strategy(name: str):
+    def register(fn: Callable[[SizingInputs], Optional[np.ndarray]]):
+        SIZING_STRATEGIES[name] = fn
+        return fn
+    return register
+
+def position_caps(liquidity: np.ndarray, bankroll: float, max_position_pct: float) -> np.ndarray:
+    """max_position_pct, tightened to LIQUIDITY_CAP_PCT of each market's liquidity (unknown liquidity: no extra cap)."""
+    caps = np.full(len(liquidity), float(max_position_pct))
+    if bankroll > 0:
+        liq_caps = LIQUIDITY_CAP_PCT * np.nan_to_num(liquidity, nan=np.inf) / bankroll
+        caps = np.minimum(caps, np.where(liquidity > 0, liq_caps, caps))
+    return caps
+
+def capped_simplex(scores: np.ndarray, caps: np.ndarray, total: float = 1.0, metric: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Projection of `scores` onto {0 <= w <= caps, sum(w) = total} (or w = caps if the
+    caps can't reach `total`), Euclidean or in the diagonal `metric` d:
+    w_i = clip(scores_i - tau / d_i, 0, caps_i). The mass is piecewise linear and
+    decreasing in tau with breakpoints where a coordinate hits 0 or its cap:
+    binary-search the breakpoints, then solve exactly on the bracketing segment.
+    """
+    if caps.sum() <= total:
+        return caps.copy()
+    d = np.ones_like(scores) if metric is None else metric
+    breaks = np.unique(np.concatenate([d * (scores - caps), d * scores]))
+    mass = lambda tau: np.clip(scores - tau / d, 0, caps).sum()
+    lo, hi = 0, len(breaks) - 1  # mass(breaks[lo]) > total >= mass(breaks[hi])
+    while hi - lo > 1:
+        mid = (lo + hi) // 2
+        if mass(breaks[mid]) > total:
+            lo = mid
+        else:
+            hi = mid
+    m_lo, m_hi = mass(breaks[lo]), mass(breaks[hi])
+    tau = breaks[lo] + (m_lo - total) / (m_lo - m_hi) * (breaks[hi] - breaks[lo]) if m_lo > m_hi else breaks[hi]
+    return np.clip(scores - tau / d, 0, caps)
+
+def _enforce_group_caps(w: np.ndarray, inputs: SizingInputs, redistribute: bool, total: float) -> np.ndarray:
+    """
+    Scales event groups over group_cap down to it. With `redistribute`, the freed
+    weight is re-projected onto the other picks (groups at their cap stay frozen).
+    """
+    caps = inputs.caps.copy()
+    scores = w.copy()
+    for _ in range(int(inputs.groups.max(initial=0)) + 2):
+        sums = np.bincount(inputs.groups, weights=w)
+        over = sums > inputs.group_cap + 1e-12
+        if not over.any():
+            break
+        scale = np.where(over, inputs.group_cap / np.maximum(sums, 1e-12), 1.0)[inputs.groups]
+        w = w * scale
+        if not redistribute:
+            continue
+        caps = np.where(over[inputs.groups], w, caps)
+        w = capped_simplex(scores, caps, total)
+    return w
+
+@sizing_strategy("heuristic")
+def _heuristic(inputs: SizingInputs) -> np.ndarray:
+    """Legacy weighting: min-max normalised confidence, shares summing to 1."""
+    c = inputs.confidence.astype(float)
+    score = (c - c.min()) / (c.max() - c.min()) if c.max() > c.min() else np.ones_like(c)
+    return score / score.sum() if score.sum() > 0 else np.full(len(c), 1.0 / len(c))
+
+@sizing_strategy("simplex")
+def _simplex(inputs: SizingInputs) -> np.ndarray:
+    """Conviction vector projected onto the capped simplex (fully invested)."""
+    return inputs.confidence / 100.0
+
+@sizing_strategy("kelly")
+def _kelly(inputs: SizingInputs) -> Optional[np.ndarray]:
+    """
+    Fractional Kelly for binary contracts: buying at price q with win probability p,
+    f* = (p - q) / (1 - q). No edge (or no price) -> 0. None if nothing has an edge.
+    """
+    p = inputs.confidence / 100.0
+    q = inputs.price
+    with np.errstate(invalid="ignore", divide="ignore"):
+        f = np.where((q > 0) & (q < 1), (p - q) / (1 - q), 0.0)
+    f = KELLY_FRACTION * np.clip(np.nan_to_num(f), 0.0, None)
+    if not f.any():
+        return None
+    return f / f.sum() if f.sum() > 1 else f
+
+@sizing_strategy("mean_variance")
+def _mean_variance(inputs: SizingInputs, iters: int = 500, tol: float = 1e-7) -> Optional[np.ndarray]:
+    """
+    max w.mu - (lambda/2) w'Σw over the capped set {0 <= w <= caps, sum(w) <= 1},
+    by accelerated projected gradient ascent. Per-dollar return of a binary contract:
+    mu = p/q - 1, var = p(1-p)/q^2, correlated EVENT_CORRELATION within a group.
+    """
+    p = inputs.confidence / 100.0
+    q = inputs.price
+    valid = (q > 0) & (q < 1)
+    if not valid.any():
+        return None
+    q = np.where(valid, q, 1.0)
+    mu = np.where(valid, p / q - 1, -1.0)
+    sigma = np.where(valid, np.sqrt(p * (1 - p)) / q, 0.0)
+    same_group = inputs.groups[:, None] == inputs.groups[None, :]
+    cov = np.where(same_group, EVENT_CORRELATION, 0.0) * np.outer(sigma, sigma)
+    np.fill_diagonal(cov, sigma ** 2)
+    # Accelerated projected gradient (FISTA) preconditioned by the diagonal
+    # Gershgorin bound D >= Hessian (row sums of |λΣ|); projections are in the D metric.
+    # Cheap contracts have huge per-dollar variance, so a scalar step would crawl.
+    d = MV_RISK_AVERSION * np.abs(cov).sum(axis=1)
+    d = np.where(d > 0, d, 1.0)
+
+    def project(v: np.ndarray) -> np.ndarray:
+        v = np.clip(v, 0.0, inputs.caps)
+        return capped_simplex(v, inputs.caps, 1.0, metric=d) if v.sum() > 1.0 else v
+
+    w = y = np.zeros(len(mu))
+    t = 1.0
+    for _ in range(iters):
+        w_next = project(y + (mu - MV_RISK_AVERSION * cov @ y) / d)
+        if np.abs(w_next - w).max() < tol:
+            w = w_next
+            break
+        t_next = (1 + np.sqrt(1 + 4 * t * t)) / 2
+        y = w_next + ((t - 1) / t_next) * (w_next - w)
+        w, t = w_next, t_next
+    return w if w.any() else None
+
+def size_positions(inputs: SizingInputs, strategy: Optional[str] = None) -> SizingResult:
+    """
+    Runs `strategy` (default SIZING_STRATEGY) and enforces the caps.
+    Kelly / mean-variance only shrink weights (the rest stays as cash); heuristic and
+    simplex are fully invested, so capped weight is redistributed. If an edge-based
+    strategy finds no priced edge at all, sizing falls back to the legacy heuristic.
+    """
+    name = strategy or SIZING_STRATEGY
+    notes: List[str] = []
+    if name not in SIZING_STRATEGIES:
+        notes.append(f"Unknown sizing strategy '{name}', using heuristic.")
+        name = "heuristic"
+
+    raw = SIZING_STRATEGIES[name](inputs)
+    if raw is None:
+        notes.append(f"{name}: no priced edge in any pick; falling back to confidence weighting.")
+        name = "heuristic"
+        raw = SIZING_STRATEGIES[name](inputs)
+
+    fully_invested = name in ("heuristic", "simplex")
+    if fully_invested:
+        w = capped_simplex(raw, inputs.caps, 1.0)
+        if inputs.caps.sum() < 1.0:
+            notes.append(f"Position caps only allow {inputs.caps.sum() * 100:.0f}% of bankroll to be deployed.")
+    else:
+        w = np.minimum(raw, inputs.caps)
+    w = _enforce_group_caps(w, inputs, redistribute=fully_invested, total=min(1.0, float(w.sum())))
+    return SizingResult(weights=w, strategy=name, notes=notes)
@@ -0,0 +1,118 @@
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from statistics import NormalDist
+from typing import Optional, Sequence, Tuple
+import numpy as np
+from app.schemas.portfolio import AllocationPlan, RiskMetrics
+from app.tools.risk.optimizer import EVENT_CORRELATION
+
+# Monte Carlo over binary resolutions. Each position resolves true with its
+# (market-implied) probability; positions in the same correlation group (see
+# optimizer.correlation_key) share a latent Gaussian factor with correlation
+# EVENT_CORRELATION (one-factor Gaussian copula).
+SIM_SCENARIOS = int(os.getenv("SIM_SCENARIOS", "100000"))
+SIM_CHUNK_SIZE = int(os.getenv("SIM_CHUNK_SIZE", "25000"))
+# >1 spreads the chunks over a process pool
+SIM_WORKERS = int(os.getenv("SIM_WORKERS", "1"))
+SIM_CONFIDENCE = 0.95
+
+def _simulate_chunk(
+    scenarios: int,
+    seed: np.random.SeedSequence,
+    weights: np.ndarray,
+    win_payoff: np.ndarray,
+    thresholds: np.ndarray,
+    groups: np.ndarray,
+    correlation: float,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """P&L (fraction of bankroll) and path max drawdown for `scenarios` draws."""
+    rng = np.random.default_rng(seed)
+    factor = rng.standard_normal((scenarios, int(groups.max()) + 1))
+    latent = math.sqrt(correlation) * factor[:, groups] + math.sqrt(1 - correlation) * rng.standard_normal((scenarios, len(weights)))
+    wins = latent < thresholds
+    # Positions resolve left to right; wealth starts at 1 (positions marked at cost)
+    steps = np.where(wins, win_payoff, -weights)
+    path = np.concatenate([np.ones((scenarios, 1)), 1.0 + np.cumsum(steps, axis=1)], axis=1)
+    peak = np.maximum.accumulate(path, axis=1)
+    drawdown = ((peak - path) / peak).max(axis=1)
+    return path[:, -1] - 1.0, drawdown
+
+def simulate_portfolio(
+    weights: Sequence[float],
+    prices: Sequence[float],
+    groups: Sequence,
+    probabilities: Optional[Sequence[float]] = None,
+    scenarios: int = SIM_SCENARIOS,
+    seed: Optional[int] = None,
+    workers: int = SIM_WORKERS,
+    correlation: float = EVENT_CORRELATION,
+) -> Optional[RiskMetrics]:
+    """
+    Simulated P&L distribution of holding `weights` (bankroll fractions) of binary
+    contracts bought at `prices` (0-1), listed in resolution order. `probabilities`
+    default to the prices (market-implied odds). Positions without a usable price are
+    ignored; returns None if nothing is left.
+    """
+    w = np.asarray(weights, dtype=float)
+    q = np.asarray(prices, dtype=float)
+    p = q.copy() if probabilities is None else np.asarray(probabilities, dtype=float)
+    keep = (w > 0) & (q > 0) & (q < 1) & np.isfinite(p)
+    if not keep.any():
+        return None
+    w, q, p = w[keep], q[keep], np.clip(p[keep], 1e-9, 1 - 1e-9)
+    labels = [g for g, k in zip(groups, keep) if k]
+    index = {g: i for i, g in enumerate(dict.fromkeys(labels))}
+    group_ids = np.array([index[g] for g in labels])
+
+    normal = NormalDist()
+    thresholds = np.array([normal.inv_cdf(x) for x in p])
+    win_payoff = w * (1.0 / q - 1.0)
+
+    seeds = np.random.SeedSequence(seed).spawn(max(1, math.ceil(scenarios / SIM_CHUNK_SIZE)))
+    sizes = [min(SIM_CHUNK_SIZE, scenarios - i * SIM_CHUNK_SIZE) for i in range(len(seeds))]
+    args = [(n, s, w, win_payoff, thresholds, group_ids, correlation) for n, s in zip(sizes, seeds)]
+    if workers > 1 and len(args) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_simulate_chunk, *zip(*args)))
+    else:
+        results = [_simulate_chunk(*a) for a in args]
+    pnl = np.concatenate([r[0] for r in results])
+    drawdown = np.concatenate([r[1] for r in results])
+    return summarize(pnl, drawdown)
+
+def summarize(pnl: np.ndarray, drawdown: np.ndarray) -> RiskMetrics:
+    tail_cut = np.quantile(pnl, 1 - SIM_CONFIDENCE)
+    mean, std = float(pnl.mean()), float(pnl.std())
+    return RiskMetrics(
+        scenarios=len(pnl),
+        expected_return_pct=round(mean * 100, 3),
+        std_pct=round(std * 100, 3),
+        var_95_pct=round(max(0.0, -tail_cut) * 100, 3),
+        cvar_95_pct=round(max(0.0, -float(pnl[pnl <= tail_cut].mean())) * 100, 3),
+        prob_loss=round(float((pnl < 0).mean()), 4),
+        expected_max_drawdown_pct=round(float(drawdown.mean()) * 100, 3),
+        max_drawdown_pct=round(float(np.quantile(drawdown, SIM_CONFIDENCE)) * 100, 3),
+        sharpe=round(mean / std, 3) if std > 0 else 0.0,
+    )
+
+def _resolution_ts(end_date: Optional[str]) -> float:
+    try:
+        return datetime.fromisoformat(str(end_date).replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return math.inf  # Unknown dates resolve last
+
+def simulate_plan(plan: AllocationPlan, **kwargs) -> Optional[RiskMetrics]:
+    """
+    Risk metrics for a plan's targets at their last prices (market-implied odds),
+    correlated within the groups the sizing step assigned. Targets resolve in
+    end-date order, so the drawdown path does not depend on the plan's list order.
+    """
+    targets = sorted(plan.targets, key=lambda t: _resolution_ts(t.end_date) if t.end_date else math.inf)
+    return simulate_portfolio(
+        weights=[t.weight for t in targets],
+        prices=[(t.last_price or 0.0) / 100 for t in targets],
+        groups=[t.correlation_group or t.event_title or t.market_slug or t.market_id for t in targets],
+        **kwargs,
+    )
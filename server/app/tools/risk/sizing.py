@@ -1,63 +1,52 @@
-from typing import List, Dict
+import math
+from typing import List, Dict, Optional
+import numpy as np
 from app.schemas.portfolio import RiskLimits, AllocationPlan, TargetAllocation, Trade
+from app.tools.polymarket.outcomes import outcome_table
+from app.tools.risk.optimizer import SizingInputs, correlation_key, position_caps, size_positions
 
 def get_outcome_price(market: Dict, outcome_label: str) -> float:
-    """Helper to find price for a specific outcome label (YES/NO/Team Name)"""
+    """Helper to find price for a specific outcome label (YES/NO/Team Name), in cents"""
+    # Outcomes are parsed once at ingestion (gamma_client) and cached on the market
+    price = outcome_table(market).price(outcome_label)
+    return price * 100 if price is not None else 0.0 # Convert 0.55 to 55 cents
+
+def _num(value) -> float:
     try:
-        # 1. Parse outcomePrices (often a JSON list of strings '["0.5", "0.6"]')
-        import json
-        raw_prices = market.get("outcomePrices")
-        if isinstance(raw_prices, str):
-            prices = json.loads(raw_prices)
-        else:
-            prices = raw_prices or []
-            
-        # 2. Parse outcomes (labels)
-        raw_outcomes = market.get("outcomes")
-        if isinstance(raw_outcomes, str):
-            outcomes = json.loads(raw_outcomes)
-        else:
-            outcomes = raw_outcomes or ["No", "Yes"] # Default binary
-            
-        # 3. Match label to index
-        # Normalize: 'YES' -> 'Yes', 'NO' -> 'No'
-        normalized_label = outcome_label.title() # 'Yes' or 'No' usually
-        
-        index = -1
-        if normalized_label in outcomes:
-            index = outcomes.index(normalized_label)
-        elif outcome_label in outcomes: # Try raw (e.g. Trump)
-            index = outcomes.index(outcome_label)
-            
-        # 4. Return price
-        if index != -1 and index < len(prices):
-            return float(prices[index]) * 100 # Convert 0.55 to 55 cents
-            
-    except Exception as e:
-        print(f"Error parsing price for {outcome_label}: {e}")
-        
-    return 0.0
+        return float(value) if value not in (None, "") else math.nan
+    except (TypeError, ValueError):
+        return math.nan
+
+def _side_price(market: Dict, outcome: str) -> float:
+    """
+    Cost per share (0-1) of buying `outcome`: the live CLOB touch when book metrics
+    are attached (YES buys at the ask, NO at 1 - bid), else the Gamma outcome price.
+    """
+    if outcome == "YES" and market.get("best_ask") is not None:
+        return float(market["best_ask"])
+    if outcome == "NO" and market.get("best_bid") is not None:
+        return 1.0 - float(market["best_bid"])
+    table = outcome_table(market)
+    price = table.price(outcome)
+    if price is None and outcome == "NO" and table.prices and table.prices[0] is not None:
+        price = 1.0 - table.prices[0]
+    return price if price is not None else math.nan
 
 def create_allocation_plan(
     markets: List[Dict], 
     bankroll: float, 
     risk: RiskLimits,
     research: "ResearchResult" = None,
-    event_rationales: Dict = None
+    event_rationales: Dict = None,
+    strategy: Optional[str] = None
 ) -> AllocationPlan:
     """
-    Simple deterministic allocator: equal weight across passing markets.
+    Picks one market per event from the LLM rationales (confidence >= 65), then sizes
+    the picks with the optimizer strategy (`strategy` or SIZING_STRATEGY).
     """
     if not markets:
         return AllocationPlan(targets=[], trades=[], warnings=["No valid markets found."])
     
-    # Simple strategy: Equal Weight
-    count = len(markets)
-    raw_weight = 1.0 / count
-    
-    # Cap weight at max_position_pct
-    weight = min(raw_weight, risk.max_position_pct)
-    
     targets = []
     trades = []
     total_alloc_usd = 0.0
@@ -124,52 +113,26 @@ def create_allocation_plan(
         # Pick top 1
         final_picks.append(group_list[0])
         
-    # Phase 3: Allocate (Confidence Weighted)
-    # Apply Min-Max Normalization to create drastic differences
-    # (score - min) / (max - min)
-    if final_picks:
-        confidences = [p["confidence"] for p in final_picks]
-        min_c = min(confidences)
-        max_c = max(confidences)
-        
-        # If there is a spread, normalize
-        if max_c > min_c:
-            for p in final_picks:
-                # Replace confidence with normalized score (0.0 to 1.0) multiplied by 100 for readability
-                # But actually, the raw value doesn't matter for the ratio, keeping it as 0-100 scale is fine if we want
-                # actually, user wants specific "percentage of the difference", so 0 to 1 float is best.
-                p["confidence_score"] = (p["confidence"] - min_c) / (max_c - min_c)
-        else:
-            # If all equal, give them equal score (e.g. 1.0)
-            for p in final_picks:
-                p["confidence_score"] = 1.0
-
-    # Instead of equal weight, we scale weights by confidence_score
-    score_sum = sum(p["confidence_score"] for p in final_picks)
-    
-    if score_sum <= 0:
-        # Fallback to equal weighting if scores are all zero (shouldn't happen with normalization 0-1 unless all min)
-        # Actually min-max with all same gives 1.0.
-        # If we have single item max=min, we gave it 1.0.
-        # just safely handle 0
-        for p in final_picks:
-            p["final_weight"] = 1.0 / len(final_picks)
-    else:
-        # Normalize strictly to 1.0 (100%)
-        # weight = score / score_sum
-        cumulative_weight = 0.0
-        for i, pick in enumerate(final_picks):
-            # Calculate raw share
-            share = pick["confidence_score"] / score_sum
-            
-            # For the last item, take the remainder to ensure exact 1.0
-            if i == len(final_picks) - 1:
-                weight = 1.0 - cumulative_weight
-            else:
-                weight = share
-                
-            pick["final_weight"] = weight
-            cumulative_weight += weight
+    # Phase 3: Size positions (optimizer.py; strategy from SIZING_STRATEGY)
+    # Caps: max_position_pct, a liquidity-scaled cap per market, and max_event_pct per
+    # correlation group (picks from one series)
+    group_ids: Dict[str, int] = {}
+    for pick in final_picks:
+        pick["group"] = correlation_key(pick["market"])
+    groups = [group_ids.setdefault(p["group"], len(group_ids)) for p in final_picks]
+    max_position_pct = risk.max_position_pct
+    inputs = SizingInputs(
+        confidence=np.array([float(p["confidence"]) for p in final_picks]),
+        price=np.array([_side_price(p["market"], p["outcome"]) for p in final_picks]),
+        caps=position_caps(np.array([_num(p["market"].get("liquidity")) for p in final_picks]), bankroll, max_position_pct),
+        groups=np.array(groups, dtype=int),
+        group_cap=risk.max_event_pct if risk.max_event_pct is not None else 1.0,
+    )
+    sizing = size_positions(inputs, strategy)
+    for pick, weight in zip(final_picks, sizing.weights):
+        pick["final_weight"] = float(weight)
+    # Picks the optimizer gave nothing (no edge) are not traded
+    final_picks = [p for p in final_picks if p["final_weight"] > 1e-9]
             
     # Final Pass to build plan
     total_alloc_usd = 0.0
@@ -189,7 +152,9 @@ def create_allocation_plan(
             citation_url=pick["citation"],
             volume_usd=float(m.get("volume", 0)),
             liquidity_usd=float(m.get("liquidity", 0)),
-            last_price=get_outcome_price(m, pick["outcome"])
+            last_price=get_outcome_price(m, pick["outcome"]),
+            correlation_group=pick["group"],
+            end_date=m.get("endDate")
         ))
         
         trades.append(Trade(
@@ -197,7 +162,7 @@ def create_allocation_plan(
             outcome=pick["outcome"],
             side="BUY", 
             amount_usd=target_usd,
-            reason=f"Agent-determined weighting ({weight*100:.1f}% alloc based on {pick['confidence']}% confid.)"
+            reason=f"{sizing.strategy} sizing ({weight*100:.1f}% alloc based on {pick['confidence']}% confid.)"
         ))
         
         total_alloc_usd += target_usd
@@ -205,5 +170,5 @@ def create_allocation_plan(
     return AllocationPlan(
         targets=targets,
         trades=trades,
-        warnings=[f"Agent-driven allocation complete. Allocated 100% of bankroll (${total_alloc_usd:.2f}) across {len(final_picks)} events."]
+        warnings=[f"{sizing.strategy} sizing complete. Allocated {total_alloc_usd / bankroll * 100 if bankroll else 0:.0f}% of bankroll (${total_alloc_usd:.2f}) across {len(final_picks)} events."] + sizing.notes
     )
@@ -0,0 +1,256 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, NamedTuple, Optional
+
+# Persistent caches live here, one SQLite file per namespace
+CACHE_DIR = os.getenv("CACHE_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), ".cache"))
+
+def cache_path(filename: str) -> str:
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    return os.path.join(CACHE_DIR, filename)
+
+class LRUCache:
+    """Small in-process LRU map with hit/miss counters. Values may be None."""
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0}
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        if key not in self._entries:
+            self.stats["misses"] += 1
+            return default
+        self.stats["hits"] += 1
+        self._entries.move_to_end(key)
+        return self._entries[key]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+class AsyncTTLCache:
+    """
+    Process-wide async cache with single-flight fetches and stale-while-revalidate.
+
+    - Fresh entries (age < ttl_s) are returned directly.
+    - Stale entries (age < ttl_s + stale_s) are returned immediately while one
+      background task refreshes them.
+    - Concurrent misses for the same key share a single in-flight fetch.
+    """
+    def __init__(self, name: str, ttl_s: float, stale_s: float = 0.0, max_entries: int = 256):
+        self.name = name
+        self.ttl_s = ttl_s
+        self.stale_s = stale_s
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()  # key -> (stored_at, value)
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.stats = {"hits": 0, "stale_hits": 0, "misses": 0, "coalesced": 0, "errors": 0}
+
+    async def get_or_fetch(self, key: Hashable, fetcher: Callable[[], Awaitable[Any]]) -> Any:
+        entry = self._entries.get(key)
+        if entry is not None:
+            age = time.monotonic() - entry[0]
+            if age < self.ttl_s:
+                self.stats["hits"] += 1
+                return entry[1]
+            if age < self.ttl_s + self.stale_s:
+                self.stats["stale_hits"] += 1
+                if key not in self._inflight:
+                    self._start_fetch(key, fetcher, background=True)
+                return entry[1]
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.stats["coalesced"] += 1
+        else:
+            self.stats["misses"] += 1
+            task = self._start_fetch(key, fetcher)
+        # Shield so a cancelled caller does not cancel the fetch other callers share
+        return await asyncio.shield(task)
+
+    async def refresh(self, key: Hashable, fetcher: Callable[[], Awaitable[Any]]) -> Any:
+        """Fetches and stores `key` now, joining a fetch that is already in flight."""
+        task = self._inflight.get(key) or self._start_fetch(key, fetcher)
+        return await asyncio.shield(task)
+
+    def peek(self, key: Hashable) -> Optional[Any]:
+        """Returns the cached value (fresh or stale) without fetching."""
+        entry = self._entries.get(key)
+        return entry[1] if entry is not None else None
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+    def _start_fetch(self, key: Hashable, fetcher: Callable[[], Awaitable[Any]], background: bool = False) -> asyncio.Task:
+        async def run():
+            try:
+                value = await fetcher()
+                self._store(key, value)
+                return value
+            except Exception:
+                self.stats["errors"] += 1
+                raise  # Also for background refreshes: callers that joined this fetch must see the failure
+            finally:
+                self._inflight.pop(key, None)
+
+        task = asyncio.create_task(run())
+        self._inflight[key] = task
+        if background:
+            task.add_done_callback(lambda t: self._background_done(key, t))
+        return task
+
+    def _background_done(self, key: Hashable, task: asyncio.Task) -> None:
+        # Nobody awaits a stale-hit refresh: consume its error here and keep serving the stale value
+        if not task.cancelled() and task.exception() is not None:
+            print(f"--- [Cache:{self.name}] ⚠️ Background refresh failed for {key}: {task.exception()}")
+
+    def _store(self, key: Hashable, value: Any) -> None:
+        self._entries[key] = (time.monotonic(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+class KVEntry(NamedTuple):
+    value: Any
+    stored_at: float
+    fresh: bool
+
+class PersistentKV:
+    """
+    SQLite-backed key/value store for JSON values, shared by threads and processes.
+    Entries older than `ttl_s` are stale: `get` only returns them with allow_stale=True
+    (e.g. for conditional revalidation). When the store grows past `max_bytes`, the
+    least recently used entries are evicted.
+
+    The database is opened on first use, so importing a module that defines a store
+    touches no files. Calls block on SQLite; async code uses the a* variants.
+    """
+    def __init__(self, namespace: str, ttl_s: Optional[float] = None, max_bytes: int = 64 * 1024 * 1024, path: Optional[str] = None):
+        self.namespace = namespace
+        self.ttl_s = ttl_s
+        self.max_bytes = max_bytes
+        self._path = path
+        self.stats = {"hits": 0, "stale_hits": 0, "misses": 0, "evictions": 0}
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._total = 0  # Running byte total of this process's view; resynced before evicting
+
+    @property
+    def path(self) -> str:
+        return self._path or cache_path(f"{self.namespace}.sqlite3")
+
+    def _db(self) -> sqlite3.Connection:
+        # Callers hold self._lock
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS kv ("
+                " key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL,"
+                " stored_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS kv_accessed ON kv (accessed_at)")
+            self._total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM kv").fetchone()[0]
+            self._conn = conn
+        return self._conn
+
+    def count(self, name: str, n: int = 1) -> None:
+        self.stats[name] = self.stats.get(name, 0) + n
+
+    def get(self, key: str, allow_stale: bool = False) -> Optional[KVEntry]:
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            row = db.execute("SELECT value, stored_at FROM kv WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                db.execute("UPDATE kv SET accessed_at = ? WHERE key = ?", (now, key))
+        if row is None:
+            self.count("misses")
+            return None
+        fresh = self.ttl_s is None or now - row[1] < self.ttl_s
+        if not fresh and not allow_stale:
+            self.count("misses")
+            return None
+        self.count("hits" if fresh else "stale_hits")
+        return KVEntry(json.loads(row[0]), row[1], fresh)
+
+    def set(self, key: str, value: Any) -> None:
+        data = json.dumps(value)
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            old = db.execute("SELECT size FROM kv WHERE key = ?", (key,)).fetchone()
+            db.execute(
+                "INSERT OR REPLACE INTO kv (key, value, size, stored_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, data, len(data), now, now),
+            )
+            self._total += len(data) - (old[0] if old else 0)
+            if self._total > self.max_bytes:
+                self._evict()
+
+    def touch(self, key: str) -> None:
+        """Marks an entry as fresh again (e.g. after a 304 Not Modified)."""
+        now = time.time()
+        with self._lock:
+            self._db().execute("UPDATE kv SET stored_at = ?, accessed_at = ? WHERE key = ?", (now, now, key))
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            db = self._db()
+            old = db.execute("SELECT size FROM kv WHERE key = ?", (key,)).fetchone()
+            db.execute("DELETE FROM kv WHERE key = ?", (key,))
+            self._total -= old[0] if old else 0
+
+    def clear(self) -> None:
+        with self._lock:
+            self._db().execute("DELETE FROM kv")
+            self._total = 0
+
+    async def aget(self, key: str, allow_stale: bool = False) -> Optional[KVEntry]:
+        return await asyncio.to_thread(self.get, key, allow_stale)
+
+    async def aset(self, key: str, value: Any) -> None:
+        await asyncio.to_thread(self.set, key, value)
+
+    async def atouch(self, key: str) -> None:
+        await asyncio.to_thread(self.touch, key)
+
+    def _evict(self) -> None:
+        # Other processes write too: resync the total before deciding what to drop
+        db = self._conn
+        self._total = total = db.execute("SELECT COALESCE(SUM(size), 0) FROM kv").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Evict down to 90% so we don't evict on every write once full
+        target = self.max_bytes * 0.9
+        for key, size in db.execute("SELECT key, size FROM kv ORDER BY accessed_at").fetchall():
+            if total <= target:
+                break
+            db.execute("DELETE FROM kv WHERE key = ?", (key,))
+            total -= size
+            self.count("evictions")
+        self._total = total
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            entries, size = self._db().execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM kv").fetchone()
+        lookups = self.stats["hits"] + self.stats["stale_hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "entries": entries,
+            "bytes": size,
+            "hit_rate": round(self.stats["hits"] / lookups, 3) if lookups else 0.0,
+        }
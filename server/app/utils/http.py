@@ -0,0 +1,81 @@
+import os
+from typing import Dict, Iterable
+import httpx
+
+# Pool settings are per upstream host: each base URL gets its own client,
+# so the limits below apply to gamma-api and clob independently.
+HTTP_TIMEOUT_S = float(os.getenv("HTTP_TIMEOUT_S", "15"))
+HTTP_CONNECT_TIMEOUT_S = float(os.getenv("HTTP_CONNECT_TIMEOUT_S", "5"))
+HTTP_MAX_CONNECTIONS_PER_HOST = int(os.getenv("HTTP_MAX_CONNECTIONS_PER_HOST", "20"))
+HTTP_MAX_KEEPALIVE_PER_HOST = int(os.getenv("HTTP_MAX_KEEPALIVE_PER_HOST", "10"))
+HTTP_KEEPALIVE_EXPIRY_S = float(os.getenv("HTTP_KEEPALIVE_EXPIRY_S", "30"))
+# Article fetching talks to many arbitrary hosts (news sites), a few requests each,
+# so it gets one separate client: a pool sized for the whole crawl, short keep-alive,
+# and redirects followed. It never shares connections with the API upstreams above.
+HTTP_WEB_MAX_CONNECTIONS = int(os.getenv("HTTP_WEB_MAX_CONNECTIONS", "100"))
+HTTP_WEB_MAX_KEEPALIVE = int(os.getenv("HTTP_WEB_MAX_KEEPALIVE", "20"))
+HTTP_WEB_KEEPALIVE_EXPIRY_S = float(os.getenv("HTTP_WEB_KEEPALIVE_EXPIRY_S", "5"))
+_WEB_CLIENT = "<web>"  # _clients key of the many-host client
+
+_clients: Dict[str, httpx.AsyncClient] = {}
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+def _build_client(base_url: str) -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        base_url=base_url,
+        http2=_http2_available(),
+        limits=httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS_PER_HOST,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE_PER_HOST,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY_S,
+        ),
+        timeout=httpx.Timeout(HTTP_TIMEOUT_S, connect=HTTP_CONNECT_TIMEOUT_S),
+    )
+
+def _build_web_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        http2=_http2_available(),
+        follow_redirects=True,
+        limits=httpx.Limits(
+            max_connections=HTTP_WEB_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_WEB_MAX_KEEPALIVE,
+            keepalive_expiry=HTTP_WEB_KEEPALIVE_EXPIRY_S,
+        ),
+        timeout=httpx.Timeout(HTTP_TIMEOUT_S, connect=HTTP_CONNECT_TIMEOUT_S),
+    )
+
+def get_web_client() -> httpx.AsyncClient:
+    """The shared client for arbitrary web pages (article extraction); see HTTP_WEB_*."""
+    client = _clients.get(_WEB_CLIENT)
+    if client is None or client.is_closed:
+        client = _build_web_client()
+        _clients[_WEB_CLIENT] = client
+    return client
+
+def get_http_client(base_url: str) -> httpx.AsyncClient:
+    """
+    Returns the shared, pooled client for `base_url`.
+    Clients are normally created in the FastAPI startup hook; scripts and the CLI
+    that never run it get one lazily on first use.
+    """
+    client = _clients.get(base_url)
+    if client is None or client.is_closed:
+        client = _build_client(base_url)
+        _clients[base_url] = client
+    return client
+
+def init_http_clients(base_urls: Iterable[str]) -> None:
+    for url in base_urls:
+        get_http_client(url)
+
+async def close_http_clients() -> None:
+    clients = list(_clients.values())
+    _clients.clear()
+    for client in clients:
+        await client.aclose()
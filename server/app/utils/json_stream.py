@@ -0,0 +1,100 @@
+import string
+from typing import Dict, Iterable, List, Optional, Tuple
+
+_SIMPLE_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+class JsonFieldStream:
+    """
+    Incrementally decodes the top-level string fields named in `fields` from a JSON
+    object that arrives in arbitrary fragments (streamed LLM output). Text before the
+    opening brace (e.g. a ```json fence) is ignored; nested values are skipped.
+
+        stream = JsonFieldStream(["summary"])
+        stream.feed('{"summ')        -> []
+        stream.feed('ary": "Rates\\n') -> [("summary", "Rates\\n")]
+    """
+    def __init__(self, fields: Iterable[str]):
+        self.fields = set(fields)
+        self._started = False
+        self._depth = 0
+        self._in_string = False
+        self._role: Optional[str] = None  # "key" | "value" | "skip" for the open string
+        self._escape = ""  # Pending escape sequence, e.g. "\\u00e"
+        self._high_surrogate: Optional[int] = None
+        self._key: List[str] = []
+        self._last_key: Optional[str] = None
+        self._expect_value = False
+        self._out: Dict[str, List[str]] = {}
+
+    def feed(self, delta: str) -> List[Tuple[str, str]]:
+        """Decoded text per field contained in `delta`, in order of first appearance."""
+        for ch in delta:
+            if self._in_string:
+                self._string_char(ch)
+            elif not self._started:
+                if ch == "{":
+                    self._started, self._depth = True, 1
+            elif ch == '"':
+                self._in_string = True
+                if self._depth == 1 and not self._expect_value:
+                    self._role, self._key = "key", []
+                elif self._depth == 1 and self._last_key in self.fields:
+                    self._role = "value"
+                else:
+                    self._role = "skip"
+                self._expect_value = False
+            elif ch in "{[":
+                self._depth += 1
+                self._expect_value = False
+            elif ch in "}]":
+                self._depth -= 1
+            elif ch == ":" and self._depth == 1:
+                self._expect_value = True
+            elif not ch.isspace():
+                self._expect_value = False
+        out, self._out = self._out, {}
+        return [(field, "".join(parts)) for field, parts in out.items()]
+
+    def _string_char(self, ch: str) -> None:
+        if self._escape.startswith("\\u") and ch not in string.hexdigits:
+            # Malformed \u escape (LLMs emit these): keep its raw text, then handle ch as usual
+            raw, self._escape = self._escape, ""
+            self._high_surrogate = None
+            self._emit(raw)
+            self._string_char(ch)
+        elif self._escape:
+            self._escape += ch
+            decoded = self._decode_escape()
+            if decoded is not None:
+                self._escape = ""
+                self._emit(decoded)
+        elif ch == "\\":
+            self._escape = ch
+        elif ch == '"':
+            self._in_string = False
+            if self._role == "key":
+                self._last_key = "".join(self._key)
+        else:
+            self._emit(ch)
+
+    def _decode_escape(self) -> Optional[str]:
+        """The decoded text of a complete escape, "" for half a surrogate pair, None if incomplete."""
+        kind = self._escape[1]
+        if kind != "u":
+            return _SIMPLE_ESCAPES.get(kind, kind)
+        if len(self._escape) < 6:
+            return None
+        code = int(self._escape[2:6], 16)
+        if 0xD800 <= code < 0xDC00:
+            self._high_surrogate = code
+            return ""
+        if 0xDC00 <= code < 0xE000 and self._high_surrogate is not None:
+            code = 0x10000 + ((self._high_surrogate - 0xD800) << 10) + (code - 0xDC00)
+        self._high_surrogate = None
+        return chr(code)
+
+    def _emit(self, text: str) -> None:
+        if self._role == "key":
+            self._key.append(text)
+        elif self._role == "value" and text:
+            self._out.setdefault(self._last_key, []).append(text)
@@ -0,0 +1,92 @@
+import asyncio
+import threading
+import time
+import weakref
+from typing import Optional
+
+class ConcurrencyLimit:
+    """
+    Module-level semaphore that is safe to share across event loops.
+    asyncio.Semaphore binds to the first loop that waits on it, which breaks the
+    CLI, tests and worker processes that each run their own loop; this keeps one
+    semaphore per running loop instead.
+    """
+    def __init__(self, limit: int):
+        self.limit = max(1, limit)
+        self._semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        sem = self._semaphores.get(loop)
+        if sem is None:
+            sem = asyncio.Semaphore(self.limit)
+            self._semaphores[loop] = sem
+        return sem
+
+    async def __aenter__(self):
+        await self._semaphore().acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self._semaphore().release()
+
+class TokenBucket:
+    """
+    Refills at `rate` units per second up to `capacity`. `take` may overdraw the
+    bucket: the balance goes negative and later takers wait it off, in order.
+    Thread-safe, with no loop affinity.
+    """
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._level = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._level = min(self.capacity, self._level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def take(self, amount: float) -> float:
+        """Withdraws `amount`; returns the seconds to wait before using it."""
+        with self._lock:
+            self._refill()
+            self._level -= amount
+            return max(0.0, -self._level / self.rate)
+
+    def give(self, amount: float) -> None:
+        with self._lock:
+            self._refill()
+            self._level = min(self.capacity, self._level + amount)
+
+class RateLimit:
+    """
+    Provider-style rate limit: requests and tokens per minute (0 = unlimited), each
+    a TokenBucket holding one minute's budget. `acquire` waits until one request
+    with an estimated token count fits; `settle` corrects the estimate with the
+    usage the provider reported.
+    """
+    def __init__(self, requests_per_min: float = 0, tokens_per_min: float = 0):
+        self._requests = TokenBucket(requests_per_min / 60, requests_per_min) if requests_per_min > 0 else None
+        self._tokens = TokenBucket(tokens_per_min / 60, tokens_per_min) if tokens_per_min > 0 else None
+        self.stats = {"acquired": 0, "waited_s": 0.0}
+
+    async def acquire(self, tokens: int = 0) -> None:
+        wait = 0.0
+        if self._requests is not None:
+            wait = self._requests.take(1)
+        if self._tokens is not None and tokens:
+            wait = max(wait, self._tokens.take(tokens))
+        self.stats["acquired"] += 1
+        if wait > 0:
+            self.stats["waited_s"] += wait
+            await asyncio.sleep(wait)
+
+    def settle(self, estimated: int, actual: Optional[int]) -> None:
+        if self._tokens is None or not actual:
+            return
+        if actual < estimated:
+            self._tokens.give(estimated - actual)
+        elif actual > estimated:
+            self._tokens.take(actual - estimated)
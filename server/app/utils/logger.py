@@ -35,10 +35,8 @@ class AgentLogger:
         self.logs.append(log_entry)
         
         # Stream to Queue if active
-        from app.utils.stream import log_queue_var
-        q = log_queue_var.get()
-        if q:
-            q.put_nowait(log_entry)
+        from app.utils.stream import emit_event
+        emit_event(log_entry)
 
     def start(self, message: str):
         self._add("start", message)
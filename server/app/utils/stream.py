@@ -4,3 +4,9 @@ from typing import Optional
 
 # Global context variable to hold the event queue for the current request
 log_queue_var: ContextVar[Optional[Queue]] = ContextVar("log_queue", default=None)
+
+def emit_event(event: dict) -> None:
+    """Puts `event` on the current request's stream, if there is one."""
+    q = log_queue_var.get()
+    if q:
+        q.put_nowait(event)
@@ -0,0 +1,52 @@
+"""
+Micro-benchmark for the article text extractor backends.
+
+Runs every backend in app.tools.news.html_text over the saved HTML fixtures
+(tests/fixtures/html), plus a synthetic multi-megabyte page built from them,
+and prints the median parse time per document.
+
+    python -m benchmarks.bench_extract [--rounds 50]
+"""
+import argparse
+import glob
+import os
+import statistics
+import time
+from app.tools.news.html_text import BACKENDS, extract_text
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "..", "tests", "fixtures", "html")
+
+def load_corpus():
+    corpus = {}
+    for path in sorted(glob.glob(os.path.join(FIXTURE_DIR, "*.html"))):
+        with open(path, encoding="utf-8") as f:
+            corpus[os.path.basename(path)] = f.read()
+    # Long page: lots of boilerplate before the article, as on real news sites
+    boilerplate = "<div class='related'>" + "<a href='/x'>Related story headline</a>" * 20 + "</div>"
+    article = corpus.get("news_article.html", "")
+    corpus["synthetic_2mb.html"] = "<html><body>" + boilerplate * 2000 + article + "<p>" + "filler text " * 200 + "</p>" * 200 + "</body></html>"
+    return corpus
+
+def bench(html: str, backend: str, rounds: int) -> float:
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        extract_text(html, backend=backend)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark HTML text extractor backends")
+    parser.add_argument("--rounds", type=int, default=50)
+    args = parser.parse_args()
+
+    corpus = load_corpus()
+    backends = sorted(BACKENDS)
+    print(f"{'document':<24} {'size':>10} " + " ".join(f"{b + ' ms':>10}" for b in backends))
+    for name, html in corpus.items():
+        rounds = max(3, args.rounds // 10) if len(html) > 1_000_000 else args.rounds
+        row = [bench(html, b, rounds) for b in backends]
+        print(f"{name:<24} {len(html):>10} " + " ".join(f"{ms:>10.2f}" for ms in row))
+
+if __name__ == "__main__":
+    main()
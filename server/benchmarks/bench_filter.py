@@ -0,0 +1,64 @@
+"""
+Micro-benchmark for the risk filter.
+
+Builds a synthetic universe of Gamma-style market dicts and times, per size:
+decoding it into a MarketTable (done once where markets are ingested, i.e. when
+MarketIndex indexes a universe; requests only slice that table), the vectorized
+filter over a decoded table (the per-request cost), and filter_markets on a raw
+list, which decodes before filtering (the path for callers without a table).
+
+    python -m benchmarks.bench_filter [--rounds 50]
+"""
+import argparse
+import random
+import statistics
+import time
+from app.schemas.portfolio import RiskLimits
+from app.tools.risk.constraints import filter_indices, filter_markets
+from app.tools.risk.market_table import MarketTable
+
+LIMITS = RiskLimits(max_position_pct=0.2, min_liquidity_usd=1000, min_volume_usd=500,
+                    max_spread_pct=0.02, min_top_depth_usd=100, max_slippage_pct=0.05)
+
+def synthetic_markets(n: int, seed: int = 1):
+    rng = random.Random(seed)
+    markets = []
+    for i in range(n):
+        yes = round(rng.uniform(0.01, 0.99), 3)
+        m = {
+            "id": str(i),
+            "liquidity": f"{rng.uniform(0, 50000):.2f}",
+            "volume": f"{rng.uniform(0, 500000):.2f}",
+            "outcomePrices": f'["{yes}", "{round(1 - yes, 3)}"]',
+            "endDate": "2026-12-31T12:00:00Z",
+        }
+        if rng.random() > 0.3:
+            m.update(spread=rng.choice([0.001, 0.01, 0.03]), top_depth_usd=rng.uniform(0, 2000),
+                     slippage_pct=rng.choice([None, 0.005, 0.08]))
+        markets.append(m)
+    return markets
+
+def median_us(fn, rounds: int) -> float:
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the columnar risk filter")
+    parser.add_argument("--rounds", type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"{'markets':>8} {'decode us':>12} {'mask us':>10} {'list us':>10}")
+    for n in (100, 1_000, 10_000):
+        markets = synthetic_markets(n)
+        table = MarketTable(markets)
+        decode = median_us(lambda: MarketTable(markets), max(3, args.rounds // 10))
+        mask = median_us(lambda: filter_indices(table, LIMITS), args.rounds)
+        full = median_us(lambda: filter_markets(markets, LIMITS), max(3, args.rounds // 10))
+        print(f"{n:>8} {decode:>12.0f} {mask:>10.1f} {full:>10.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Micro-benchmark for keyword lookups in the in-memory market index.
+
+Builds a synthetic Gamma /events universe per size and prints the index build
+time and the median search time for a few keyword sets.
+
+    python -m benchmarks.bench_market_index [--rounds 200]
+"""
+import argparse
+import statistics
+import time
+from app.tools.polymarket.market_index import MarketIndex
+
+QUERIES = [["bitcoin", "ethereum"], ["nba finals"], ["election"], ["token123"]]
+
+def synthetic_events(n: int):
+    events = [
+        {"slug": f"e{i}", "title": f"Event {i}", "tags": [{"label": "Misc"}],
+         "markets": [{"id": str(i), "question": f"Will token{i} happen by 2026?", "outcomes": '["Yes", "No"]', "volume": str(i)}]}
+        for i in range(n)
+    ]
+    events[n // 2]["markets"][0]["question"] = "Will Bitcoin hit 100k?"
+    return events
+
+def median_us(fn, rounds: int) -> float:
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark market index lookups")
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'markets':>8} {'build ms':>10} " + " ".join(f"{' '.join(q)[:14]:>15}" for q in QUERIES))
+    for n in (1_000, 5_000, 20_000):
+        events = synthetic_events(n)
+        start = time.perf_counter()
+        index = MarketIndex.from_events(events)
+        build_ms = (time.perf_counter() - start) * 1e3
+        lookups = [median_us(lambda q=q: index.search(q), args.rounds) for q in QUERIES]
+        print(f"{n:>8} {build_ms:>10.1f} " + " ".join(f"{us:>13.1f}us" for us in lookups))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+import base64
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.api.routes import artifacts
+from app.services import artifact_store as artifact_module
+from app.services import funds_svc
+from app.services.artifact_store import LocalArtifactStore
+
+DATA = bytes(range(256)) * 40  # 10240 bytes
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = LocalArtifactStore(str(tmp_path))
+    monkeypatch.setattr(artifacts, "artifact_store", store)
+    monkeypatch.setattr(funds_svc, "artifact_store", store)
+    return store
+
+@pytest.fixture
+def client(store):
+    app = FastAPI()
+    app.include_router(artifacts.router, prefix="/artifacts")
+    return TestClient(app)
+
+def test_put_is_content_addressed_and_deduplicated(store, tmp_path):
+    a = store.put(DATA, "application/pdf")
+    b = store.put(DATA, "application/pdf")
+    assert a == b and a.size == len(DATA) and a.url == f"/artifacts/{a.digest}"
+    assert len([p for p in tmp_path.rglob("*") if p.is_file() and p.suffix != ".json"]) == 1
+    assert store.stat(a.digest).content_type == "application/pdf"
+    assert store.stat("0" * 64) is None and store.stat("../etc") is None
+
+def test_full_body_etag_and_not_modified(store, client):
+    ref = store.put(DATA, "application/pdf")
+    res = client.get(ref.url)
+    assert res.status_code == 200 and res.content == DATA
+    assert res.headers["content-type"] == "application/pdf"
+    assert res.headers["etag"] == f'"{ref.digest}"'
+    assert client.get(ref.url, headers={"If-None-Match": res.headers["etag"]}).status_code == 304
+    assert client.head(ref.url).headers["content-length"] == str(len(DATA))
+    assert client.get("/artifacts/" + "f" * 64).status_code == 404
+
+@pytest.mark.parametrize("header,start,end", [
+    ("bytes=0-99", 0, 100),
+    ("bytes=10000-", 10000, len(DATA)),
+    ("bytes=-240", len(DATA) - 240, len(DATA)),
+    ("bytes=10200-99999", 10200, len(DATA)),
+])
+def test_range_requests(store, client, header, start, end):
+    ref = store.put(DATA, "application/pdf")
+    res = client.get(ref.url, headers={"Range": header})
+    assert res.status_code == 206
+    assert res.content == DATA[start:end]
+    assert res.headers["content-range"] == f"bytes {start}-{end - 1}/{len(DATA)}"
+
+def test_unsatisfiable_and_stale_ranges(store, client):
+    ref = store.put(DATA, "application/pdf")
+    res = client.get(ref.url, headers={"Range": f"bytes={len(DATA)}-"})
+    assert res.status_code == 416 and res.headers["content-range"] == f"bytes */{len(DATA)}"
+    # If-Range with a different validator: full body instead of a partial one
+    assert client.get(ref.url, headers={"Range": "bytes=0-9", "If-Range": '"other"'}).status_code == 200
+
+def test_publish_stores_legacy_base64_once(store):
+    encoded = base64.b64encode(DATA).decode()
+    url = funds_svc.store_report_artifact(encoded)
+    assert url == store.put(DATA, "application/pdf").url
+    # Republishing by reference (absolute client URL) resolves to the same artifact
+    assert funds_svc.store_report_artifact(f"http://localhost:8000{url}") == url
+    assert funds_svc.store_report_artifact("not base64!") is None
+    assert artifact_module.digest_from_url("/artifacts/xyz") is None
@@ -0,0 +1,129 @@
+import asyncio
+import json
+import os
+from types import SimpleNamespace
+import pytest
+from websockets.asyncio.server import serve
+from app.tools.polymarket import clob_client
+from app.tools.polymarket.book_mirror import BookMirror, L2Book
+
+REPLAY = os.path.join(os.path.dirname(__file__), "fixtures", "clob_ws", "market_replay.json")
+
+def frame_assets(frame):
+    if frame.get("price_changes"):
+        return {c["asset_id"] for c in frame["price_changes"]}
+    return {frame.get("asset_id")}
+
+@pytest.fixture
+async def replay_server():
+    """Local market channel: replays the recorded frames for whatever gets subscribed."""
+    with open(REPLAY) as f:
+        frames = json.load(f)
+    state = SimpleNamespace(received=[], connections=[])
+
+    async def handler(ws):
+        state.connections.append(ws)
+        async for raw in ws:
+            if raw == "PING":
+                await ws.send("PONG")
+                continue
+            msg = json.loads(raw)
+            state.received.append(msg)
+            if msg.get("operation") == "unsubscribe":
+                continue
+            assets = set(msg["assets_ids"])
+            for frame in frames:
+                if frame_assets(frame) & assets:
+                    await ws.send(json.dumps(frame))
+
+    async with serve(handler, "127.0.0.1", 0) as server:
+        state.url = f"ws://127.0.0.1:{server.sockets[0].getsockname()[1]}"
+        yield state
+
+async def wait_for(predicate, timeout=3.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        assert asyncio.get_running_loop().time() < deadline, "condition not reached"
+        await asyncio.sleep(0.01)
+
+def test_l2book_tracks_best_levels():
+    book = L2Book()
+    book.apply_snapshot([{"price": "0.40", "size": "10"}, {"price": "0.45", "size": "5"}],
+                        [{"price": "0.50", "size": "7"}, {"price": "0.60", "size": "1"}])
+    assert (book.best_bid, book.best_ask, book.spread) == (0.45, 0.5, 0.05)
+    book.set_level("BUY", "0.45", "0")
+    book.set_level("SELL", "0.50", "0")
+    assert (book.best_bid, book.best_ask) == (0.4, 0.6)
+    book.set_level("SELL", "0.455", "3")
+    assert book.best_ask == 0.455
+    assert book.to_book()["asks"][0] == {"price": "0.455", "size": "3.0"}
+
+async def test_mirror_applies_snapshot_and_deltas(replay_server):
+    mirror = BookMirror(url=replay_server.url)
+    mirror.start()
+    try:
+        await wait_for(lambda: mirror._ws is not None)
+        await mirror.track(["111"], wait_s=2)
+        await wait_for(lambda: mirror.stats["updates"] >= 2)
+        book = mirror.get("111")
+        assert (book.best_bid, book.best_ask) == (0.5, 0.55)
+
+        await mirror.track(["222"], wait_s=2)
+        await wait_for(lambda: mirror.stats["updates"] >= 3)
+        assert mirror.get("222").best_ask == 0.11
+        assert replay_server.received[:2] == [
+            {"assets_ids": ["111"], "type": "market"},
+            {"assets_ids": ["222"], "operation": "subscribe"},
+        ]
+    finally:
+        await mirror.stop()
+
+async def test_idle_tokens_are_unsubscribed(replay_server):
+    mirror = BookMirror(url=replay_server.url, idle_ttl_s=0.05, ping_s=0.05)
+    mirror.start()
+    try:
+        await mirror.track(["111"])
+        await wait_for(lambda: mirror.stats["snapshots"] >= 1)
+        await wait_for(lambda: "111" not in mirror.books)
+        assert mirror.get("111") is None
+        await wait_for(lambda: {"assets_ids": ["111"], "operation": "unsubscribe"} in replay_server.received)
+    finally:
+        await mirror.stop()
+
+async def test_reconnect_invalidates_and_resubscribes(replay_server):
+    mirror = BookMirror(url=replay_server.url)
+    mirror.start()
+    try:
+        await mirror.track(["111"])
+        await wait_for(lambda: mirror.get("111") is not None)
+        await replay_server.connections[0].close()
+        await wait_for(lambda: mirror._ws is None)
+        assert mirror.get("111") is None  # readers fall back to REST while disconnected
+        await wait_for(lambda: mirror.get("111") is not None)
+        assert mirror.stats["connects"] == 2
+        assert replay_server.received[-1] == {"assets_ids": ["111"], "type": "market"}
+    finally:
+        await mirror.stop()
+
+async def test_attach_book_metrics_prefers_mirror(replay_server, monkeypatch):
+    mirror = BookMirror(url=replay_server.url)
+    mirror.start()
+    rest_calls = []
+
+    async def fake_fetch(token_ids):
+        rest_calls.append(list(token_ids))
+        return {}
+
+    monkeypatch.setattr(clob_client, "book_mirror", mirror)
+    monkeypatch.setattr(clob_client, "fetch_orderbooks", fake_fetch)
+    try:
+        markets = [{"id": "m1", "clobTokenIds": json.dumps(["111", "112"])}]
+        await clob_client.attach_book_metrics(markets)  # cold: REST, then subscribe
+        assert rest_calls == [["111"]] and "spread" not in markets[0]
+        await wait_for(lambda: mirror.stats["updates"] >= 2)
+
+        await clob_client.attach_book_metrics(markets)
+        assert rest_calls == [["111"]]
+        assert markets[0]["spread"] == pytest.approx(0.05)
+    finally:
+        await mirror.stop()
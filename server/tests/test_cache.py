@@ -0,0 +1,106 @@
+import asyncio
+import pytest
+from app.utils.cache import AsyncTTLCache, PersistentKV
+
+async def test_concurrent_misses_share_one_fetch():
+    cache = AsyncTTLCache("test", ttl_s=60)
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return [{"id": "1"}]
+
+    results = await asyncio.gather(*[cache.get_or_fetch("firehose", fetch) for _ in range(50)])
+    assert calls == 1
+    assert all(r == [{"id": "1"}] for r in results)
+    assert cache.stats["coalesced"] == 49
+
+async def test_expired_entry_is_refetched():
+    cache = AsyncTTLCache("test", ttl_s=0.0)
+    values = iter([1, 2])
+
+    async def fetch():
+        return next(values)
+
+    assert await cache.get_or_fetch("k", fetch) == 1
+    assert await cache.get_or_fetch("k", fetch) == 2
+
+async def test_stale_value_served_while_refreshing():
+    cache = AsyncTTLCache("test", ttl_s=0.0, stale_s=60)
+    values = iter(["old", "new"])
+
+    async def fetch():
+        return next(values)
+
+    assert await cache.get_or_fetch("k", fetch) == "old"
+    # Stale hit returns immediately and schedules a refresh
+    assert await cache.get_or_fetch("k", fetch) == "old"
+    await asyncio.sleep(0)
+    assert cache.peek("k") == "new"
+    assert cache.stats["stale_hits"] == 1
+
+async def test_fetch_errors_propagate_and_are_not_cached():
+    cache = AsyncTTLCache("test", ttl_s=60)
+
+    async def boom():
+        raise RuntimeError("upstream down")
+
+    with pytest.raises(RuntimeError):
+        await cache.get_or_fetch("k", boom)
+    assert cache.peek("k") is None
+
+async def test_failed_background_refresh_raises_for_joined_callers():
+    cache = AsyncTTLCache("test", ttl_s=0.0, stale_s=60)
+    gate = asyncio.Event()
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            return "old"
+        await gate.wait()
+        raise RuntimeError("upstream down")
+
+    assert await cache.get_or_fetch("k", fetch) == "old"
+    assert await cache.get_or_fetch("k", fetch) == "old"  # Starts the background refresh
+    joined = asyncio.create_task(cache.refresh("k", fetch))
+    await asyncio.sleep(0)
+    gate.set()
+    with pytest.raises(RuntimeError):
+        await joined
+    assert calls == 2 and cache.peek("k") == "old"
+
+def test_kv_ttl_and_stale_reads(tmp_path):
+    kv = PersistentKV("t", ttl_s=0.0, path=str(tmp_path / "t.sqlite3"))
+    kv.set("k", {"v": 1})
+    assert kv.get("k") is None
+    entry = kv.get("k", allow_stale=True)
+    assert entry.value == {"v": 1} and not entry.fresh
+    assert kv.stats["misses"] == 1 and kv.stats["stale_hits"] == 1
+
+def test_kv_lru_eviction_by_size(tmp_path):
+    kv = PersistentKV("t", max_bytes=350, path=str(tmp_path / "t.sqlite3"))
+    for i in range(3):
+        kv.set(f"k{i}", "x" * 100)
+    kv.get("k0")  # k0 is now more recent than k1
+    kv.set("k3", "x" * 100)
+    assert kv.get("k1") is None
+    assert kv.get("k0") is not None
+    assert kv.summary()["evictions"] >= 1
+
+async def test_kv_opens_lazily_and_tracks_size(tmp_path):
+    path = tmp_path / "t.sqlite3"
+    kv = PersistentKV("t", path=str(path))
+    assert not path.exists()
+    await kv.aset("k", "x" * 10)
+    kv.set("k", "x" * 20)  # Replacing a key counts only its new size
+    kv.set("j", "y")
+    assert kv._total == kv.summary()["bytes"] == 22 + 3
+    assert (await kv.aget("k")).value == "x" * 20
+    kv.delete("j")
+    assert kv._total == 22
+    # A second handle (e.g. another process) starts from the stored total
+    assert PersistentKV("t", path=str(path)).summary()["bytes"] == 22
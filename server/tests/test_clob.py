@@ -0,0 +1,82 @@
+import json
+import httpx
+import pytest
+from app.tools.polymarket import clob_client
+from app.tools.risk.constraints import filter_markets
+from app.tools.risk.market_table import MarketTable
+from app.schemas.portfolio import RiskLimits
+
+def make_book(token_id, bids, asks):
+    return {
+        "asset_id": token_id,
+        "bids": [{"price": str(p), "size": str(s)} for p, s in bids],
+        "asks": [{"price": str(p), "size": str(s)} for p, s in asks],
+    }
+
+BOOKS = {
+    "tight": make_book("tight", [(0.48, 1000), (0.47, 500)], [(0.50, 1000), (0.52, 5000)]),
+    "thin": make_book("thin", [(0.30, 10)], [(0.40, 10), (0.60, 10)]),
+}
+
+def test_book_metrics_spread_depth_and_slippage():
+    metrics = clob_client.book_metrics(BOOKS["tight"], size_usd=1000)
+    assert metrics["best_bid"] == 0.48 and metrics["best_ask"] == 0.50
+    assert metrics["spread"] == pytest.approx(0.02)
+    assert metrics["top_depth_usd"] == pytest.approx(480.0)
+    # $500 fills at 0.50, $500 at 0.52
+    shares = 500 / 0.50 + 500 / 0.52
+    assert metrics["slippage_pct"] == pytest.approx((1000 / shares - 0.50) / 0.50, abs=1e-6)
+
+def test_book_metrics_thin_and_one_sided_books():
+    assert clob_client.book_metrics(BOOKS["thin"], size_usd=100)["slippage_pct"] is None
+    empty = clob_client.book_metrics(make_book("x", [], [(0.5, 10)]))
+    assert empty["spread"] == 1.0 and empty["top_depth_usd"] == 0.0
+
+@pytest.fixture
+def clob_server(monkeypatch):
+    server = {"calls": [], "batch_down": False}
+
+    def handler(request: httpx.Request):
+        server["calls"].append(request)
+        if request.url.path == "/books":
+            if server["batch_down"]:
+                return httpx.Response(404)
+            tokens = [t["token_id"] for t in json.loads(request.content)]
+            return httpx.Response(200, json=[BOOKS[t] for t in tokens if t in BOOKS])
+        token = request.url.params["token_id"]
+        return httpx.Response(200, json=BOOKS[token]) if token in BOOKS else httpx.Response(404)
+
+    client = httpx.AsyncClient(base_url="https://clob.example", transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(clob_client, "get_http_client", lambda base_url: client)
+    return server
+
+async def test_books_fetched_in_one_batch(clob_server):
+    books = await clob_client.fetch_orderbooks(["tight", "thin", "tight", "missing"])
+    assert set(books) == {"tight", "thin"}
+    assert [r.url.path for r in clob_server["calls"]] == ["/books"]
+
+async def test_falls_back_to_single_books(clob_server):
+    clob_server["batch_down"] = True
+    books = await clob_client.fetch_orderbooks(["tight", "thin"])
+    assert set(books) == {"tight", "thin"}
+    assert sorted(r.url.path for r in clob_server["calls"]) == ["/book", "/book", "/books"]
+
+async def test_filter_rejects_illiquid_books(clob_server):
+    markets = [
+        {"id": "1", "liquidity": 5000, "clobTokenIds": json.dumps(["tight", "tight-no"])},
+        {"id": "2", "liquidity": 5000, "clobTokenIds": json.dumps(["thin", "thin-no"])},
+        {"id": "3", "liquidity": 5000},  # no book: default spread, book checks skipped
+    ]
+    await clob_client.attach_book_metrics(markets, size_usd=50)
+    limits = RiskLimits(max_position_pct=0.2, min_liquidity_usd=1000, max_spread_pct=0.05, min_top_depth_usd=100)
+    assert [m["id"] for m in filter_markets(markets, limits)] == ["1", "3"]
+
+async def test_book_metrics_land_in_a_prebuilt_table(clob_server):
+    table = MarketTable([
+        {"id": "1", "liquidity": 5000, "clobTokenIds": json.dumps(["tight", "tight-no"])},
+        {"id": "2", "liquidity": 5000, "clobTokenIds": json.dumps(["thin", "thin-no"])},
+    ])
+    await clob_client.attach_book_metrics(table, size_usd=50)
+    assert table["top_depth_usd"][1] == table.markets[1]["top_depth_usd"]
+    limits = RiskLimits(max_position_pct=0.2, min_liquidity_usd=1000, max_spread_pct=0.05, min_top_depth_usd=100)
+    assert [m["id"] for m in filter_markets(table, limits)] == ["1"]
@@ -0,0 +1,46 @@
+from app.tools.news import context
+from app.tools.news.context import build_context, chunk_text, count_tokens, simhash
+
+ARTICLE = (
+    "Bitcoin rallied past $70,000 as spot ETF inflows hit a record. Analysts said the halving supply shock "
+    "was only starting to bite.\n\n"
+    "Separately, the city council approved a new parking ordinance for downtown streets. Residents will need "
+    "permits from March.\n\n"
+    "Miners expect bitcoin fees to climb after the halving, and ETF issuers reported more bitcoin purchases."
+)
+
+def _item(title, content, url):
+    return {"title": title, "url": url, "content": content}
+
+def test_chunks_respect_the_token_budget():
+    chunks = chunk_text(ARTICLE * 5, max_tokens=40)
+    assert len(chunks) > 5
+    assert all(count_tokens(c) <= 40 + 40 for c in chunks)  # One sentence may overflow a chunk
+    assert " ".join(chunks).replace(" ", "") == " ".join((ARTICLE * 5).split()).replace(" ", "")
+
+def test_simhash_near_duplicates():
+    a = simhash(ARTICLE)
+    near = simhash(ARTICLE.replace("record", "new record"))
+    other = simhash("The city council approved a new parking ordinance for downtown streets and residents need permits.")
+    assert (a ^ near).bit_count() < (a ^ other).bit_count()
+    assert (a ^ a).bit_count() == 0
+
+def test_pack_prefers_relevant_passages_and_drops_duplicates():
+    items = [
+        _item("Markets", ARTICLE, "https://a"),
+        _item("Syndicated copy", ARTICLE, "https://b"),
+        _item("Local news", "Weather was mild over the weekend. The parade went ahead as planned.", "https://c"),
+    ]
+    pack = build_context(items, ["Bitcoin", "halving"], budget_tokens=10_000, chunk_tokens=40)
+    assert pack.duplicates >= 2
+    assert "https://b" not in pack.text  # Every passage of the copy was a duplicate
+    assert pack.text.startswith("Source: Markets\nURL: https://a\n")
+
+    tight = build_context(items, ["Bitcoin", "halving"], budget_tokens=60, chunk_tokens=40)
+    assert tight.tokens <= 60 and tight.chunks_used >= 1
+    assert "halving" in tight.text and "parking" not in tight.text
+
+def test_token_fallback_without_tokenizer(monkeypatch):
+    monkeypatch.setattr(context, "_encoding", lambda: None)
+    assert count_tokens("x" * 40) == 10
+    assert build_context([], ["btc"]).chunks_total == 0
@@ -0,0 +1,106 @@
+import zlib
+import numpy as np
+import pytest
+from app.tools.polymarket import embedding_index, gamma_client
+from app.tools.polymarket.embedding_index import VectorIndex, embed_texts
+from app.tools.polymarket.market_index import MarketIndex
+from app.utils.cache import PersistentKV
+
+DIM = 64
+
+def bag_of_words(text):
+    vec = np.zeros(DIM, dtype=np.float32)
+    for word in text.lower().replace("|", " ").split():
+        vec[zlib.crc32(word.encode()) % DIM] += 1.0
+    return vec.tolist()
+
+@pytest.fixture
+def embed_calls(monkeypatch, tmp_path):
+    calls = []
+
+    async def fake_embed(texts):
+        calls.append(list(texts))
+        return [bag_of_words(t) for t in texts]
+
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    monkeypatch.setattr(embedding_index, "_embed_uncached", fake_embed)
+    monkeypatch.setattr(embedding_index, "_embedding_store", PersistentKV("emb", path=str(tmp_path / "emb.sqlite3")))
+    monkeypatch.setattr(embedding_index, "EMBEDDING_INDEX_DIR", str(tmp_path / "indexes"))
+    monkeypatch.setattr(embedding_index, "_loaded", {})
+    return calls
+
+def test_search_returns_cosine_top_k():
+    index = VectorIndex.build(["x", "y", "xy"], np.array([[1, 0], [0, 1], [1, 1]]))
+    hits = index.search(np.array([[1.0, 0.0], [0.0, 1.0]]), k=2)
+    assert [label for label, _ in hits[0]] == ["x", "xy"]
+    assert [label for label, _ in hits[1]] == ["y", "xy"]
+    assert hits[0][0][1] == pytest.approx(1.0)
+    assert index.search(np.array([1.0, 0.0]), k=3, min_score=0.9) == [[("x", pytest.approx(1.0))]]
+
+def test_save_and_load_memory_maps(tmp_path):
+    VectorIndex.build(["a", "b"], np.eye(2), meta={"model": "m"}).save("t", str(tmp_path))
+    loaded = VectorIndex.load("t", str(tmp_path))
+    assert isinstance(loaded.matrix, np.memmap)
+    assert loaded.labels == ["a", "b"] and loaded.meta == {"model": "m"}
+    assert VectorIndex.load("missing", str(tmp_path)) is None
+
+async def test_embeddings_are_cached_on_disk(embed_calls):
+    first = await embed_texts(["bitcoin price", "bitcoin price", "nba finals"])
+    second = await embed_texts(["nba finals"])
+    assert embed_calls == [["bitcoin price", "nba finals"]]
+    assert np.allclose(first[2], second[0])
+    assert np.allclose(np.linalg.norm(first, axis=1), 1.0)
+    assert embedding_index.embedding_cache_stats()["hits"] == 1
+
+async def test_tag_routing_uses_index_for_current_tag_table(embed_calls, monkeypatch):
+    monkeypatch.setattr(gamma_client, "KNOWN_TAGS", {"nba": "745", "bitcoin": "235"})
+    llm_queries = []
+
+    async def fake_llm(query, tags):
+        llm_queries.append(query)
+        return None
+
+    monkeypatch.setattr(gamma_client, "resolve_semantic_tag", fake_llm)
+
+    # No index yet -> LLM router
+    assert await gamma_client.resolve_tag_key("Bitcoin ETF") is None
+    assert llm_queries == ["Bitcoin ETF"]
+
+    labels = ["nba", "bitcoin"]
+    VectorIndex.build(labels, await embed_texts(labels), meta={
+        "model": embedding_index.EMBEDDING_MODEL,
+        "fingerprint": gamma_client.tags_fingerprint(labels),
+    }).save(embedding_index.TAG_INDEX, embedding_index.EMBEDDING_INDEX_DIR)
+    assert await gamma_client.resolve_tag_key("Bitcoin ETF") == "bitcoin"
+    assert llm_queries == ["Bitcoin ETF"]
+
+    # Tag table changed since the build -> index ignored
+    monkeypatch.setattr(gamma_client, "KNOWN_TAGS", {"nba": "745", "bitcoin": "235", "nfl": "450"})
+    await gamma_client.resolve_tag_key("Bitcoin ETF")
+    assert len(llm_queries) == 2
+
+async def test_semantic_market_ids_and_ranking(embed_calls):
+    markets = [
+        {"id": "1", "question": "Will bitcoin hit 100k", "event_title": "Crypto"},
+        {"id": "2", "question": "Will the Lakers win the NBA finals", "event_title": "NBA"},
+    ]
+    universe = MarketIndex(markets)
+    VectorIndex.build(["1", "2"], await embed_texts([embedding_index.market_text(m) for m in markets]),
+                      meta={"model": embedding_index.EMBEDDING_MODEL}).save(embedding_index.MARKET_INDEX, embedding_index.EMBEDDING_INDEX_DIR)
+
+    ids = await embedding_index.semantic_market_ids(["nba finals", "bitcoin"], k=1, min_score=0.2)
+    assert ids == ["2", "1"]
+    assert universe.get(ids[0])["question"].startswith("Will the Lakers")
+
+    calls_before = len(embed_calls)
+    extra = {"id": "3", "question": "Will bitcoin ETF flows turn negative", "event_title": "Crypto"}
+    ranked = await embedding_index.rank_markets("bitcoin", [extra, markets[1], markets[0]])
+    # Indexed markets are ranked by their stored rows; the unindexed one follows, unembedded
+    assert [m["id"] for _, m in ranked] == ["1", "2", "3"]
+    assert embed_calls[calls_before:] == []  # "bitcoin" was already cached
+
+async def test_ranking_without_index_keeps_order_and_embeds_nothing(embed_calls):
+    markets = [{"id": str(i), "question": f"Question {i}", "event_title": "E"} for i in range(5)]
+    ranked = await embedding_index.rank_markets("bitcoin", markets)
+    assert [m["id"] for _, m in ranked] == ["0", "1", "2", "3", "4"]
+    assert embed_calls == []
@@ -0,0 +1,98 @@
+import httpx
+import pytest
+from app.tools.news import extract
+from app.utils.cache import PersistentKV
+
+ARTICLE_HTML = "<html><body><nav>menu</nav><p>" + "Central banks signalled a pause in rate hikes this quarter. " * 3 + "</p></body></html>"
+
+def test_normalize_url():
+    a = extract.normalize_url("HTTPS://News.Example.com:443/story/?b=2&utm_source=x&a=1#top")
+    b = extract.normalize_url("https://news.example.com/story?a=1&b=2&fbclid=abc")
+    assert a == b == "https://news.example.com/story?a=1&b=2"
+
+@pytest.fixture
+def article_server(monkeypatch, tmp_path):
+    calls = []
+
+    def handler(request: httpx.Request):
+        calls.append(request)
+        if request.headers.get("if-none-match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, text=ARTICLE_HTML, headers={"ETag": '"v1"', "Content-Type": "text/html"})
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(extract, "get_web_client", lambda: client)
+    monkeypatch.setattr(extract, "_article_cache", PersistentKV("articles", ttl_s=3600, path=str(tmp_path / "a.sqlite3")))
+    return calls
+
+async def test_repeat_url_served_from_cache(article_server):
+    first = await extract.extract_article_content("https://news.example.com/story?utm_source=feed")
+    second = await extract.extract_article_content("https://news.example.com/story")
+    assert first == second and "Central banks" in first
+    assert len(article_server) == 1
+    assert extract.article_cache_stats()["hits"] == 1
+
+async def test_stale_entry_revalidated_with_etag(article_server, monkeypatch):
+    extract._article_cache.ttl_s = 0.0
+    first = await extract.extract_article_content("https://news.example.com/story")
+    second = await extract.extract_article_content("https://news.example.com/story")
+    assert second == first
+    assert article_server[1].headers["if-none-match"] == '"v1"'
+    assert extract.article_cache_stats()["revalidated"] == 1
+
+def streamed_response(chunks, content_type="text/html; charset=utf-8", served=None):
+    async def body():
+        for chunk in chunks:
+            if served is not None:
+                served.append(len(chunk))
+            yield chunk
+    return httpx.Response(200, content=body(), headers={"Content-Type": content_type})
+
+@pytest.fixture
+def serve(monkeypatch, tmp_path):
+    def install(handler):
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        monkeypatch.setattr(extract, "get_web_client", lambda: client)
+    monkeypatch.setattr(extract, "_article_cache", PersistentKV("articles", path=str(tmp_path / "a.sqlite3")))
+    return install
+
+async def test_non_html_rejected_before_body_is_read(serve):
+    served = []
+    serve(lambda request: streamed_response([b"%PDF-1.7 ..."] * 100, content_type="application/pdf", served=served))
+    assert await extract.extract_article_content("https://news.example.com/report.pdf") is None
+    assert served == []
+
+async def test_body_read_stops_at_byte_cap(serve, monkeypatch):
+    monkeypatch.setattr(extract, "ARTICLE_MAX_BYTES", 64 * 1024)
+    served = []
+    filler = b"<div>" + b"x" * 16 * 1024 + b"</div>"
+    serve(lambda request: streamed_response([b"<html><body>"] + [filler] * 1000, served=served))
+    assert await extract.extract_article_content("https://news.example.com/huge") == ""
+    assert sum(served) < 128 * 1024
+
+async def test_body_read_stops_once_enough_text(serve):
+    served = []
+    para = ("<p>" + "Markets rallied on upbeat earnings and cooling inflation data. " * 4 + "</p>").encode()
+    serve(lambda request: streamed_response([para] * 500, served=served))
+    text = await extract.extract_article_content("https://news.example.com/long")
+    assert len(text) == 5000
+    assert len(served) < 50
+
+async def test_multibyte_chars_split_across_chunks(serve):
+    html = ("<p>" + "Zürich café naïve résumé — déjà vu in the markets today. " * 2 + "</p>").encode("utf-8")
+    chunks = [html[i:i + 7] for i in range(0, len(html), 7)]
+    serve(lambda request: streamed_response(chunks))
+    text = await extract.extract_article_content("https://news.example.com/utf8")
+    assert "Zürich café naïve résumé — déjà vu" in text
+    assert "\ufffd" not in text
+
+async def test_streamed_extraction_falls_back_when_lxml_fails(serve, monkeypatch):
+    from app.tools.news.html_text import LxmlExtractor
+
+    def broken(self, chunk):
+        raise ValueError("parser exploded")
+
+    monkeypatch.setattr(LxmlExtractor, "feed", broken)
+    serve(lambda request: streamed_response([ARTICLE_HTML[:50].encode(), ARTICLE_HTML[50:].encode()]))
+    text = await extract.extract_article_content("https://news.example.com/story")
+    assert text.startswith("Central banks") and "menu" not in text
@@ -0,0 +1,78 @@
+import asyncio
+import glob
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from app.tools.news import html_text
+from app.tools.news.html_text import FallbackExtractor, LxmlExtractor, extract_text
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "html")
+
+def load(name):
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        return f.read()
+
+@pytest.mark.parametrize("name", ["news_article.html", "wiki_page.html"])
+def test_backends_agree_on_well_formed_pages(name):
+    html = load(name)
+    assert extract_text(html, backend="lxml") == extract_text(html, backend="bs4")
+
+def test_boilerplate_and_short_paragraphs_dropped():
+    text = extract_text(load("news_article.html"), backend="lxml")
+    assert text.startswith("The Federal Reserve left")
+    assert "Subscribe" not in text and "Copyright" not in text and "loadAd" not in text
+    assert "Short." not in text
+    assert "greater confidence" in text
+
+def test_unclosed_paragraphs_are_not_duplicated():
+    text = extract_text(load("unclosed_tags.html"), backend="lxml")
+    assert text.count("Ether lagged") == 1
+    assert "inside a script" not in text
+    assert len(text.split("\n\n")) == 3
+
+def test_chunked_feed_matches_whole_document():
+    html = load("wiki_page.html")
+    extractor = LxmlExtractor()
+    for i in range(0, len(html), 64):
+        extractor.feed(html[i:i + 64])
+    assert extractor.close() == extract_text(html, backend="lxml")
+
+def test_streaming_stops_at_max_chars():
+    para = "<p>" + "word " * 30 + "</p>"
+    extractor = LxmlExtractor(max_chars=500)
+    fed = 0
+    while not extractor.done and fed < 1000:
+        extractor.feed(para)
+        fed += 1
+    assert extractor.done and fed < 10
+    assert len(extractor.close()) == 500
+
+@pytest.mark.parametrize("stage", ["feed", "close"])
+def test_lxml_failure_falls_back_to_bs4(stage, monkeypatch):
+    def broken(self, *args):
+        raise ValueError("parser exploded")
+
+    monkeypatch.setattr(LxmlExtractor, stage, broken)
+    html = load("wiki_page.html")
+    extractor = FallbackExtractor("lxml")
+    for i in range(0, len(html), 256):
+        extractor.feed(html[i:i + 256])
+    assert extractor.close() == extract_text(html, backend="bs4")
+
+async def test_extractors_are_spread_over_the_parse_lanes(monkeypatch):
+    threads = {}
+
+    def record(self, chunk):
+        threads.setdefault(id(self), set()).add(threading.current_thread().name)
+
+    lanes = [ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"test-lane-{i}") for i in range(3)]
+    monkeypatch.setattr(html_text, "_parse_lanes", lanes)
+    monkeypatch.setattr(FallbackExtractor, "feed", record)
+    extractors = [FallbackExtractor() for _ in range(7)]
+    for _ in range(3):
+        await asyncio.gather(*(html_text.feed_async(e, "<p>x</p>") for e in extractors))
+    assert all(len(names) == 1 for names in threads.values())  # each extractor stays on its lane
+    assert set().union(*threads.values()) == {f"test-lane-{i}_0" for i in range(3)}
+    for lane in lanes:
+        lane.shutdown()
@@ -0,0 +1,28 @@
+import pytest
+from app.utils import http
+from app.utils.http import get_http_client, get_web_client, close_http_clients
+
+async def test_client_is_shared_per_host():
+    a = get_http_client("https://gamma.example")
+    b = get_http_client("https://gamma.example")
+    c = get_http_client("https://clob.example")
+    assert a is b
+    assert a is not c
+    assert str(a.base_url).startswith("https://gamma.example")
+    await close_http_clients()
+
+async def test_closed_client_is_recreated():
+    a = get_http_client("https://gamma.example")
+    await close_http_clients()
+    assert a.is_closed
+    b = get_http_client("https://gamma.example")
+    assert b is not a and not b.is_closed
+    await close_http_clients()
+
+async def test_web_client_is_separate_and_sized_for_many_hosts():
+    web = get_web_client()
+    assert web is get_web_client()
+    assert web is not get_http_client("")
+    assert web._transport._pool._max_connections == http.HTTP_WEB_MAX_CONNECTIONS
+    await close_http_clients()
+    assert web.is_closed
@@ -0,0 +1,160 @@
+import asyncio
+import json
+import time
+import pytest
+from app.services import job_worker
+from app.services.job_queue import DONE, FAILED, QUEUED, RUNNING, MemoryJobQueue, SQLiteJobQueue
+from app.services.job_worker import JobWorker
+
+@pytest.fixture(params=["sqlite", "memory"])
+def queue(request, tmp_path):
+    if request.param == "sqlite":
+        return SQLiteJobQueue(str(tmp_path / "jobs.sqlite3"), lease_s=30, max_attempts=2)
+    return MemoryJobQueue(lease_s=30, max_attempts=2)
+
+def test_enqueue_claim_and_finish(queue):
+    job, created = queue.enqueue("rebalance", {"topic": "btc"}, dedupe_key="k")
+    same, created_again = queue.enqueue("rebalance", {"topic": "btc"}, dedupe_key="k")
+    assert created and not created_again and same.id == job.id
+    assert queue.get(job.id).status == QUEUED and queue.get(job.id).payload == {"topic": "btc"}
+
+    assert queue.claim("w1", kinds=["other"]) is None
+    claimed = queue.claim("w1")
+    assert claimed.id == job.id and claimed.status == RUNNING and claimed.attempts == 1
+    assert queue.claim("w2") is None  # Leased
+
+    assert queue.heartbeat(job.id, "w1") and not queue.heartbeat(job.id, "w2")
+    assert not queue.finish(job.id, "w2", DONE)
+    assert queue.finish(job.id, "w1", DONE)
+    assert queue.get(job.id).status == DONE
+    # Finished jobs no longer absorb identical requests
+    assert queue.enqueue("rebalance", {"topic": "btc"}, dedupe_key="k")[1]
+
+def test_expired_leases_are_reclaimed_then_failed(queue):
+    queue.lease_s = -1  # Every lease is already expired
+    job, _ = queue.enqueue("rebalance", {})
+    assert queue.claim("w1").attempts == 1
+    reclaimed = queue.claim("w2")
+    assert reclaimed.id == job.id and reclaimed.worker == "w2" and reclaimed.attempts == 2
+    assert not queue.finish(job.id, "w1", DONE)  # The first worker lost it
+    assert queue.claim("w3") is None
+    assert queue.get(job.id).status == FAILED
+
+def test_events_resume_after_cursor_and_purge(queue):
+    job, _ = queue.enqueue("rebalance", {})
+    assert queue.append_events(job.id, [{"n": 1}, {"n": 2}]) == 2
+    assert queue.append_events(job.id, [{"n": 3}]) == 3
+    assert queue.events(job.id) == [(1, {"n": 1}), (2, {"n": 2}), (3, {"n": 3})]
+    assert queue.events(job.id, after=2) == [(3, {"n": 3})]
+
+    queue.claim("w1")
+    queue.finish(job.id, "w1", DONE)
+    assert queue.purge(older_than_s=3600) == 0
+    assert queue.purge(older_than_s=-1) == 1
+    assert queue.get(job.id) is None and queue.events(job.id) == []
+
+@pytest.fixture
+def handlers(monkeypatch):
+    registry = {}
+    monkeypatch.setattr(job_worker, "JOB_HANDLERS", registry)
+    return registry
+
+async def test_worker_runs_jobs_and_records_events(queue, handlers):
+    async def echo(payload, publish):
+        publish({"type": "log", "content": payload["topic"]})
+        await asyncio.sleep(0.03)
+        publish({"type": "result", "payload": payload})
+
+    async def broken(payload, publish):
+        raise RuntimeError("no markets")
+
+    handlers.update(echo=echo, broken=broken)
+    ok, _ = queue.enqueue("echo", {"topic": "btc"})
+    bad, _ = queue.enqueue("broken", {})
+
+    stop = asyncio.Event()
+    worker = JobWorker(queue, concurrency=2, poll_s=0.01, flush_s=0.01, worker_id="w1")
+    runner = asyncio.create_task(worker.run(stop))
+    for _ in range(200):
+        if all(queue.get(j.id).status in (DONE, FAILED) for j in (ok, bad)):
+            break
+        await asyncio.sleep(0.01)
+    stop.set()
+    await runner
+
+    assert queue.get(ok.id).status == DONE
+    assert [e for _, e in queue.events(ok.id)] == [{"type": "log", "content": "btc"}, {"type": "result", "payload": {"topic": "btc"}}]
+    assert queue.get(bad.id).status == FAILED and queue.get(bad.id).error == "no markets"
+    assert [e for _, e in queue.events(bad.id)] == [{"type": "error", "message": "no markets"}]
+
+async def test_worker_abandons_job_when_lease_is_lost(handlers, monkeypatch):
+    from app.services import rebalance_runs
+
+    queue = MemoryJobQueue(lease_s=0.03)
+    started = asyncio.Event()
+    api_calls = []
+
+    class BusyGraph:
+        async def ainvoke(self, state):
+            started.set()
+            while True:  # Keeps calling APIs until cancelled
+                api_calls.append(time.monotonic())
+                await asyncio.sleep(0.005)
+
+    async def no_portfolio(req):
+        return None
+
+    monkeypatch.setattr(rebalance_runs, "supervisor_graph", BusyGraph())
+    monkeypatch.setattr(rebalance_runs, "build_portfolio", no_portfolio)
+    handlers["rebalance"] = rebalance_runs.rebalance_job
+    job, _ = queue.enqueue("rebalance", {"topic": "btc"})
+    claimed = queue.claim("w1")
+    task = asyncio.create_task(JobWorker(queue, worker_id="w1").run_job(claimed))
+    await started.wait()
+    # The first worker stalls past its lease (simulated) and another worker takes the job over
+    queue._jobs[job.id] = queue._jobs[job.id]._replace(lease_until=0.0)
+    assert queue.claim("w2").worker == "w2"
+    assert await asyncio.wait_for(task, 1) == "abandoned"
+    assert queue.get(job.id).worker == "w2"
+    # The abandoned graph stopped with its handler instead of running on in the background
+    calls = len(api_calls)
+    await asyncio.sleep(0.05)
+    assert len(api_calls) == calls
+
+async def test_job_routes_stream_with_resumable_cursor(monkeypatch, handlers):
+    from app.api.routes import rebalance
+    from app.schemas.portfolio import RebalanceRequest
+    queue = MemoryJobQueue()
+    monkeypatch.setattr(rebalance, "job_queue", queue)
+    monkeypatch.setattr(rebalance, "JOB_EVENT_POLL_S", 0.01)
+
+    async def fake_rebalance(payload, publish):
+        for i in range(3):
+            publish({"type": "log", "content": i})
+            await asyncio.sleep(0.01)
+        publish({"type": "result", "payload": {"topic": payload["topic"]}})
+
+    handlers["rebalance"] = fake_rebalance
+    first = await rebalance.enqueue_rebalance(RebalanceRequest(topic="Fed Rates", user_id="a"))
+    second = await rebalance.enqueue_rebalance(RebalanceRequest(topic="fed  rates", user_id="b"))
+    assert second["job_id"] == first["job_id"] and second["coalesced"] and not first["coalesced"]
+    assert (await rebalance.get_rebalance_job(first["job_id"]))["status"] == QUEUED
+
+    stop = asyncio.Event()
+    runner = asyncio.create_task(JobWorker(queue, poll_s=0.01, flush_s=0.01).run(stop))
+    response = await rebalance.stream_rebalance_job(first["job_id"], last_event_id=None)
+    frames = [chunk async for chunk in response.body_iterator]
+    stop.set()
+    await runner
+
+    assert frames[0] == 'id: 1\ndata: {"type": "log", "content": 0}\n\n'
+    assert json.loads(frames[-2].split("data: ")[1]) == {"type": "result", "payload": {"topic": "Fed Rates"}}
+    assert json.loads(frames[-1].split("data: ")[1]) == {"type": "done", "status": DONE}
+
+    # Reconnecting with Last-Event-ID only replays what came after it
+    response = await rebalance.stream_rebalance_job(first["job_id"], last_event_id="3")
+    resumed = [chunk async for chunk in response.body_iterator]
+    assert resumed[0].startswith("id: 4\n") and len(resumed) == 2
+
+    with pytest.raises(Exception):
+        await rebalance.stream_rebalance_job("missing", last_event_id=None)
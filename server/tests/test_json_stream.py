@@ -0,0 +1,37 @@
+import json
+import pytest
+from app.utils.json_stream import JsonFieldStream
+
+DOC = {
+    "summary": 'Rates "up"\nnext — é 😀',
+    "nested": {"summary": "ignored", "list": ["thesis_discourse"]},
+    "n": 3,
+    "thesis_discourse": "Long\\ text\twith tabs",
+    "risk_flags": ["a", "b"],
+}
+
+@pytest.mark.parametrize("step", [1, 2, 5, 64])
+def test_fields_decode_across_any_split(step):
+    raw = "```json\n" + json.dumps(DOC) + "\n```"
+    stream = JsonFieldStream(["summary", "thesis_discourse"])
+    acc = {}
+    for i in range(0, len(raw), step):
+        for field, text in stream.feed(raw[i:i + step]):
+            acc[field] = acc.get(field, "") + text
+    assert acc == {"summary": DOC["summary"], "thesis_discourse": DOC["thesis_discourse"]}
+
+def test_text_is_emitted_before_the_string_closes():
+    stream = JsonFieldStream(["summary"])
+    assert stream.feed('{"summary": "Bitcoin ') == [("summary", "Bitcoin ")]
+    assert stream.feed("rallied") == [("summary", "rallied")]
+    assert stream.feed('", "other": "x"}') == []
+
+@pytest.mark.parametrize("step", [1, 3, 64])
+def test_malformed_unicode_escapes_are_kept_raw(step):
+    raw = '{"summary": "bad \\uZZ12 and \\u12", "other": "x"}'
+    stream = JsonFieldStream(["summary", "other"])
+    acc = {}
+    for i in range(0, len(raw), step):
+        for field, text in stream.feed(raw[i:i + step]):
+            acc[field] = acc.get(field, "") + text
+    assert acc == {"summary": "bad \\uZZ12 and \\u12", "other": "x"}
@@ -0,0 +1,92 @@
+import time
+import pytest
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage, SystemMessage
+from app.services import llm_gateway
+from app.utils.cache import PersistentKV
+from app.utils.limits import RateLimit
+
+class FakeChat:
+    calls = 0
+
+    def __init__(self, reply):
+        self.reply = reply
+
+    async def ainvoke(self, messages):
+        FakeChat.calls += 1
+        return AIMessage(content=self.reply, usage_metadata={"input_tokens": 90, "output_tokens": 30, "total_tokens": 120})
+
+@pytest.fixture
+def gateway(tmp_path, monkeypatch):
+    replies = {"reply": '{"ok": true}'}
+    FakeChat.calls = 0
+    monkeypatch.setattr(llm_gateway, "_llm_store", PersistentKV("llm_test", path=str(tmp_path / "llm.sqlite3")))
+    monkeypatch.setattr(llm_gateway, "_site_stats", {})
+    monkeypatch.setattr(llm_gateway, "_chat_model", lambda model, temperature, **params: FakeChat(replies["reply"]))
+    return replies
+
+MESSAGES = [SystemMessage(content="You are terse."), HumanMessage(content="Summarize bitcoin news.")]
+
+async def test_deterministic_calls_are_cached(gateway):
+    first = await llm_gateway.complete("site", MESSAGES)
+    second = await llm_gateway.complete("site", MESSAGES)
+    assert first == second == '{"ok": true}'
+    assert FakeChat.calls == 1
+    stats = llm_gateway.metrics()["sites"]["site"]
+    assert (stats["hits"], stats["misses"], stats["hit_rate"]) == (1, 1, 0.5)
+    assert stats["tokens_spent"] == 120 and stats["tokens_saved"] == 120
+
+async def test_key_covers_model_temperature_params_and_prompt():
+    base = llm_gateway.cache_key("gpt-4o", 0, MESSAGES)
+    assert base == llm_gateway.cache_key("gpt-4o", 0.0, [{"role": "system", "content": "You are terse."},
+                                                          {"role": "user", "content": "Summarize bitcoin news."}])
+    assert base != llm_gateway.cache_key("gpt-4o-mini", 0, MESSAGES)
+    assert base != llm_gateway.cache_key("gpt-4o", 0, MESSAGES, max_tokens=10)
+    assert base != llm_gateway.cache_key("gpt-4o", 0, MESSAGES[:1])
+
+async def test_sampled_calls_are_not_cached(gateway):
+    await llm_gateway.complete("enrich", MESSAGES, temperature=0.7)
+    await llm_gateway.complete("enrich", MESSAGES, temperature=0.7)
+    assert FakeChat.calls == 2
+    assert llm_gateway.metrics()["sites"]["enrich"]["uncached"] == 2
+
+async def test_cache_if_vetoes_bad_responses(gateway):
+    gateway["reply"] = "Sorry, I cannot answer in JSON."
+    await llm_gateway.complete("research", MESSAGES, cache_if=llm_gateway.is_json_object)
+    gateway["reply"] = '```json\n{"summary": "ok"}\n```'
+    assert await llm_gateway.complete("research", MESSAGES, cache_if=llm_gateway.is_json_object) == gateway["reply"]
+    assert await llm_gateway.complete("research", MESSAGES, cache_if=llm_gateway.is_json_object) == gateway["reply"]
+    assert FakeChat.calls == 2
+    assert llm_gateway.metrics()["sites"]["research"]["rejected"] == 1
+
+class StreamingChat(FakeChat):
+    async def astream(self, messages, **kwargs):
+        FakeChat.calls += 1
+        for i in range(0, len(self.reply), 4):
+            yield AIMessageChunk(content=self.reply[i:i + 4])
+
+async def test_streamed_completion_forwards_deltas_and_caches(gateway, monkeypatch):
+    monkeypatch.setattr(llm_gateway, "_chat_model", lambda model, temperature, **params: StreamingChat(gateway["reply"]))
+    gateway["reply"] = '{"summary": "Rates are rising fast."}'
+    deltas = []
+    content = await llm_gateway.complete("research", MESSAGES, on_token=deltas.append)
+    assert content == gateway["reply"] and len(deltas) > 1 and "".join(deltas) == content
+    # A cache hit replays the whole answer as a single delta
+    replay = []
+    assert await llm_gateway.complete("research", MESSAGES, on_token=replay.append) == content
+    assert replay == [content] and FakeChat.calls == 1
+
+async def test_rate_limit_charges_model_calls_only(gateway):
+    limit = RateLimit(requests_per_min=600, tokens_per_min=6000)
+    await llm_gateway.complete("site", MESSAGES, rate_limit=limit)
+    await llm_gateway.complete("site", MESSAGES, rate_limit=limit)  # cache hit
+    assert limit.stats["acquired"] == 1
+    # The estimate (prompt + 500 completion) was settled to the 120 tokens reported
+    assert limit._tokens._level == pytest.approx(6000 - 120, abs=5)
+
+async def test_rate_limit_spaces_calls_past_the_budget():
+    limit = RateLimit(tokens_per_min=6000)  # 100 tokens/s
+    start = time.monotonic()
+    await limit.acquire(6000)
+    await limit.acquire(15)
+    assert 0.1 <= time.monotonic() - start < 1.0
+    assert limit.stats["waited_s"] == pytest.approx(0.15, abs=0.02)
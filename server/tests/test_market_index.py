@@ -0,0 +1,71 @@
+from app.tools.polymarket.market_index import FIELD_WEIGHTS, MarketIndex, tokenize
+
+EVENTS = [
+    {
+        "slug": "nba-finals",
+        "title": "NBA Finals Winner",
+        "tags": [{"label": "Sports"}, {"label": "NBA"}],
+        "markets": [
+            {"id": "1", "question": "Will the Raptors win the NBA Finals?", "outcomes": '["Yes", "No"]', "volume": "500"},
+            {"id": "2", "question": "Will the Lakers win the NBA Finals?", "outcomes": '["Yes", "No"]', "volume": "900"},
+        ],
+    },
+    {
+        "slug": "us-elections",
+        "title": "US Elections",
+        "tags": [{"label": "Politics"}],
+        "markets": [
+            {"id": "3", "question": "Who wins the presidency?", "outcomes": '["Trump", "Harris"]', "volume": "100"},
+        ],
+    },
+]
+
+def test_tokenize():
+    assert tokenize("Will the 76ers win?") == ["will", "the", "76ers", "win"]
+
+def test_search_matches_all_fields():
+    index = MarketIndex.from_events(EVENTS)
+    assert [m["id"] for m in index.search(["raptors"])] == ["1"]
+    # Outcomes and tag labels are indexed too
+    assert [m["id"] for m in index.search(["Trump"])] == ["3"]
+    assert {m["id"] for m in index.search(["sports"])} == {"1", "2"}
+
+def test_search_ranks_by_score_then_volume():
+    index = MarketIndex.from_events(EVENTS)
+    ids = [m["id"] for m in index.search(["NBA", "Raptors"])]
+    # Raptors matches two keywords; Lakers only one
+    assert ids == ["1", "2"]
+    assert [m["id"] for m in index.search(["NBA"])] == ["2", "1"]
+
+def test_multi_word_keywords_and_prefixes():
+    index = MarketIndex.from_events(EVENTS)
+    assert [m["id"] for m in index.search(["nba finals"])] == ["2", "1"]
+    assert index.search(["raptors lakers"]) == []
+    # "election" matches "elections" by prefix
+    assert [m["id"] for m in index.search(["election"])] == ["3"]
+    # Short tokens do not prefix-match, so "ai" does not hit unrelated words
+    assert index.search(["ai"]) == []
+
+def test_events_are_not_mutated():
+    index = MarketIndex.from_events(EVENTS)
+    hit = index.search(["raptors"])[0]
+    hit["spread"] = 0.5
+    assert "event_slug" not in EVENTS[0]["markets"][0]
+    assert "spread" not in index.get("1")
+
+def test_lookup_on_large_universe():
+    events = [
+        {"slug": f"e{i}", "title": f"Event {i}", "tags": [{"label": "Misc"}],
+         "markets": [{"id": str(i), "question": f"Will token{i} happen by 2026?", "outcomes": '["Yes", "No"]'}]}
+        for i in range(5000)
+    ]
+    events[42]["markets"][0]["question"] = "Will Bitcoin hit 100k?"
+    events[43]["title"] = "Bitcoin price"
+    index = MarketIndex.from_events(events)
+    scored = index.search_scored(["bitcoin", "ethereum"])
+    # A question hit outweighs an event-title hit
+    assert [m["id"] for _, m in scored] == ["42", "43"]
+    assert scored[0][0] == FIELD_WEIGHTS["question"] and scored[1][0] == FIELD_WEIGHTS["event_title"]
+    # Every token of a keyword must match (AND), prefixes included
+    assert [m["id"] for m in index.search(["bitco 100k"])] == ["42"]
+    assert index.search(["bitcoin ethereum"]) == []
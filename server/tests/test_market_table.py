@@ -0,0 +1,98 @@
+import random
+from datetime import datetime, timedelta, timezone
+import numpy as np
+import pytest
+from app.schemas.portfolio import RiskLimits
+from app.tools.risk import constraints
+from app.tools.risk.constraints import filter_indices, filter_markets
+from app.tools.polymarket.market_index import MarketIndex
+from app.tools.risk.market_table import MarketTable
+
+def legacy_filter(markets, limits):
+    """The per-dict loop filter_markets used before the columnar table."""
+    valid = []
+    for m in markets:
+        liq = float(m.get("liquidity", 0)) if m.get("liquidity") else 0
+        if liq < limits.min_liquidity_usd:
+            continue
+        vol = float(m.get("volume", 0)) if m.get("volume") else 0
+        if vol < limits.min_volume_usd:
+            continue
+        spread = float(m["spread"]) if m.get("spread") is not None else 0.01
+        if spread > limits.max_spread_pct:
+            continue
+        if "top_depth_usd" in m and m["top_depth_usd"] < limits.min_top_depth_usd:
+            continue
+        if limits.max_slippage_pct is not None and "slippage_pct" in m:
+            if m["slippage_pct"] is None or m["slippage_pct"] > limits.max_slippage_pct:
+                continue
+        valid.append(m)
+    return valid
+
+def random_market(rng, i):
+    m = {"id": str(i), "liquidity": str(rng.uniform(0, 5000)) if rng.random() > 0.1 else None,
+         "volume": rng.uniform(0, 20000), "outcomePrices": '["0.4", "0.6"]'}
+    if rng.random() > 0.3:
+        m["spread"] = rng.choice([0.001, 0.01, 0.02, 0.08])
+    if rng.random() > 0.5:
+        m["top_depth_usd"] = rng.uniform(0, 500)
+        m["slippage_pct"] = rng.choice([None, 0.001, 0.02, 0.1])
+    return m
+
+def test_matches_legacy_loop():
+    rng = random.Random(7)
+    markets = [random_market(rng, i) for i in range(500)]
+    limits = RiskLimits(max_position_pct=0.2, min_liquidity_usd=1000, min_volume_usd=500,
+                        max_spread_pct=0.02, min_top_depth_usd=100, max_slippage_pct=0.05)
+    assert filter_markets(markets, limits) == legacy_filter(markets, limits)
+
+def test_select_returns_original_dicts():
+    markets = [{"id": "1", "liquidity": 5000}, {"id": "2", "liquidity": 10}]
+    table = MarketTable(markets)
+    idx = filter_indices(table, RiskLimits(max_position_pct=0.2, min_liquidity_usd=1000, max_spread_pct=0.05))
+    assert idx.tolist() == [0]
+    assert table.select(idx)[0] is markets[0]
+    assert table["yes_price"][0] != table["yes_price"][0]  # no outcomePrices -> NaN
+
+def test_resolution_window_predicate():
+    soon = (datetime.now(timezone.utc) + timedelta(days=3)).isoformat()
+    later = (datetime.now(timezone.utc) + timedelta(days=300)).isoformat().replace("+00:00", "Z")
+    markets = [{"id": "soon", "liquidity": 1, "endDate": soon},
+               {"id": "later", "liquidity": 1, "endDate": later},
+               {"id": "unknown", "liquidity": 1}]
+    limits = RiskLimits(max_position_pct=0.2, min_liquidity_usd=0, max_spread_pct=0.05, max_days_to_resolution=30)
+    assert [m["id"] for m in filter_markets(markets, limits)] == ["soon", "unknown"]
+
+def test_custom_predicates_can_be_registered(monkeypatch):
+    monkeypatch.setattr(constraints, "RISK_PREDICATES", dict(constraints.RISK_PREDICATES))
+
+    @constraints.risk_predicate("max_position_pct")
+    def _cheap_only(table, limit):
+        return table["yes_price"] <= limit
+
+    markets = [{"id": "1", "outcomePrices": '["0.1", "0.9"]'}, {"id": "2", "outcomePrices": ["0.7", "0.3"]}]
+    limits = RiskLimits(max_position_pct=0.2, min_liquidity_usd=0, max_spread_pct=0.05)
+    assert [m["id"] for m in filter_markets(markets, limits)] == ["1"]
+
+def test_sliced_index_table_matches_a_fresh_decode():
+    rng = random.Random(11)
+    markets = [{**random_market(rng, i), "question": f"Market {i} {'fed' if i % 3 else 'btc'}"} for i in range(200)]
+    index = MarketIndex(markets)
+    rows = index.search_indices(["fed"])
+    extra = MarketTable([random_market(rng, 1000)])
+    table = MarketTable.concat([index.table.take(rows), extra]).head(150)
+    fresh = MarketTable(table.markets)
+    assert table.markets == ([index.markets[r] for r in rows] + extra.markets)[:150]
+    assert table.markets[0] is not index.markets[rows[0]]  # annotating the slice leaves the universe alone
+    for name in table.cols.dtype.names:
+        np.testing.assert_array_equal(table[name], fresh[name])
+    limits = RiskLimits(max_position_pct=0.2, min_liquidity_usd=1000, max_spread_pct=0.02, min_top_depth_usd=100,
+                        max_slippage_pct=0.05)
+    assert filter_markets(table, limits) == legacy_filter(table.markets, limits)
+
+def test_update_row_refreshes_the_columns():
+    table = MarketTable([{"id": "1", "liquidity": 5000}, {"id": "2", "liquidity": 5000}])
+    table.update_row(1, {"spread": 0.2, "top_depth_usd": 10.0, "slippage_pct": None})
+    limits = RiskLimits(max_position_pct=0.2, min_liquidity_usd=1000, max_spread_pct=0.05)
+    assert [m["id"] for m in filter_markets(table, limits)] == ["1"]
+    assert table.markets[1]["spread"] == 0.2
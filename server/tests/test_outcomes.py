@@ -0,0 +1,33 @@
+import pytest
+from app.tools.polymarket.market_index import flatten_events
+from app.tools.polymarket.outcomes import OUTCOMES_KEY, OutcomeTable, outcome_table
+from app.tools.polymarket.clob_client import yes_token_id
+from app.tools.risk.sizing import get_outcome_price
+
+MARKET = {
+    "id": "1",
+    "outcomes": '["Yes", "No"]',
+    "outcomePrices": '["0.62", "0.38"]',
+    "clobTokenIds": '["tok-yes", "tok-no"]',
+}
+
+def test_lookup_is_case_insensitive():
+    table = OutcomeTable.from_market(MARKET)
+    assert table.price("YES") == 0.62 and table.price("no") == 0.38
+    assert table.token_id("No") == "tok-no"
+    assert table.row("Maybe") == -1 and table.price("Maybe") is None
+
+def test_parsed_once_at_ingestion():
+    [m] = flatten_events([{"slug": "e", "title": "E", "markets": [MARKET]}])
+    table = m[OUTCOMES_KEY]
+    assert outcome_table(m) is table
+    assert OUTCOMES_KEY not in MARKET  # cached payload untouched
+    assert get_outcome_price(m, "YES") == 62.0
+    assert yes_token_id(m) == "tok-yes"
+
+def test_named_outcomes_and_missing_data():
+    m = {"outcomes": ["Trump", "Harris"], "outcomePrices": ["0.55", "bad"]}
+    assert get_outcome_price(m, "Trump") == pytest.approx(55.0)
+    assert get_outcome_price(m, "Harris") == 0.0
+    assert get_outcome_price({}, "Yes") == 0.0  # default binary labels, no prices
+    assert yes_token_id({}) is None
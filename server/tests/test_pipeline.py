@@ -0,0 +1,59 @@
+import asyncio
+import pytest
+from app.tools.news import pipeline
+from app.utils.limits import ConcurrencyLimit
+
+def pools(spec):
+    return {kw: [{"url": f"https://{kw}.example/{i}", "title": f"{kw}-{i}"} for i in range(n)] for kw, n in spec.items()}
+
+@pytest.fixture
+def fake_extract(monkeypatch):
+    # Slow pages wait on an event nobody sets: they only end by being cancelled
+    state = {"started": [], "cancelled": [], "dead": set(), "slow": set(), "never": asyncio.Event()}
+
+    async def extract(url):
+        state["started"].append(url)
+        try:
+            if url in state["slow"]:
+                await state["never"].wait()
+            await asyncio.sleep(0)
+        except asyncio.CancelledError:
+            state["cancelled"].append(url)
+            raise
+        return None if url in state["dead"] else f"text of {url}"
+
+    monkeypatch.setattr(pipeline, "extract_article_content", extract)
+    return state
+
+async def test_round_robin_fairness(fake_extract):
+    items = await pipeline.extract_round_robin(pools({"a": 5, "b": 5, "c": 5}), ["a", "b", "c"], max_items=6)
+    assert [i["title"] for i in items] == ["a-0", "b-0", "c-0", "a-1", "b-1", "c-1"]
+    assert all(i["content"].startswith("text of") for i in items)
+
+async def test_failed_keyword_share_goes_to_others(fake_extract):
+    fake_extract["dead"] = {"https://b.example/0", "https://b.example/1"}
+    items = await pipeline.extract_round_robin(pools({"a": 5, "b": 2}), ["a", "b"], max_items=4)
+    assert [i["title"] for i in items] == ["a-0", "a-1", "a-2", "a-3"]
+
+async def test_outstanding_fetches_cancelled_at_cutoff(fake_extract):
+    fake_extract["slow"] = {"https://a.example/9"}
+    # The outer wait_for only guards against a hang; the cutoff itself must end the call
+    items = await asyncio.wait_for(pipeline.extract_round_robin(pools({"a": 10}), ["a"], max_items=3), 10)
+    assert [i["title"] for i in items] == ["a-0", "a-1", "a-2"]
+    assert "https://a.example/9" in fake_extract["cancelled"]
+
+async def test_slow_sites_bounded_by_one_timeout(fake_extract, monkeypatch):
+    monkeypatch.setattr(pipeline, "ARTICLE_TIMEOUT_S", 0.05)
+    # Four slots, so the four hung pages block every fetch until they time out
+    monkeypatch.setattr(pipeline, "_article_limit", ConcurrencyLimit(4))
+    fake_extract["slow"] = {f"https://a.example/{i}" for i in range(4)}
+    items = await asyncio.wait_for(pipeline.extract_round_robin(pools({"a": 8, "b": 8}), ["a", "b"], max_items=6), 10)
+    # The hung pages time out and the next candidates take their place, still dealt round-robin
+    assert [i["title"] for i in items] == ["a-4", "b-0", "a-5", "b-1", "a-6", "b-2"]
+    assert {f"https://a.example/{i}" for i in range(4)} <= set(fake_extract["cancelled"])
+
+async def test_duplicate_urls_extracted_once(fake_extract):
+    shared = {"url": "https://same.example/x", "title": "dup"}
+    items = await pipeline.extract_round_robin({"a": [shared], "b": [shared]}, ["a", "b"], max_items=5)
+    assert len(items) == 1
+    assert fake_extract["started"].count("https://same.example/x") == 1
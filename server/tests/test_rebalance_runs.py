@@ -0,0 +1,136 @@
+import asyncio
+import pytest
+from app.services.rebalance_runs import RebalanceRuns, request_key
+
+async def _collect(run):
+    return [event async for event in run.subscribe()]
+
+def test_request_key_normalizes_topic():
+    assert request_key(None, "  Bitcoin  ETF ", "Spot\nflows") == request_key(None, "bitcoin etf", "spot flows")
+    assert request_key(None, "bitcoin etf", None) != request_key(None, "bitcoin etf", "other")
+    assert request_key("crypto", None, None) != request_key(None, "crypto", None)
+
+async def test_concurrent_identical_requests_share_one_run():
+    runs = RebalanceRuns(result_ttl_s=60)
+    calls = []
+    gate = asyncio.Event()
+
+    async def runner(publish):
+        calls.append(1)
+        publish({"type": "log", "content": "searching"})
+        await gate.wait()
+        publish({"type": "result", "payload": {"ok": True}})
+
+    key = request_key(None, "btc", None)
+    first = runs.attach(key, runner)
+    early = asyncio.create_task(_collect(first))
+    await asyncio.sleep(0)
+    # A late joiner gets the events it missed replayed, then follows live
+    second = runs.attach(key, runner)
+    late = asyncio.create_task(_collect(second))
+    await asyncio.sleep(0)
+    gate.set()
+    expected = [{"type": "log", "content": "searching"}, {"type": "result", "payload": {"ok": True}}]
+    assert await early == expected and await late == expected
+    assert second is first and len(calls) == 1
+
+    # Finished runs are replayed within the TTL
+    assert await _collect(runs.attach(key, runner)) == expected
+    assert len(calls) == 1
+    assert runs.summary()["started"] == 1 and runs.summary()["joined"] == 1 and runs.summary()["replayed"] == 1
+
+async def test_expired_and_failed_runs_start_over():
+    runs = RebalanceRuns(result_ttl_s=0)
+    calls = []
+
+    async def runner(publish):
+        calls.append(1)
+        publish({"type": "result", "payload": len(calls)})
+
+    key = request_key(None, "btc", None)
+    await _collect(runs.attach(key, runner))
+    assert await _collect(runs.attach(key, runner)) == [{"type": "result", "payload": 2}]
+
+    runs = RebalanceRuns(result_ttl_s=60)
+
+    async def failing(publish):
+        calls.append(1)
+        raise RuntimeError("boom")
+
+    assert await _collect(runs.attach(key, failing)) == [{"type": "error", "message": "boom"}]
+    await _collect(runs.attach(key, failing))
+    assert len(calls) == 4 and runs.summary()["failed"] == 2
+
+async def test_disconnecting_subscriber_does_not_cancel_run():
+    runs = RebalanceRuns()
+    gate = asyncio.Event()
+
+    async def runner(publish):
+        publish({"type": "log", "content": "a"})
+        await gate.wait()
+        publish({"type": "result", "payload": 1})
+
+    run = runs.attach(request_key(None, "btc", None), runner)
+    stream = run.subscribe()
+    assert await stream.__anext__() == {"type": "log", "content": "a"}
+    await stream.aclose()
+    assert not run.subscribers
+    gate.set()
+    await run.task
+    assert run.events[-1] == {"type": "result", "payload": 1}
+
+async def test_route_coalesces_identical_requests(monkeypatch):
+    from app.api.routes import rebalance
+    from app.schemas.portfolio import RebalanceRequest
+    runs = RebalanceRuns()
+    monkeypatch.setattr(rebalance, "rebalance_runs", runs)
+    started = []
+
+    async def fake_run_graph(req, publish):
+        started.append(req.user_id)
+        await asyncio.sleep(0.01)
+        publish({"type": "result", "payload": {"topic": req.topic}})
+
+    monkeypatch.setattr(rebalance.runs_svc, "run_rebalance_graph", fake_run_graph)
+
+    async def body(user_id):
+        response = await rebalance.run_rebalance(RebalanceRequest(topic="Fed Rates", user_id=user_id))
+        return "".join([chunk async for chunk in response.body_iterator])
+
+    bodies = await asyncio.gather(body("a"), body("b"), body("c"))
+    assert started == ["a"]
+    assert bodies == ['data: {"type": "result", "payload": {"topic": "Fed Rates"}}\n\n'] * 3
+
+    with pytest.raises(Exception):
+        await rebalance.run_rebalance(RebalanceRequest(portfolio_id="missing"))
+
+@pytest.mark.parametrize("report", [
+    {"report_id": "evicted", "report_status": "pending"},
+    {"report_id": None, "report_status": "shed"},
+])
+async def test_unavailable_or_shed_report_does_not_fail_the_run(report, monkeypatch):
+    from app.schemas.portfolio import AllocationPlan, RebalanceRequest, ResearchResult
+    from app.services import rebalance_runs
+
+    class DoneGraph:
+        async def ainvoke(self, state):
+            return {"recommendation_text": "Buy", "allocation_plan": AllocationPlan(targets=[], trades=[], warnings=[]),
+                    "research_output": ResearchResult(keywords=[], risk_flags=[], evidence_items=[], summary="s"),
+                    **report}
+
+    class EvictingPool:
+        async def result(self, report_id, timeout=None):
+            raise KeyError(report_id)
+
+    async def no_portfolio(req):
+        return None
+
+    monkeypatch.setattr(rebalance_runs, "supervisor_graph", DoneGraph())
+    monkeypatch.setattr(rebalance_runs, "build_portfolio", no_portfolio)
+    monkeypatch.setattr(rebalance_runs, "render_pool", EvictingPool())
+    events = []
+    await rebalance_runs.run_rebalance_graph(RebalanceRequest(topic="btc"), events.append)
+    assert [e["type"] for e in events] == ["result", "report"]
+    # An evicted id reads as a failed render; a full render queue is announced, not silently skipped
+    status = "failed" if report["report_id"] else "shed"
+    assert events[1] == {"type": "report", "report_id": report["report_id"], "status": status, "report_ref": None}
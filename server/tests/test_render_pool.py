@@ -0,0 +1,125 @@
+import asyncio
+import time
+import pytest
+from app.api.routes import reports
+from app.schemas.portfolio import ArtifactRef, PortfolioDefinition, ResearchResult, RiskLimits
+from app.services.artifact_store import LocalArtifactStore
+from app.tools.output import render_pool
+from app.tools.output.render_pool import RenderPool
+from app.utils.cache import PersistentKV
+
+def _inputs():
+    research = ResearchResult(keywords=["btc"], risk_flags=["Volatility"], evidence_items=[{"title": "A", "url": "https://a"}],
+                              summary="Summary.", thesis_discourse="Thesis paragraph. " * 200)
+    pf = PortfolioDefinition(id="t", name="Test Fund", description="d", keywords=["btc"], universe_filters={},
+                             default_risk=RiskLimits(max_position_pct=0.2, min_liquidity_usd=0, max_spread_pct=0.1))
+    return research, pf
+
+REF = ArtifactRef(digest="a" * 64, size=3, content_type="application/pdf", url="/artifacts/" + "a" * 64)
+
+@pytest.fixture
+def records(tmp_path):
+    return PersistentKV("reports", path=str(tmp_path / "reports.sqlite3"))
+
+@pytest.mark.parametrize("workers", [0, 1])
+async def test_reports_render_in_background(workers, tmp_path, records, monkeypatch):
+    store = LocalArtifactStore(str(tmp_path))
+    monkeypatch.setattr(render_pool, "artifact_store", store)
+    pool = RenderPool(workers=workers, queue_size=2, retain=4, records=records)
+    try:
+        report_id = await pool.submit(*_inputs())
+        ref = await pool.result(report_id, timeout=60)
+        assert ref.content_type == "application/pdf" and ref.url == f"/artifacts/{ref.digest}"
+        assert b"".join(store.iter_range(ref.digest, 0, ref.size)).startswith(b"%PDF")
+        assert await pool.status(report_id) == "ready"
+    finally:
+        pool.shutdown()
+
+async def test_unknown_and_pending_reports(records, monkeypatch):
+    pool = RenderPool(workers=0, records=records)
+    with pytest.raises(KeyError):
+        await pool.result("missing")
+
+    gate = asyncio.Event()
+
+    async def slow_render(research, portfolio):
+        await gate.wait()
+        return REF
+
+    monkeypatch.setattr(pool, "_render", slow_render)
+    monkeypatch.setattr(reports, "render_pool", pool)
+    report_id = await pool.submit(*_inputs())
+
+    pending = await reports.get_report(report_id, wait=0)
+    assert pending.status_code == 202 and await pool.status(report_id) == "pending"
+    gate.set()
+    assert (await reports.get_report(report_id, wait=1))["report_ref"] == REF
+
+async def test_other_processes_answer_from_the_shared_records(records, monkeypatch):
+    renderer = RenderPool(workers=0, records=records)
+    gate = asyncio.Event()
+
+    async def slow_render(research, portfolio):
+        await gate.wait()
+        return REF
+
+    monkeypatch.setattr(renderer, "_render", slow_render)
+    report_id = await renderer.submit(*_inputs())
+
+    # A separate pool on the same records stands in for the API process
+    api = RenderPool(workers=0, records=PersistentKV("reports", path=records.path))
+    monkeypatch.setattr(reports, "render_pool", api)
+    assert (await reports.get_report(report_id, wait=0)).status_code == 202
+    gate.set()
+    assert (await reports.get_report(report_id, wait=5))["report_ref"] == REF
+
+async def test_failed_renders_are_recorded(records, monkeypatch):
+    pool = RenderPool(workers=0, records=records)
+
+    async def broken(research, portfolio):
+        raise RuntimeError("fpdf exploded")
+
+    monkeypatch.setattr(pool, "_render", broken)
+    report_id = await pool.submit(*_inputs())
+    assert await pool.result(report_id) is None
+    assert await pool.status(report_id) == "failed"
+
+async def test_full_queue_sheds_submissions(records, monkeypatch):
+    pool = RenderPool(workers=0, queue_size=1, records=records)
+    gate = asyncio.Event()
+
+    async def slow_render(research, portfolio):
+        await gate.wait()
+        return REF
+
+    monkeypatch.setattr(pool, "_render", slow_render)
+    first = await pool.submit(*_inputs())
+    assert first is not None
+    assert await pool.submit(*_inputs()) is None
+    assert pool.summary()["shed"] == 1
+    gate.set()
+    await pool.result(first)
+    second = await pool.submit(*_inputs())
+    assert second is not None and await pool.result(second) == REF
+
+async def test_pending_record_of_a_dead_owner_expires(records, monkeypatch):
+    # Another process wrote the record, then died mid-render
+    await records.aset("orphan", {"status": "pending", "report_ref": None, "owner": "gone:1", "deadline": time.time() - 1})
+    pool = RenderPool(workers=0, records=records)
+    assert await pool.status("orphan") == "failed"
+    assert await pool.result("orphan", timeout=5) is None
+
+async def test_renders_past_the_timeout_fail(records, monkeypatch):
+    pool = RenderPool(workers=0, records=records)
+    pool.render_timeout_s = 0.01
+    never = asyncio.Event()
+
+    async def hung(research, portfolio):
+        await never.wait()
+
+    monkeypatch.setattr(pool, "_render", hung)
+    report_id = await pool.submit(*_inputs())
+    record = (await records.aget(report_id)).value
+    assert record["owner"] == pool.owner and record["deadline"] > time.time() - 1
+    assert await pool.result(report_id, timeout=5) is None
+    assert await pool.status(report_id) == "failed"
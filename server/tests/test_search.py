@@ -0,0 +1,56 @@
+import asyncio
+import time
+import pytest
+from app.tools.news import search
+from app.utils.limits import ConcurrencyLimit
+
+@pytest.fixture
+def fake_tavily(monkeypatch):
+    state = {"active": 0, "peak": 0}
+
+    async def fake_search(query, max_results):
+        state["active"] += 1
+        state["peak"] = max(state["peak"], state["active"])
+        await asyncio.sleep(1.0 if query == "slow" else 0.05)
+        state["active"] -= 1
+        return {"results": [{"url": f"https://news.example/{query}", "title": query}]}
+
+    monkeypatch.setattr(search, "TAVILY_API_KEY", "tvly-test")
+    monkeypatch.setattr(search, "_tavily_search", fake_search)
+    return state
+
+async def test_searches_run_concurrently(fake_tavily):
+    queries = ["a", "b", "c", "d", "e"]
+    start = time.perf_counter()
+    results = await search.search_news_many(queries)
+    assert time.perf_counter() - start < 0.2
+    assert results["c"][0]["url"] == "https://news.example/c"
+
+async def test_concurrency_is_bounded(fake_tavily, monkeypatch):
+    monkeypatch.setattr(search, "_tavily_limit", ConcurrencyLimit(2))
+    await search.search_news_many(["a", "b", "c", "d", "e"])
+    assert fake_tavily["peak"] == 2
+
+async def test_slow_search_times_out_without_failing_others(fake_tavily, monkeypatch):
+    monkeypatch.setattr(search, "TAVILY_TIMEOUT_S", 0.2)
+    results = await search.search_news_many(["a", "slow"])
+    assert results["slow"] == []
+    assert len(results["a"]) == 1
+
+async def test_async_client_without_client_kwarg_falls_back_to_sync(monkeypatch):
+    class OldAsyncClient:
+        def __init__(self, api_key):
+            pass
+
+    class SyncClient:
+        def __init__(self, api_key):
+            pass
+
+        def search(self, query, search_depth, max_results):
+            return {"results": [{"url": f"https://news.example/{query}"}]}
+
+    monkeypatch.setattr(search, "TAVILY_API_KEY", "tvly-test")
+    monkeypatch.setattr(search, "AsyncTavilyClient", OldAsyncClient)
+    monkeypatch.setattr(search, "TavilyClient", SyncClient)
+    assert await search.search_news("btc") == [{"url": "https://news.example/btc"}]
+    assert search.AsyncTavilyClient is None
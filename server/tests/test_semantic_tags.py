@@ -0,0 +1,47 @@
+import pytest
+from app.tools.polymarket import gamma_client
+from app.utils.cache import LRUCache, PersistentKV
+
+TAGS = ["nba", "gaming", "crypto"]
+
+@pytest.fixture
+def llm_calls(monkeypatch, tmp_path):
+    calls = []
+
+    async def fake_match(query, available_tags):
+        calls.append(query)
+        if query == "boom":
+            raise RuntimeError("rate limited")
+        return {"hoops": "nba", "fps": "gaming"}.get(query.lower().strip())
+
+    monkeypatch.setattr(gamma_client, "_match_tag_with_llm", fake_match)
+    monkeypatch.setattr(gamma_client, "_tag_memo", LRUCache())
+    monkeypatch.setattr(gamma_client, "_tag_store", PersistentKV("tags", path=str(tmp_path / "tags.sqlite3")))
+    return calls
+
+async def test_repeat_queries_hit_memo(llm_calls):
+    assert await gamma_client.resolve_semantic_tag("Hoops", TAGS) == "nba"
+    assert await gamma_client.resolve_semantic_tag("  hoops ", TAGS) == "nba"
+    assert llm_calls == ["Hoops"]
+
+async def test_negative_results_are_cached(llm_calls):
+    assert await gamma_client.resolve_semantic_tag("Nutrition", TAGS) is None
+    assert await gamma_client.resolve_semantic_tag("nutrition", TAGS) is None
+    assert len(llm_calls) == 1
+
+async def test_persistent_store_survives_restart(llm_calls, monkeypatch):
+    await gamma_client.resolve_semantic_tag("FPS", TAGS)
+    monkeypatch.setattr(gamma_client, "_tag_memo", LRUCache())  # new process
+    assert await gamma_client.resolve_semantic_tag("fps", TAGS) == "gaming"
+    assert len(llm_calls) == 1
+    assert gamma_client.semantic_tag_cache_stats()["hits"] == 1
+
+async def test_tag_table_change_invalidates(llm_calls):
+    await gamma_client.resolve_semantic_tag("Hoops", TAGS)
+    await gamma_client.resolve_semantic_tag("Hoops", TAGS + ["basketball"])
+    assert len(llm_calls) == 2
+
+async def test_errors_are_not_cached(llm_calls):
+    assert await gamma_client.resolve_semantic_tag("boom", TAGS) is None
+    assert await gamma_client.resolve_semantic_tag("boom", TAGS) is None
+    assert len(llm_calls) == 2
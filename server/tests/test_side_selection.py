@@ -0,0 +1,65 @@
+import asyncio
+import json
+import re
+import pytest
+from langchain_core.messages import AIMessage
+from app.agents import side_selection
+from app.services import llm_gateway
+from app.utils.cache import PersistentKV
+
+class FakeChat:
+    def __init__(self, state):
+        self.state = state
+
+    async def ainvoke(self, messages):
+        ids = re.findall(r"^\[(\d+)\]", messages[-1].content, flags=re.M)
+        self.state["calls"].append(ids)
+        self.state["active"] += 1
+        self.state["peak"] = max(self.state["peak"], self.state["active"])
+        await asyncio.sleep(0.05)
+        self.state["active"] -= 1
+        if "0" in ids and self.state["fail_first"]:
+            self.state["fail_first"] = False
+            return AIMessage(content="Sorry, here is my analysis: ...")
+        # Valid JSON that skips an id the first time it is asked
+        answer = {i: {"side": "NO" if int(i) % 2 else "YES", "reasoning": f"r{i}", "confidence": 70 + int(i) % 30}
+                  for i in ids if i not in self.state["skip_once"]}
+        self.state["skip_once"] -= set(ids)
+        return AIMessage(content=json.dumps(answer))
+
+@pytest.fixture
+def chat(tmp_path, monkeypatch):
+    state = {"calls": [], "active": 0, "peak": 0, "fail_first": True, "skip_once": {"12"}}
+    monkeypatch.setattr(llm_gateway, "_llm_store", PersistentKV("llm_test", path=str(tmp_path / "llm.sqlite3")))
+    monkeypatch.setattr(llm_gateway, "_chat_model", lambda model, temperature, **params: FakeChat(state))
+    monkeypatch.setattr(side_selection, "SIDE_BATCH_SIZE", 10)
+    return state
+
+def _markets(n):
+    return [{"question": f"Will thing {i} happen?", "event_title": f"Event {i // 2}"} for i in range(n)]
+
+async def test_all_markets_scored_in_concurrent_batches_with_retries(chat):
+    markets = _markets(45)
+    scored = await side_selection.select_sides("Topic", "Desc", "Summary", markets)
+
+    assert len(scored) == 45  # Nothing is cut at 30
+    assert scored["Will thing 3 happen?"] == {"side": "NO", "reasoning": "r3", "confidence": 73}
+    first_wave = chat["calls"][:5]
+    assert sorted(len(c) for c in first_wave) == [5, 10, 10, 10, 10]
+    assert chat["peak"] > 1
+    # Only the failed batch (ids 0-9, bad JSON) and the skipped id 12 were re-asked
+    retried = sorted(int(i) for c in chat["calls"][5:] for i in c)
+    assert retried == list(range(10)) + [12]
+
+def test_parse_batch_keeps_only_valid_entries():
+    content = '```json\n{"1": {"side": "yes", "confidence": "81"}, "2": {"side": "MAYBE", "confidence": 90}, "3": {"side": "NO"}}\n```'
+    assert side_selection.parse_batch(content, ["1", "2", "3"]) == {"1": {"side": "YES", "reasoning": "", "confidence": 81}}
+    assert side_selection.parse_batch("not json", ["1"]) == {}
+
+async def test_shared_questions_are_scored_once(chat):
+    markets = _markets(12) + [{"question": "Will thing 3 happen?", "event_title": "Other event"}]
+    assert len(side_selection.questions_to_score(markets)) == 12
+    scored = await side_selection.select_sides("Topic", "Desc", "Summary", markets)
+    assert len(scored) == len(side_selection.questions_to_score(markets))
+    first_pass = [i for c in chat["calls"][:2] for i in c]
+    assert sorted(first_pass, key=int) == [str(i) for i in range(12)]  # the shared question is asked once
@@ -0,0 +1,72 @@
+import pytest
+from app.schemas.portfolio import AllocationPlan, RiskLimits, TargetAllocation
+from app.services.funds_svc import holdings_risk_metrics
+from app.tools.risk.simulation import simulate_plan, simulate_portfolio
+from app.tools.risk.sizing import create_allocation_plan
+
+def test_single_contract_matches_closed_form():
+    # 50% of bankroll in one contract at 0.4 that resolves with p = 0.4
+    m = simulate_portfolio([0.5], [0.4], ["a"], scenarios=200_000, seed=7)
+    assert m.scenarios == 200_000
+    assert m.prob_loss == pytest.approx(0.6, abs=0.01)
+    assert m.expected_return_pct == pytest.approx(0.0, abs=0.5)
+    assert m.var_95_pct == pytest.approx(50.0)
+    assert m.max_drawdown_pct == pytest.approx(50.0)
+    assert m.expected_max_drawdown_pct == pytest.approx(30.0, abs=0.5)
+
+def test_model_edge_and_seed_reproducibility():
+    a = simulate_portfolio([0.2, 0.2], [0.5, 0.5], ["a", "b"], probabilities=[0.7, 0.7], scenarios=50_000, seed=1)
+    b = simulate_portfolio([0.2, 0.2], [0.5, 0.5], ["a", "b"], probabilities=[0.7, 0.7], scenarios=50_000, seed=1)
+    assert a == b
+    assert a.expected_return_pct == pytest.approx(16.0, abs=0.5)
+    assert a.sharpe > 0
+
+def test_event_correlation_fattens_the_tail():
+    weights, prices = [0.25] * 4, [0.5] * 4
+    independent = simulate_portfolio(weights, prices, ["a", "b", "c", "d"], scenarios=100_000, seed=3)
+    correlated = simulate_portfolio(weights, prices, ["e"] * 4, scenarios=100_000, seed=3)
+    assert correlated.std_pct > independent.std_pct
+    assert correlated.cvar_95_pct >= independent.cvar_95_pct
+
+def test_unpriced_positions_are_ignored():
+    assert simulate_portfolio([0.5, 0.5], [0.0, 1.0], ["a", "b"]) is None
+
+def test_plan_and_holdings_adapters():
+    plan = AllocationPlan(targets=[
+        TargetAllocation(market_id="1", market_slug="m1", question="Q1", outcome="YES", weight=0.3, rationale="", last_price=60.0),
+        TargetAllocation(market_id="2", market_slug="m2", question="Q2", outcome="NO", weight=0.2, rationale="", last_price=25.0),
+    ], trades=[], warnings=[])
+    assert simulate_plan(plan, scenarios=10_000, seed=0).var_95_pct > 0
+
+    holdings = [
+        {"slug": "m1", "weightPct": 60.0, "lastPrice": 0.6, "expiryDate": "2026-12-01"},
+        {"slug": "m2", "weightPct": 40.0, "prob": 25.0, "expiryDate": None},
+    ]
+    m = holdings_risk_metrics(holdings, scenarios=10_000, seed=0)
+    assert 0 < m.max_drawdown_pct <= 100
+
+def test_plan_simulation_correlates_a_series():
+    def plan_for(series):
+        markets = [{"id": str(i), "event_title": f"Event {i}", "question": f"Q{i}", "liquidity": 1e6,
+                    "event_series": series, "event_tags": f"Tag{i}",
+                    "outcomes": '["Yes", "No"]', "outcomePrices": '["0.5", "0.5"]'} for i in range(4)]
+        rationales = {f"Q{i}": {"side": "YES", "confidence": 95} for i in range(4)}
+        limits = RiskLimits(max_position_pct=0.25, min_liquidity_usd=0, max_spread_pct=0.05)
+        return create_allocation_plan(markets, 1000, limits, event_rationales=rationales, strategy="simplex")
+
+    independent, series = plan_for(None), plan_for("fed-decisions")
+    assert len({t.correlation_group for t in series.targets}) == 1
+    assert len({t.correlation_group for t in independent.targets}) == 4
+    a = simulate_plan(independent, scenarios=50_000, seed=5)
+    b = simulate_plan(series, scenarios=50_000, seed=5)
+    assert b.std_pct > a.std_pct * 1.2
+
+def test_plan_drawdown_follows_resolution_dates_not_list_order():
+    def target(i, price, end_date):
+        return TargetAllocation(market_id=str(i), question=f"Q{i}", outcome="YES", weight=0.3, rationale="",
+                                last_price=price, end_date=end_date)
+
+    targets = [target(0, 90.0, "2026-12-01T00:00:00Z"), target(1, 20.0, "2026-11-01"), target(2, 50.0, None)]
+    metrics = [simulate_plan(AllocationPlan(targets=order, trades=[], warnings=[]), scenarios=20_000, seed=4)
+               for order in (targets, targets[::-1], [targets[2], targets[0], targets[1]])]
+    assert metrics[0] == metrics[1] == metrics[2]
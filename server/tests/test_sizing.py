@@ -0,0 +1,102 @@
+import numpy as np
+import pytest
+from app.schemas.portfolio import RiskLimits
+from app.tools.risk import optimizer
+from app.tools.risk.optimizer import SizingInputs, capped_simplex, position_caps, size_positions
+from app.tools.risk.sizing import create_allocation_plan
+
+def inputs(confidence, price, caps=None, groups=None, group_cap=1.0):
+    n = len(confidence)
+    return SizingInputs(
+        confidence=np.array(confidence, dtype=float),
+        price=np.array(price, dtype=float),
+        caps=np.array(caps if caps is not None else [1.0] * n, dtype=float),
+        groups=np.array(groups if groups is not None else list(range(n))),
+        group_cap=group_cap,
+    )
+
+def test_capped_simplex_projection():
+    w = capped_simplex(np.array([0.9, 0.5, 0.1]), np.array([0.4, 0.4, 0.4]))
+    assert w.sum() == pytest.approx(1.0)
+    assert w.max() <= 0.4 + 1e-9
+    assert w[0] == pytest.approx(0.4) and w[1] == pytest.approx(0.4)
+    # Caps that can't reach 1.0 are returned as-is
+    assert capped_simplex(np.array([1.0, 1.0]), np.array([0.2, 0.3])).tolist() == [0.2, 0.3]
+
+def test_fractional_kelly():
+    result = size_positions(inputs([80, 60, 50], [0.6, 0.6, 0.4]), "kelly")
+    # f* = (0.8 - 0.6) / 0.4 = 0.5 -> quarter Kelly 0.125; no edge -> 0
+    assert result.weights == pytest.approx([optimizer.KELLY_FRACTION * 0.5, 0.0, optimizer.KELLY_FRACTION * (0.1 / 0.6)])
+    assert result.strategy == "kelly"
+
+def test_kelly_without_prices_falls_back_to_heuristic():
+    result = size_positions(inputs([80, 82, 85], [np.nan] * 3), "kelly")
+    assert result.strategy == "heuristic"
+    assert result.weights == pytest.approx([0.0, 0.4 / 1.4, 1.0 / 1.4])
+
+def test_caps_enforced_for_every_strategy():
+    rng = np.random.default_rng(3)
+    n = 60
+    case = inputs(rng.uniform(65, 99, n), rng.uniform(0.05, 0.95, n), caps=rng.uniform(0.01, 0.2, n),
+                  groups=rng.integers(0, 15, n), group_cap=0.15)
+    for name in optimizer.SIZING_STRATEGIES:
+        w = size_positions(case, name).weights
+        assert (w >= -1e-12).all() and (w <= case.caps + 1e-9).all(), name
+        assert np.bincount(case.groups, weights=w).max() <= case.group_cap + 1e-9, name
+        assert w.sum() <= 1.0 + 1e-9, name
+
+def test_fully_invested_strategies_redistribute_capped_weight():
+    case = inputs([90, 90, 70], [0.5] * 3, caps=[0.3, 0.6, 0.6], groups=[0, 0, 1], group_cap=0.6)
+    w = size_positions(case, "simplex").weights
+    assert w.sum() == pytest.approx(1.0)
+    assert w[0] + w[1] == pytest.approx(0.6)
+
+def test_mean_variance_prefers_edge_and_diversifies():
+    case = inputs([80, 80, 55], [0.5, 0.5, 0.6], caps=[0.5] * 3)
+    w = size_positions(case, "mean_variance").weights
+    assert w[2] == pytest.approx(0.0)
+    assert w[0] == pytest.approx(w[1]) and w[0] > 0
+
+def test_liquidity_scaled_caps():
+    caps = position_caps(np.array([1000.0, 1e6, np.nan]), bankroll=10_000, max_position_pct=0.2)
+    assert caps.tolist() == pytest.approx([0.005, 0.2, 0.2])
+
+def test_plan_enforces_max_position_pct():
+    markets = [{"id": str(i), "event_title": f"E{i}", "question": f"Q{i}", "liquidity": 1e6,
+                "outcomes": '["Yes", "No"]', "outcomePrices": '["0.5", "0.5"]'} for i in range(3)]
+    rationales = {f"Q{i}": {"side": "YES", "confidence": 95} for i in range(3)}
+    limits = RiskLimits(max_position_pct=0.1, min_liquidity_usd=0, max_spread_pct=0.05)
+    plan = create_allocation_plan(markets, 1000, limits, event_rationales=rationales, strategy="simplex")
+    assert [t.weight for t in plan.targets] == pytest.approx([0.1] * 3)
+    assert "simplex" in plan.trades[0].reason
+    assert any("30%" in w for w in plan.warnings)
+
+def test_plan_caps_events_of_one_series_together():
+    markets = [{"id": str(i), "event_title": f"Fed {i}", "question": f"Q{i}", "liquidity": 1e6,
+                "event_series": "fed-decisions" if i < 3 else None, "event_tags": "Economy Fed" if i < 3 else f"Other{i}",
+                "outcomes": '["Yes", "No"]', "outcomePrices": '["0.5", "0.5"]'} for i in range(5)]
+    rationales = {f"Q{i}": {"side": "YES", "confidence": 95} for i in range(5)}
+    limits = RiskLimits(max_position_pct=0.15, min_liquidity_usd=0, max_spread_pct=0.05, max_event_pct=0.2)
+    plan = create_allocation_plan(markets, 1000, limits, event_rationales=rationales, strategy="simplex")
+    by_group = {}
+    for t in plan.targets:
+        by_group.setdefault(t.correlation_group, []).append(t.weight)
+    assert len(by_group["series:fed-decisions"]) == 3
+    assert sum(by_group["series:fed-decisions"]) == pytest.approx(0.2)
+    assert by_group["event:Fed 3"] == pytest.approx([0.15])
+
+def test_shared_tags_do_not_correlate_events():
+    a = {"event_slug": "a", "event_tags": "Sports"}
+    b = {"event_slug": "b", "event_tags": "Sports"}
+    assert optimizer.correlation_key(a) != optimizer.correlation_key(b)
+    assert optimizer.correlation_key({**a, "event_series": "nba"}) == optimizer.correlation_key({**b, "event_series": "nba"})
+
+def test_default_strategy_is_fully_invested(monkeypatch):
+    markets = [{"id": str(i), "event_title": f"E{i}", "question": f"Q{i}", "liquidity": 1e6,
+                "outcomes": '["Yes", "No"]', "outcomePrices": '["0.9", "0.1"]'} for i in range(6)]
+    rationales = {f"Q{i}": {"side": "YES", "confidence": 70 + i} for i in range(6)}
+    limits = RiskLimits(max_position_pct=0.5, min_liquidity_usd=0, max_spread_pct=0.05)
+    plan = create_allocation_plan(markets, 1000, limits, event_rationales=rationales)
+    # No edge at these prices, yet the legacy default still deploys the whole bankroll
+    assert optimizer.SIZING_STRATEGY == "heuristic"
+    assert sum(t.weight for t in plan.targets) == pytest.approx(1.0)
@@ -0,0 +1,47 @@
+import asyncio
+import time
+from app.graphs import supervisor_graph
+
+BRANCH_S = 0.3
+
+def _state():
+    return {"portfolio": None, "bankroll": 100.0, "user_id": "test", "research_completed": False,
+            "research_output": None, "candidate_markets": None, "allocation_plan": None, "messages": []}
+
+async def test_research_and_market_discovery_run_in_parallel(monkeypatch):
+    seen = {}
+
+    async def research(state):
+        await asyncio.sleep(BRANCH_S)
+        return {"research_output": "summary", "research_completed": True, "messages": ["research"],
+                "structured_logs": [{"node": "Research Agent"}]}
+
+    async def discovery(state):
+        await asyncio.sleep(BRANCH_S)
+        return {"candidate_markets": [{"id": "1"}], "messages": ["discovery"],
+                "structured_logs": [{"node": "Market Discovery"}]}
+
+    async def allocator(state):
+        seen.update(research=state["research_output"], markets=state["candidate_markets"])
+        return {"allocation_plan": None, "messages": ["allocator"], "structured_logs": [{"node": "Allocator Agent"}]}
+
+    async def orchestrator(state):
+        return {"recommendation_text": "done", "messages": ["orchestrator"]}
+
+    monkeypatch.setattr(supervisor_graph, "research_node", research)
+    monkeypatch.setattr(supervisor_graph, "market_discovery_node", discovery)
+    monkeypatch.setattr(supervisor_graph, "allocator_node", allocator)
+    monkeypatch.setattr(supervisor_graph, "orchestrator_node", orchestrator)
+    graph = supervisor_graph.build_graph()
+
+    start = time.perf_counter()
+    final = await graph.ainvoke(_state())
+    elapsed = time.perf_counter() - start
+
+    assert elapsed < 1.6 * BRANCH_S
+    # The allocator runs once, after both branches, and sees both outputs
+    assert seen == {"research": "summary", "markets": [{"id": "1"}]}
+    # Branch outputs are merged by the reducers, not overwritten
+    assert sorted(final["messages"][:2]) == ["discovery", "research"]
+    assert final["messages"][2:] == ["allocator", "orchestrator"]
+    assert {log["node"] for log in final["structured_logs"]} == {"Research Agent", "Market Discovery", "Allocator Agent"}